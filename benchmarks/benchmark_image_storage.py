@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:59:58 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import argparse
+import random
+
+from time import perf_counter
+from tempfile import TemporaryDirectory
+
+from local.lib.image_store import Folder_Image_Store, Packed_Image_Store
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def parse_benchmark_args():
+    
+    # Set up argument parsing
+    ap_obj = argparse.ArgumentParser(description = "Compare image storage engines on saving, loading & deleting")
+    ap_obj.add_argument("-n", "--num_images", default = 20000, type = int,
+                        help = "Number of images saved by each engine. Default: 20000")
+    ap_obj.add_argument("-p", "--period_ms", default = 1000, type = int,
+                        help = "Time between (fake) snapshots, in milliseconds. Default: 1000")
+    ap_obj.add_argument("-s", "--image_size_kb", default = 30, type = int,
+                        help = "Size of each (fake) image, in kilobytes. Default: 30")
+    ap_obj.add_argument("-r", "--num_reads", default = 5000, type = int,
+                        help = "Number of random image reads. Default: 5000")
+    ap_obj.add_argument("-d", "--data_folder", default = None, type = str,
+                        help = "Folder used to store benchmark data (a temporary folder is created inside)."
+                               " Default: system temp folder")
+    
+    return vars(ap_obj.parse_args())
+
+# .....................................................................................................................
+
+def count_files(folder_path):
+    return sum(len(each_files_list) for _, _, each_files_list in os.walk(folder_path))
+
+# .....................................................................................................................
+
+def run_engine_benchmark(store_class, data_folder_path, epoch_ms_list, image_data, read_ems_list):
+    
+    ''' Function used to time saving, random reading & deleting images for a single storage engine '''
+    
+    # Use a fresh storage folder for every engine
+    with TemporaryDirectory(dir = data_folder_path) as temp_folder_path:
+        
+        image_store = store_class(temp_folder_path)
+        camera_select, image_type = "benchmark_cam", "snapshots"
+        
+        # Time saving every image
+        t1 = perf_counter()
+        for each_ems in epoch_ms_list:
+            image_store.put(camera_select, image_type, each_ems, image_data)
+        t2 = perf_counter()
+        put_time_sec = (t2 - t1)
+        
+        # Count how many files are needed to store all images
+        num_files = count_files(temp_folder_path)
+        
+        # Time reading images in random order
+        t1 = perf_counter()
+        for each_ems in read_ems_list:
+            image_store.get(camera_select, image_type, each_ems)
+        t2 = perf_counter()
+        get_time_sec = (t2 - t1)
+        
+        # Time deleting all images (i.e. autodelete)
+        t1 = perf_counter()
+        image_store.delete_before(camera_select, image_type, epoch_ms_list[-1] + 1)
+        t2 = perf_counter()
+        delete_time_sec = (t2 - t1)
+    
+    return put_time_sec, get_time_sec, delete_time_sec, num_files
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Main
+
+if __name__ == "__main__":
+    
+    # Get script arguments
+    script_args = parse_benchmark_args()
+    num_images = script_args["num_images"]
+    period_ms = script_args["period_ms"]
+    image_size_kb = script_args["image_size_kb"]
+    num_reads = script_args["num_reads"]
+    data_folder_path = script_args["data_folder"]
+    
+    # Build (fake) image data & timestamps, starting on an hour boundary
+    random.seed(0)
+    start_ems = 1600000000000 - (1600000000000 % 3600000)
+    epoch_ms_list = [start_ems + each_idx * period_ms for each_idx in range(num_images)]
+    read_ems_list = [random.choice(epoch_ms_list) for _ in range(num_reads)]
+    image_data = os.urandom(image_size_kb * 1000)
+    
+    # Compare all engines
+    engines_dict = {"folders": Folder_Image_Store, "packed": Packed_Image_Store}
+    print("", "{:>8}  {:>10}  {:>10}  {:>10}  {:>8}".format("engine", "put/s", "get/s", "delete", "files"),
+          sep = "\n")
+    for each_engine_name, each_store_class in engines_dict.items():
+        put_sec, get_sec, delete_sec, num_files = \
+            run_engine_benchmark(each_store_class, data_folder_path, epoch_ms_list, image_data, read_ems_list)
+        print("{:>8}  {:>10.0f}  {:>10.0f}  {:>7.1f} ms  {:>8}".format(each_engine_name,
+                                                                      num_images / put_sec,
+                                                                      num_reads / get_sec,
+                                                                      1000 * delete_sec,
+                                                                      num_files))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:40:18 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import argparse
+import threading
+
+from time import perf_counter, sleep, time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from local.lib.environment import get_dbserver_protocol, get_dbserver_port
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def parse_benchmark_args():
+    
+    # Set defaults
+    default_url = "{}://localhost:{}".format(get_dbserver_protocol(), get_dbserver_port())
+    
+    # Set up argument parsing
+    ap_obj = argparse.ArgumentParser(description = "Measure GET latency while many cameras are uploading data")
+    ap_obj.add_argument("-u", "--url", default = default_url, type = str,
+                        help = "Base url of the (already running) dbserver. Default: {}".format(default_url))
+    ap_obj.add_argument("-n", "--num_cameras", default = 30, type = int,
+                        help = "Number of (fake) cameras uploading at the same time. Default: 30")
+    ap_obj.add_argument("-t", "--duration_sec", default = 15.0, type = float,
+                        help = "Duration of each measurement phase, in seconds. Default: 15")
+    ap_obj.add_argument("-s", "--image_size_kb", default = 150, type = int,
+                        help = "Size of each (fake) uploaded image, in kilobytes. Default: 150")
+    ap_obj.add_argument("-g", "--get_threads", default = 4, type = int,
+                        help = "Number of threads issuing GET requests during measurements. Default: 4")
+    ap_obj.add_argument("--keep_data", default = False, action = "store_true",
+                        help = "Don't delete the fake camera data after the benchmark completes")
+    
+    return vars(ap_obj.parse_args())
+
+# .....................................................................................................................
+
+def get_benchmark_camera_names(num_cameras):
+    return ["benchmark_cam_{}".format(k) for k in range(num_cameras)]
+
+# .....................................................................................................................
+
+def build_fake_snapshot_metadata(epoch_ms):
+    return {"_id": epoch_ms, "epoch_ms": epoch_ms, "frame_index": 0, "snapshot_index": 0,
+            "datetime_isoformat": "", "frame_width": 640, "frame_height": 360}
+
+# .....................................................................................................................
+
+def upload_one_snapshot(session, base_url, camera_name, epoch_ms, image_bytes):
+    
+    ''' Mimics the upload of a single snapshot (metadata + image) from a camera '''
+    
+    metadata_url = "/".join([base_url, camera_name, "bdb", "metadata", "snapshots"])
+    image_url = "/".join([base_url, camera_name, "bdb", "image", "snapshots", str(epoch_ms)])
+    
+    session.post(metadata_url, json = build_fake_snapshot_metadata(epoch_ms))
+    session.post(image_url, data = image_bytes)
+    
+    return
+
+# .....................................................................................................................
+
+def run_uploader(base_url, camera_name, image_bytes, stop_event, upload_counter):
+    
+    ''' Function run (in a thread) to continuously upload snapshots, as fast as possible, for one camera '''
+    
+    # Use a unique timestamp offset per camera, to avoid duplicate timings when uploading quickly
+    epoch_ms = int(time() * 1000)
+    with requests.Session() as session:
+        while not stop_event.is_set():
+            epoch_ms += 1
+            try:
+                upload_one_snapshot(session, base_url, camera_name, epoch_ms, image_bytes)
+                upload_counter.append(1)
+            except requests.exceptions.RequestException:
+                sleep(0.01)
+    
+    return
+
+# .....................................................................................................................
+
+def measure_get_latency(get_url, duration_sec, num_threads):
+    
+    ''' Function which repeatedly hits a GET route for a given duration, and records the response times '''
+    
+    end_time = perf_counter() + duration_sec
+    
+    def timing_loop():
+        timings_ms = []
+        with requests.Session() as session:
+            while perf_counter() < end_time:
+                t1 = perf_counter()
+                session.get(get_url)
+                t2 = perf_counter()
+                timings_ms.append(1000 * (t2 - t1))
+        return timings_ms
+    
+    # Run the timing loop on multiple threads, to mimic several clients
+    with ThreadPoolExecutor(max_workers = num_threads) as pool:
+        futures_list = [pool.submit(timing_loop) for _ in range(num_threads)]
+        all_timings_ms = [each_time for each_future in futures_list for each_time in each_future.result()]
+    
+    return all_timings_ms
+
+# .....................................................................................................................
+
+def get_percentile(sorted_values_list, percentile):
+    
+    if not sorted_values_list:
+        return float("nan")
+    
+    idx = int(round((percentile / 100) * (len(sorted_values_list) - 1)))
+    
+    return sorted_values_list[idx]
+
+# .....................................................................................................................
+
+def print_latency_summary(title, timings_ms_list, duration_sec):
+    
+    sorted_timings = sorted(timings_ms_list)
+    p50, p90, p99 = [get_percentile(sorted_timings, each_pct) for each_pct in (50, 90, 99)]
+    requests_per_sec = len(sorted_timings) / duration_sec
+    
+    print("",
+          title,
+          "  GET requests: {} ({:.1f} / sec)".format(len(sorted_timings), requests_per_sec),
+          "  p50: {:.2f} ms".format(p50),
+          "  p90: {:.2f} ms".format(p90),
+          "  p99: {:.2f} ms".format(p99),
+          sep = "\n")
+    
+    return p99
+
+# .....................................................................................................................
+
+def remove_benchmark_cameras(base_url, camera_names_list):
+    
+    sanity_check_ems = int(time() * 1000)
+    for each_camera_name in camera_names_list:
+        remove_url = "/".join([base_url, "remove", "one-camera", each_camera_name, str(sanity_check_ems)])
+        requests.get(remove_url)
+    
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Main
+
+if __name__ == "__main__":
+    
+    # Get script arguments
+    script_args = parse_benchmark_args()
+    base_url = script_args["url"].rstrip("/")
+    num_cameras = script_args["num_cameras"]
+    duration_sec = script_args["duration_sec"]
+    image_size_kb = script_args["image_size_kb"]
+    num_get_threads = script_args["get_threads"]
+    keep_data = script_args["keep_data"]
+    
+    # Make sure the server is reachable before doing anything
+    try:
+        requests.get("{}/is-alive".format(base_url), timeout = 5)
+    except requests.exceptions.RequestException:
+        print("", "Couldn't connect to dbserver!", "@ {}".format(base_url), "", sep = "\n")
+        raise SystemExit()
+    
+    # Seed every camera with a single entry, so that the GET route always has data to return
+    camera_names_list = get_benchmark_camera_names(num_cameras)
+    fake_image_bytes = os.urandom(1000 * image_size_kb)
+    with requests.Session() as seed_session:
+        for each_camera_name in camera_names_list:
+            upload_one_snapshot(seed_session, base_url, each_camera_name, 1, fake_image_bytes)
+    
+    # Use a db-backed GET route, so that we measure contention with database access
+    get_url = "/".join([base_url, camera_names_list[0], "snapshots", "get-newest-metadata"])
+    print("", "Measuring latency of: {}".format(get_url), sep = "\n")
+    
+    # Measure GET performance without any uploads
+    idle_timings_ms = measure_get_latency(get_url, duration_sec, num_get_threads)
+    idle_p99 = print_latency_summary("Idle server:", idle_timings_ms, duration_sec)
+    
+    # Start all the uploaders
+    stop_event = threading.Event()
+    upload_counter = []
+    uploader_threads = []
+    for each_camera_name in camera_names_list:
+        new_thread = threading.Thread(target = run_uploader,
+                                      args = (base_url, each_camera_name, fake_image_bytes,
+                                              stop_event, upload_counter),
+                                      daemon = True)
+        new_thread.start()
+        uploader_threads.append(new_thread)
+    
+    # Measure GET performance while uploads are occurring
+    loaded_timings_ms = measure_get_latency(get_url, duration_sec, num_get_threads)
+    stop_event.set()
+    for each_thread in uploader_threads:
+        each_thread.join()
+    
+    # Report results
+    upload_title = "During uploads ({} cameras, {} snapshots uploaded):".format(num_cameras, len(upload_counter))
+    loaded_p99 = print_latency_summary(upload_title, loaded_timings_ms, duration_sec)
+    print("", "p99 ratio (uploading / idle): {:.2f}x".format(loaded_p99 / max(idle_p99, 1E-6)), "", sep = "\n")
+    
+    # Clean up the fake data
+    if not keep_data:
+        remove_benchmark_cameras(base_url, camera_names_list)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:58:05 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import argparse
+import random
+
+from time import perf_counter
+
+from local.lib.response_helpers import select_json_serializer, encode_int_list_json_bytes
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def parse_benchmark_args():
+    
+    # Set up argument parsing
+    ap_obj = argparse.ArgumentParser(description = "Compare json serializers on typical response payloads")
+    ap_obj.add_argument("-n", "--num_entries", default = 5000, type = int,
+                        help = "Number of entries (objects, stations, snapshots) in each payload. Default: 5000")
+    ap_obj.add_argument("-e", "--num_epochs", default = 100000, type = int,
+                        help = "Number of values in the epoch ms list payload. Default: 100000")
+    ap_obj.add_argument("-x", "--num_repeats", default = 5, type = int,
+                        help = "Number of times to repeat each test (best time is reported). Default: 5")
+    
+    return vars(ap_obj.parse_args())
+
+# .....................................................................................................................
+
+def make_object_payload(num_objects, start_ems = 1600000000000, samples_per_object = 150):
+    
+    ''' Builds an object 'get-many-metadata' style payload: a dictionary of object metadata, keyed by id '''
+    
+    payload_dict = {}
+    for obj_idx in range(num_objects):
+        obj_id = 20200101000000 + obj_idx
+        first_ems = start_ems + obj_idx * 1000
+        payload_dict[obj_id] = {"_id": obj_id,
+                                "first_epoch_ms": first_ems,
+                                "final_epoch_ms": first_ems + samples_per_object * 100,
+                                "num_samples": samples_per_object,
+                                "classification": "pedestrian",
+                                "tracking": {"x_center": [random.random() for _ in range(samples_per_object)],
+                                             "y_center": [random.random() for _ in range(samples_per_object)],
+                                             "width": [random.random() for _ in range(samples_per_object)],
+                                             "height": [random.random() for _ in range(samples_per_object)]}}
+    
+    return payload_dict
+
+# .....................................................................................................................
+
+def make_station_payload(num_stations, start_ems = 1600000000000, samples_per_station = 300):
+    
+    ''' Builds a station 'get-many-metadata' style payload: a dictionary of station metadata, keyed by id '''
+    
+    payload_dict = {}
+    for stn_idx in range(num_stations):
+        stn_id = 30200101000000 + stn_idx
+        first_ems = start_ems + stn_idx * 30000
+        payload_dict[stn_id] = {"_id": stn_id,
+                                "first_epoch_ms": first_ems,
+                                "final_epoch_ms": first_ems + 30000,
+                                "station_name": "zone_{}".format(stn_idx % 4),
+                                "data": [random.randint(0, 255) for _ in range(samples_per_station)]}
+    
+    return payload_dict
+
+# .....................................................................................................................
+
+def make_snapshot_payload(num_snapshots, start_ems = 1600000000000):
+    
+    ''' Builds a snapshot 'get-many-metadata' style payload: a list of snapshot metadata '''
+    
+    return [{"_id": start_ems + snap_idx * 1000,
+             "datetime_isoformat": "2020-09-13T08:26:40.000000-04:00",
+             "frame_index": snap_idx,
+             "snapshot_width": 480,
+             "snapshot_height": 270}
+            for snap_idx in range(num_snapshots)]
+
+# .....................................................................................................................
+
+def measure(encode_func, payload, num_repeats):
+    
+    ''' Helper used to measure the best-case encoding time (in ms) & the encoded size (in bytes) of a payload '''
+    
+    best_time_ms = None
+    for _ in range(num_repeats):
+        t1 = perf_counter()
+        encoded_bytes = encode_func(payload)
+        t2 = perf_counter()
+        time_ms = 1000 * (t2 - t1)
+        best_time_ms = time_ms if best_time_ms is None else min(best_time_ms, time_ms)
+    
+    return best_time_ms, len(encoded_bytes)
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Main
+
+if __name__ == "__main__":
+    
+    # Get script arguments
+    script_args = parse_benchmark_args()
+    num_entries = script_args["num_entries"]
+    num_epochs = script_args["num_epochs"]
+    num_repeats = script_args["num_repeats"]
+    
+    # Build typical payloads
+    random.seed(0)
+    payloads_dict = {"objects": make_object_payload(num_entries),
+                     "stations": make_station_payload(num_entries),
+                     "snapshots": make_snapshot_payload(num_entries),
+                     "epoch_ms": [1600000000000 + each_idx * 1000 for each_idx in range(num_epochs)]}
+    
+    # Get every available serializer (skipping any that aren't installed)
+    serializers_dict = {}
+    for each_name in ["json", "ujson", "orjson"]:
+        selected_name, encode_func = select_json_serializer(each_name)
+        if selected_name == each_name:
+            serializers_dict[each_name] = encode_func
+        else:
+            print("", "Skipping {} (not installed)".format(each_name), sep = "\n")
+    
+    # Compare all serializers on every payload
+    print("", "{:>10}  {:>14}  {:>12}  {:>12}".format("payload", "serializer", "best time", "size"), sep = "\n")
+    for each_payload_name, each_payload in payloads_dict.items():
+        for each_serializer_name, each_encode_func in serializers_dict.items():
+            time_ms, num_bytes = measure(each_encode_func, each_payload, num_repeats)
+            print("{:>10}  {:>14}  {:>9.1f} ms  {:>9.2f} MB".format(each_payload_name, each_serializer_name,
+                                                                   time_ms, num_bytes / 1E6))
+        
+        # Include the integer-list fast path for the epoch ms list
+        if each_payload_name == "epoch_ms":
+            time_ms, num_bytes = measure(encode_int_list_json_bytes, each_payload, num_repeats)
+            print("{:>10}  {:>14}  {:>9.1f} ms  {:>9.2f} MB".format(each_payload_name, "int-list path",
+                                                                   time_ms, num_bytes / 1E6))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:05:44 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import argparse
+import random
+
+from time import perf_counter
+
+from pymongo import ASCENDING
+
+from local.lib.mongo_helpers import MCLIENT, set_collection_indexing
+
+from local.routes.objects import KEYS_TO_INDEX, OBJ_ID_FIELD, FIRST_EPOCH_MS_FIELD, FINAL_EPOCH_MS_FIELD
+from local.routes.objects import find_by_time_range, find_ids_by_time_range, get_time_range_query_filter
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def parse_benchmark_args():
+    
+    # Set up argument parsing
+    ap_obj = argparse.ArgumentParser(description = "Compare object query plans/timing using different indexes")
+    ap_obj.add_argument("-n", "--num_objects", default = 10000000, type = int,
+                        help = "Number of (synthetic) objects to generate. Default: 10,000,000")
+    ap_obj.add_argument("-d", "--num_days", default = 30, type = float,
+                        help = "Number of days the synthetic objects are spread over. Default: 30")
+    ap_obj.add_argument("-q", "--num_queries", default = 50, type = int,
+                        help = "Number of (randomly placed) queries to time, per test. Default: 50")
+    ap_obj.add_argument("-w", "--window_minutes", default = 60, type = float,
+                        help = "Size of the time window used for each query, in minutes. Default: 60")
+    ap_obj.add_argument("--reuse_data", default = False, action = "store_true",
+                        help = "Re-use existing synthetic data (from a previous run with --keep_data)")
+    ap_obj.add_argument("--keep_data", default = False, action = "store_true",
+                        help = "Don't delete the synthetic data after the benchmark completes")
+    
+    return vars(ap_obj.parse_args())
+
+# .....................................................................................................................
+
+def insert_synthetic_objects(collection_ref, num_objects, num_days, batch_size = 10000, random_seed = 0):
+    
+    '''
+    Fills a collection with synthetic object data. Most objects are short-lived (seconds),
+    but a small fraction are long-lived (hours), which is the case that makes overlap queries difficult
+    '''
+    
+    rand_gen = random.Random(random_seed)
+    
+    # Spread object start times evenly over the full time span
+    start_ems = 1600000000000
+    total_span_ms = int(num_days * 24 * 60 * 60 * 1000)
+    ms_per_object = total_span_ms / num_objects
+    
+    batch_list = []
+    t_start = perf_counter()
+    for obj_idx in range(num_objects):
+        
+        # Generate (mostly short) object lifetimes
+        is_long_lived = (rand_gen.random() < 0.05)
+        lifetime_ms = rand_gen.uniform(0, 6 * 60 * 60 * 1000) if is_long_lived else rand_gen.expovariate(1 / 10000)
+        first_ems = int(start_ems + obj_idx * ms_per_object)
+        final_ems = int(first_ems + lifetime_ms)
+        
+        # Include some (unused) data, so documents are not unrealistically small
+        new_doc = {OBJ_ID_FIELD: obj_idx,
+                   FIRST_EPOCH_MS_FIELD: first_ems,
+                   FINAL_EPOCH_MS_FIELD: final_ems,
+                   "class_label": "pedestrian",
+                   "num_samples": int(lifetime_ms / 100),
+                   "tracking": {"x_center": [0.5] * 16, "y_center": [0.5] * 16}}
+        batch_list.append(new_doc)
+        
+        # Insert data in large batches
+        if len(batch_list) >= batch_size:
+            collection_ref.insert_many(batch_list, ordered = False)
+            batch_list = []
+            print("\r  Inserted {} / {} objects".format(1 + obj_idx, num_objects), end = "", flush = True)
+    
+    # Insert any leftovers
+    if batch_list:
+        collection_ref.insert_many(batch_list, ordered = False)
+    
+    t_end = perf_counter()
+    print("", "  Took {:.1f} seconds".format(t_end - t_start), sep = "\n")
+    
+    return start_ems, (start_ems + total_span_ms)
+
+# .....................................................................................................................
+
+def get_data_time_span(collection_ref):
+    
+    oldest_doc = collection_ref.find_one({}, sort = [(FIRST_EPOCH_MS_FIELD, ASCENDING)])
+    newest_doc = collection_ref.find_one({}, sort = [(FIRST_EPOCH_MS_FIELD, -1)])
+    
+    return oldest_doc[FIRST_EPOCH_MS_FIELD], newest_doc[FIRST_EPOCH_MS_FIELD]
+
+# .....................................................................................................................
+
+def get_plan_stages(plan_dict):
+    
+    ''' Helper used to get a listing of all the stages used in a (mongo) query plan, from the top-down '''
+    
+    stages_list = [plan_dict.get("stage", "?")]
+    if "inputStage" in plan_dict:
+        stages_list += get_plan_stages(plan_dict["inputStage"])
+    for each_input_plan in plan_dict.get("inputStages", []):
+        stages_list += get_plan_stages(each_input_plan)
+    
+    return stages_list
+
+# .....................................................................................................................
+
+def print_query_plan(title, cursor_ref):
+    
+    # Pull out the plan info we care about
+    explain_dict = cursor_ref.explain()
+    winning_plan_dict = explain_dict["queryPlanner"]["winningPlan"]
+    stats_dict = explain_dict.get("executionStats", {})
+    stages_list = get_plan_stages(winning_plan_dict)
+    
+    print("",
+          title,
+          "  Stages: {}".format(" <- ".join(stages_list)),
+          "  In-memory sort: {}".format("SORT" in stages_list),
+          "  Loads documents: {}".format("FETCH" in stages_list),
+          "  Keys examined: {}".format(stats_dict.get("totalKeysExamined", "?")),
+          "  Docs examined: {}".format(stats_dict.get("totalDocsExamined", "?")),
+          sep = "\n")
+    
+    return
+
+# .....................................................................................................................
+
+def time_queries(query_func, query_windows_list):
+    
+    timings_ms = []
+    for each_start_ems, each_end_ems in query_windows_list:
+        t1 = perf_counter()
+        query_func(each_start_ems, each_end_ems)
+        t2 = perf_counter()
+        timings_ms.append(1000 * (t2 - t1))
+    
+    sorted_timings = sorted(timings_ms)
+    p50 = sorted_timings[int(0.50 * (len(sorted_timings) - 1))]
+    p99 = sorted_timings[int(0.99 * (len(sorted_timings) - 1))]
+    
+    return p50, p99
+
+# .....................................................................................................................
+
+def run_all_tests(title, collection_ref, query_windows_list):
+    
+    ''' Runs all query tests (plans + timing) using whatever indexes are currently set on the collection '''
+    
+    print("", "", "=" * 48, title, "=" * 48, sep = "\n")
+    
+    # Show query plans for a sample query window
+    sample_start_ems, sample_end_ems = query_windows_list[0]
+    sample_filter = get_time_range_query_filter(sample_start_ems, sample_end_ems)
+    old_ids_cursor = collection_ref.find(sample_filter, {}).sort(OBJ_ID_FIELD, ASCENDING)
+    new_ids_cursor = collection_ref.find(sample_filter, {OBJ_ID_FIELD: 1})
+    print_query_plan("Ids by time range (sorted by db):", old_ids_cursor)
+    print_query_plan("Ids by time range (covered, sorted after query):", new_ids_cursor)
+    
+    # Set up the queries to time
+    get_ids_old = lambda s, e: [each_entry[OBJ_ID_FIELD] for each_entry in
+                                find_by_time_range(collection_ref, s, e, return_ids_only = True)]
+    get_ids_new = lambda s, e: find_ids_by_time_range(collection_ref, s, e)
+    get_metadata = lambda s, e: list(find_by_time_range(collection_ref, s, e, return_ids_only = False))
+    get_count = lambda s, e: collection_ref.count_documents(get_time_range_query_filter(s, e))
+    
+    # Time everything
+    print("", "Timing (p50 / p99):", sep = "\n")
+    for each_name, each_func in [("ids (sorted by db)", get_ids_old),
+                                 ("ids (covered)", get_ids_new),
+                                 ("full metadata", get_metadata),
+                                 ("count", get_count)]:
+        p50, p99 = time_queries(each_func, query_windows_list)
+        print("  {:<20} {:>9.2f} ms / {:>9.2f} ms".format(each_name, p50, p99))
+    
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Main
+
+if __name__ == "__main__":
+    
+    # Get script arguments
+    script_args = parse_benchmark_args()
+    num_objects = script_args["num_objects"]
+    num_days = script_args["num_days"]
+    num_queries = script_args["num_queries"]
+    window_ms = int(script_args["window_minutes"] * 60 * 1000)
+    reuse_data = script_args["reuse_data"]
+    keep_data = script_args["keep_data"]
+    
+    # Set up benchmark database
+    benchmark_db_name = "benchmark_object_indexes"
+    collection_ref = MCLIENT[benchmark_db_name]["objects"]
+    
+    # Generate (or re-use) synthetic data
+    if reuse_data:
+        data_start_ems, data_end_ems = get_data_time_span(collection_ref)
+    else:
+        print("", "Generating {} synthetic objects...".format(num_objects), sep = "\n")
+        collection_ref.drop()
+        data_start_ems, data_end_ems = insert_synthetic_objects(collection_ref, num_objects, num_days)
+    
+    # Pick random query windows (shared for all tests)
+    rand_gen = random.Random(1)
+    query_windows_list = []
+    for _ in range(num_queries):
+        query_start_ems = rand_gen.randint(data_start_ems, max(data_start_ems, data_end_ems - window_ms))
+        query_windows_list.append((query_start_ems, query_start_ems + window_ms))
+    
+    # Test with the original (single-field) indexing
+    collection_ref.drop_indexes()
+    set_collection_indexing(collection_ref, [FIRST_EPOCH_MS_FIELD, FINAL_EPOCH_MS_FIELD])
+    run_all_tests("Single-field indexes", collection_ref, query_windows_list)
+    
+    # Test with the compound (covering) indexes
+    collection_ref.drop_indexes()
+    set_collection_indexing(collection_ref, KEYS_TO_INDEX)
+    run_all_tests("Compound indexes", collection_ref, query_windows_list)
+    
+    # Clean up
+    if not keep_data:
+        MCLIENT.drop_database(benchmark_db_name)
+    MCLIENT.close()
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
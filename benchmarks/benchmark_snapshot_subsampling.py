@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:12:37 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import argparse
+import tracemalloc
+
+from time import perf_counter
+from functools import partial
+
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.query_helpers import get_many_metadata_in_time_range
+
+from local.routes.snapshots import EPOCH_MS_FIELD, get_n_samples_index_list, find_subsampled_metadata
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def parse_benchmark_args():
+    
+    # Set up argument parsing
+    ap_obj = argparse.ArgumentParser(description = "Compare snapshot subsampling with/without query pushdown")
+    ap_obj.add_argument("-n", "--n_samples", default = 100, type = int,
+                        help = "Number of samples to request from each time range. Default: 100")
+    ap_obj.add_argument("-f", "--fps", default = 1.0, type = float,
+                        help = "Frame rate of the synthetic snapshot data. Default: 1.0")
+    ap_obj.add_argument("-r", "--range_hours", default = [1, 6, 24], type = float, nargs = "+",
+                        help = "Time range sizes (in hours) to test. Default: 1 6 24")
+    ap_obj.add_argument("-x", "--num_repeats", default = 5, type = int,
+                        help = "Number of times to repeat each test (best time is reported). Default: 5")
+    ap_obj.add_argument("--keep_data", default = False, action = "store_true",
+                        help = "Don't delete the synthetic data after the benchmark completes")
+    
+    return vars(ap_obj.parse_args())
+
+# .....................................................................................................................
+
+def insert_synthetic_snapshots(collection_ref, start_ems, num_hours, fps, batch_size = 5000):
+    
+    ''' Fills a collection with synthetic snapshot metadata (roughly matching the size of real data) '''
+    
+    ms_per_frame = 1000.0 / fps
+    num_snapshots = int(num_hours * 60 * 60 * fps)
+    
+    batch_list = []
+    for snap_idx in range(num_snapshots):
+        snap_ems = int(start_ems + snap_idx * ms_per_frame)
+        new_doc = {EPOCH_MS_FIELD: snap_ems,
+                   "datetime_isoformat": "2020-01-01T00:00:00.000000-05:00",
+                   "frame_index": snap_idx,
+                   "snapshot_width": 480,
+                   "snapshot_height": 270,
+                   "notes": "x" * 1500}
+        batch_list.append(new_doc)
+        
+        if len(batch_list) >= batch_size:
+            collection_ref.insert_many(batch_list, ordered = False)
+            batch_list = []
+    
+    if batch_list:
+        collection_ref.insert_many(batch_list, ordered = False)
+    
+    return num_snapshots
+
+# .....................................................................................................................
+
+def subsample_after_loading(collection_ref, start_ems, end_ems, n_samples):
+    
+    ''' Original approach: load all metadata in the time range, then pick out samples '''
+    
+    result_list = list(get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD))
+    
+    return [result_list[each_idx] for each_idx in get_n_samples_index_list(len(result_list), n_samples)]
+
+# .....................................................................................................................
+
+def subsample_with_pushdown(collection_ref, start_ems, end_ems, n_samples):
+    
+    ''' New approach: only load epoch ms values for the full range, full metadata only for samples '''
+    
+    index_select_func = partial(get_n_samples_index_list, n_samples = n_samples)
+    
+    return find_subsampled_metadata(collection_ref, start_ems, end_ems, index_select_func)
+
+# .....................................................................................................................
+
+def measure(subsample_func, num_repeats, *args):
+    
+    ''' Helper used to measure the best-case latency & the peak (python) memory usage of a function '''
+    
+    # Time the function
+    best_time_ms = None
+    for _ in range(num_repeats):
+        t1 = perf_counter()
+        result_list = subsample_func(*args)
+        t2 = perf_counter()
+        time_ms = 1000 * (t2 - t1)
+        best_time_ms = time_ms if best_time_ms is None else min(best_time_ms, time_ms)
+    
+    # Measure memory usage separately, since tracing slows things down
+    tracemalloc.start()
+    subsample_func(*args)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return best_time_ms, peak_bytes, len(result_list)
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Main
+
+if __name__ == "__main__":
+    
+    # Get script arguments
+    script_args = parse_benchmark_args()
+    n_samples = script_args["n_samples"]
+    fps = script_args["fps"]
+    range_hours_list = sorted(script_args["range_hours"])
+    num_repeats = script_args["num_repeats"]
+    keep_data = script_args["keep_data"]
+    
+    # Set up benchmark database
+    benchmark_db_name = "benchmark_snapshot_subsampling"
+    collection_ref = MCLIENT[benchmark_db_name]["snapshots"]
+    collection_ref.drop()
+    
+    # Generate enough data to cover the largest time range
+    start_ems = 1600000000000
+    print("", "Generating synthetic snapshot data...", sep = "\n")
+    num_snapshots = insert_synthetic_snapshots(collection_ref, start_ems, max(range_hours_list), fps)
+    print("  Inserted {} snapshots".format(num_snapshots))
+    
+    # Compare both approaches over increasing time ranges
+    print("", "Requesting {} samples:".format(n_samples), sep = "\n")
+    print("  {:>8}  {:>12}  {:>14}  {:>14}".format("hours", "approach", "best time", "peak memory"))
+    for each_range_hours in range_hours_list:
+        end_ems = int(start_ems + each_range_hours * 60 * 60 * 1000)
+        for each_name, each_func in [("original", subsample_after_loading), ("pushdown", subsample_with_pushdown)]:
+            time_ms, peak_bytes, num_results = measure(each_func, num_repeats,
+                                                       collection_ref, start_ems, end_ems, n_samples)
+            print("  {:>8.1f}  {:>12}  {:>11.1f} ms  {:>11.2f} MB".format(each_range_hours, each_name,
+                                                                        time_ms, peak_bytes / 1E6))
+    
+    # Clean up
+    if not keep_data:
+        MCLIENT.drop_database(benchmark_db_name)
+    MCLIENT.close()
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -16,6 +16,10 @@ import signal
 from collections import OrderedDict
 
 from local.lib.mongo_helpers import MCLIENT
+from local.lib.async_db_helpers import shutdown_db_executor
+from local.lib.ingest_helpers import shutdown_ingest_executor
+from local.lib.write_behind import WRITE_BEHIND_BUFFER
+from local.lib.camera_registry import CAMERA_REGISTRY
 from local.lib.data_deletion import AD_SHUTDOWN_EVENT, create_parallel_scheduled_delete
 
 from local.routes.posting import build_posting_routes
@@ -36,14 +40,14 @@ from local.routes.autodelete import build_autodeleting_routes
 from local.routes.forward_compatibility import build_compatibility_routes
 
 from local.lib.environment import get_debugmode, get_dbserver_protocol, get_dbserver_host, get_dbserver_port
+from local.lib.environment import get_env_write_behind_enabled
 from local.lib.timekeeper_utils import timestamped_log
-from local.lib.response_helpers import get_exception_handlers
+from local.lib.response_helpers import get_exception_handlers, Precompressed_GZip_Middleware
 from local.lib.quitters import ide_catcher
 
 from starlette.applications import Starlette
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.gzip import GZipMiddleware
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -103,11 +107,21 @@ def register_shutdown_command():
 
 # .....................................................................................................................
 
-def asgi_startup():
+async def asgi_startup():
     
     # Speed up shutdown when calling 'docker stop ...'
     register_shutdown_command()
     
+    # Start periodic writing of buffered metadata (also recovers any data left-over from the last shutdown)
+    # -> If write-behind is disabled, only recover left-over data (e.g. from a previous run with it enabled)
+    if enable_write_behind:
+        await WRITE_BEHIND_BUFFER.start()
+    else:
+        await WRITE_BEHIND_BUFFER.recover()
+    
+    # Load camera listing & start periodic refreshing (picks up cameras removed by the autodelete process)
+    await CAMERA_REGISTRY.start()
+    
     # Some feedback, mostly for docker logs
     start_msg = timestamped_log("Started dbserver!")
     print("", start_msg, sep = "\n", flush = True)
@@ -121,15 +135,24 @@ def asgi_startup():
 
 # .....................................................................................................................
 
-def asgi_shutdown():
+async def asgi_shutdown():
     
     # Some feedback, mostly for docker logs
     stop_msg = timestamped_log("Stopping dbserver!")
     print("", stop_msg, sep = "\n", flush = True)
     
-    # Close the (global!) mongo connection
+    # Make sure all buffered metadata is written before shutting down
+    if enable_write_behind:
+        await WRITE_BEHIND_BUFFER.stop()
+    await CAMERA_REGISTRY.stop()
+    
+    # Finish any in-progress uploads before closing the (global!) mongo connection
+    shutdown_ingest_executor()
     MCLIENT.close()
     
+    # Release the database query threads
+    shutdown_db_executor()
+    
     # Shutdown autodelete process
     AD_SHUTDOWN_EVENT.set()
     
@@ -145,6 +168,9 @@ def asgi_shutdown():
 # Determine if we're running in special debug mode (which can enable/disable certain features)
 enable_debug_mode = get_debugmode()
 
+# Determine if metadata posts should be buffered (write-behind), which is opt-in
+enable_write_behind = get_env_write_behind_enabled()
+
 # Set up mongo-disconnect error handling
 exception_handlers = get_exception_handlers()
 
@@ -152,9 +178,9 @@ exception_handlers = get_exception_handlers()
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Configure server
 
-# Setup CORs and gzip responses
+# Setup CORs and gzip responses (cached responses are already gzipped, and are left as-is)
 middleware = [Middleware(CORSMiddleware, allow_origins = ["*"], allow_methods = ["*"], allow_headers = ["*"]),
-              Middleware(GZipMiddleware, minimum_size = 1500)]
+              Middleware(Precompressed_GZip_Middleware, minimum_size = 1500)]
 
 # Set up mongo-disconnect error handling
 exception_handlers = get_exception_handlers()
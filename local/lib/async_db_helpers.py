@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:14:52 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import asyncio
+
+from functools import partial
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+
+from local.lib.environment import get_mongo_max_query_threads
+
+from local.lib import query_helpers as qh
+from local.lib import mongo_helpers as mh
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Executor functions
+
+# .....................................................................................................................
+
+async def run_in_db_executor(blocking_func, *args, **kwargs):
+    
+    '''
+    Helper function used to run (blocking) pymongo calls without stalling the event loop
+    Calls are handed to a dedicated (bounded) thread pool, separate from starlette's default threadpool,
+    so that slow database requests can't starve other parts of the server
+    '''
+    
+    event_loop = asyncio.get_event_loop()
+    func_with_args = partial(blocking_func, *args, **kwargs)
+    
+    return await event_loop.run_in_executor(DB_EXECUTOR, func_with_args)
+
+# .....................................................................................................................
+
+async def run_query_to_list(query_func, *args, **kwargs):
+    
+    '''
+    Helper function used to run a query which returns a cursor (e.g. collection.find(...))
+    The cursor is fully iterated inside the db executor, since each batch retrieval is a blocking call!
+    Returns a list of results
+    '''
+    
+    list_from_query = lambda: list(query_func(*args, **kwargs))
+    
+    return await run_in_db_executor(list_from_query)
+
+# .....................................................................................................................
+
+async def read_cursor_chunk(cursor_ref, chunk_size):
+    
+    '''
+    Helper function used to read the next 'chunk' of results from a cursor, without blocking the event loop
+    Returns a list of up to 'chunk_size' results. An empty list indicates that the cursor is exhausted
+    '''
+    
+    read_chunk = lambda: list(islice(cursor_ref, chunk_size))
+    
+    return await run_in_db_executor(read_chunk)
+
+# .....................................................................................................................
+
+async def run_per_camera(camera_names_list, per_camera_func, max_concurrency = 8, timeout_sec = 10):
+    
+    '''
+    Helper function used to run the same (async) function for many cameras concurrently
+    The given function is called with a camera name as its only argument, for every camera in the list
+    At most 'max_concurrency' cameras are processed at a time, and each camera is given up to 'timeout_sec'
+    
+    Cameras which fail (or time out) don't prevent results from the other cameras from being returned,
+    instead their result is replaced with an error marker: {"error": "<description>"}
+    Note: timed-out db calls can't be cancelled, they'll finish in the background (results are discarded).
+    These keep their concurrency slot until they finish, so slow cameras can't pile up in the db executor
+    
+    Returns:
+        results_dict (keys are camera names, values are function results or error markers)
+    '''
+    
+    # Create a limit on the number of cameras being handled at once, so we don't swamp the db executor
+    concurrency_limit = asyncio.Semaphore(max_concurrency)
+    
+    def release_slot(camera_task):
+        
+        # Free up the concurrency slot only once the camera work is actually done (even if it timed out)
+        # -> Also retrieve any errors, so timed-out tasks don't trigger 'exception never retrieved' warnings
+        concurrency_limit.release()
+        if not camera_task.cancelled():
+            camera_task.exception()
+    
+    async def run_one_camera(camera_select):
+        
+        await concurrency_limit.acquire()
+        camera_task = asyncio.ensure_future(per_camera_func(camera_select))
+        camera_task.add_done_callback(release_slot)
+        
+        # Wait for the result, without cancelling the camera work if it takes too long
+        done_set, _ = await asyncio.wait({camera_task}, timeout = timeout_sec)
+        if not done_set:
+            return {"error": "timed out after {} seconds".format(timeout_sec)}
+        
+        try:
+            return camera_task.result()
+        except Exception as err:
+            return {"error": "{} ({})".format(err, err.__class__.__name__)}
+    
+    # Run all cameras concurrently & bundle the results by camera name
+    results_list = await asyncio.gather(*[run_one_camera(each_name) for each_name in camera_names_list])
+    results_dict = dict(zip(camera_names_list, results_list))
+    
+    return results_dict
+
+# .....................................................................................................................
+
+def shutdown_db_executor():
+    
+    ''' Helper function used to clean up the db executor threads (should only be used on server shutdown!) '''
+    
+    DB_EXECUTOR.shutdown(wait = False)
+    
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Query functions
+
+# .....................................................................................................................
+
+async def get_all_ids(collection_ref, sort_field = "_id", ascending_order = True):
+    return await run_query_to_list(qh.get_all_ids, collection_ref, sort_field, ascending_order)
+
+# .....................................................................................................................
+
+async def get_one_metadata(collection_ref, target_field, target_value):
+    return await run_in_db_executor(qh.get_one_metadata, collection_ref, target_field, target_value)
+
+# .....................................................................................................................
+
+async def get_newest_metadata(collection_ref, epoch_ms_field = "_id"):
+    return await run_in_db_executor(qh.get_newest_metadata, collection_ref, epoch_ms_field)
+
+# .....................................................................................................................
+
+async def get_oldest_metadata(collection_ref, epoch_ms_field = "_id"):
+    return await run_in_db_executor(qh.get_oldest_metadata, collection_ref, epoch_ms_field)
+
+# .....................................................................................................................
+
+async def get_closest_metadata_before_target_ems(collection_ref, target_ems, epoch_ms_field = "_id"):
+    return await run_in_db_executor(qh.get_closest_metadata_before_target_ems,
+                                    collection_ref, target_ems, epoch_ms_field)
+
+# .....................................................................................................................
+
+async def get_closest_metadata_after_target_ems(collection_ref, target_ems, epoch_ms_field = "_id"):
+    return await run_in_db_executor(qh.get_closest_metadata_after_target_ems,
+                                    collection_ref, target_ems, epoch_ms_field)
+
+# .....................................................................................................................
+
+async def get_closest_metadata_by_target_ems(collection_ref, target_ems, epoch_ms_field = "_id"):
+    
+    ''' Async version of the closest-entry lookup, which issues the before & after lookups concurrently '''
+    
+    # Find bounding entries on either side of the target time, at the same time
+    (_, lower_metadata_dict), (_, upper_metadata_dict) = \
+        await asyncio.gather(get_closest_metadata_before_target_ems(collection_ref, target_ems, epoch_ms_field),
+                             get_closest_metadata_after_target_ems(collection_ref, target_ems, epoch_ms_field))
+    
+    # Pick the closer of the two entries
+    closest_metadata_dict = qh.select_closest_metadata(target_ems, lower_metadata_dict, upper_metadata_dict,
+                                                       epoch_ms_field)
+    
+    return lower_metadata_dict, upper_metadata_dict, closest_metadata_dict
+
+# .....................................................................................................................
+
+async def get_many_metadata_since_target_ems(collection_ref, target_ems, epoch_ms_field = "_id",
+                                             ascending_order = True):
+    return await run_query_to_list(qh.get_many_metadata_since_target_ems,
+                                   collection_ref, target_ems, epoch_ms_field, ascending_order)
+
+# .....................................................................................................................
+
+async def get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, epoch_ms_field = "_id",
+                                          ascending_order = True):
+    return await run_query_to_list(qh.get_many_metadata_in_time_range,
+                                   collection_ref, start_ems, end_ems, epoch_ms_field, ascending_order)
+
+# .....................................................................................................................
+
+async def get_many_metadata_in_id_range(collection_ref, start_id, end_id, ascending_order = True):
+    return await run_query_to_list(qh.get_many_metadata_in_id_range, collection_ref, start_id, end_id, ascending_order)
+
+# .....................................................................................................................
+
+async def get_epoch_ms_list_in_time_range(collection_ref, start_ems, end_ems, epoch_ms_field = "_id",
+                                          ascending_order = True):
+    return await run_in_db_executor(qh.get_epoch_ms_list_in_time_range,
+                                    collection_ref, start_ems, end_ems, epoch_ms_field, ascending_order)
+
+# .....................................................................................................................
+
+async def get_count_in_time_range(collection_ref, start_ems, end_ems, epoch_ms_field = "_id"):
+    return await run_in_db_executor(qh.get_count_in_time_range, collection_ref, start_ems, end_ems, epoch_ms_field)
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Mongo client functions
+
+# .....................................................................................................................
+
+async def check_mongo_connection(mongo_client):
+    return await run_in_db_executor(mh.check_mongo_connection, mongo_client)
+
+# .....................................................................................................................
+
+async def post_one_to_mongo(mongo_client, database_name, collection_name, data_to_insert):
+    return await run_in_db_executor(mh.post_one_to_mongo, mongo_client, database_name, collection_name, data_to_insert)
+
+# .....................................................................................................................
+
+async def post_many_to_mongo(mongo_client, database_name, collection_name, data_to_insert):
+    return await run_in_db_executor(mh.post_many_to_mongo,
+                                    mongo_client, database_name, collection_name, data_to_insert)
+
+# .....................................................................................................................
+
+async def check_collection_indexing(collection_ref, index_key_list):
+    return await run_in_db_executor(mh.check_collection_indexing, collection_ref, index_key_list)
+
+# .....................................................................................................................
+
+async def set_collection_indexing(collection_ref, index_key_list):
+    return await run_in_db_executor(mh.set_collection_indexing, collection_ref, index_key_list)
+
+# .....................................................................................................................
+
+async def get_camera_names_list(mongo_client, sort_names = True):
+    return await run_in_db_executor(mh.get_camera_names_list, mongo_client, sort_names)
+
+# .....................................................................................................................
+
+async def get_collection_names_list(mongo_client, camera_select):
+    return await run_in_db_executor(mh.get_collection_names_list, mongo_client, camera_select)
+
+# .....................................................................................................................
+
+async def remove_camera_entry(mongo_client, camera_select):
+    return await run_in_db_executor(mh.remove_camera_entry, mongo_client, camera_select)
+
+# .....................................................................................................................
+
+async def remove_camera_collection(mongo_client, camera_select, collection_name):
+    return await run_in_db_executor(mh.remove_camera_collection, mongo_client, camera_select, collection_name)
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Global setup
+
+# Create (global!) thread pool used to run all blocking database requests
+# -> Kept separate from starlette's threadpool, so db calls can't starve other blocking work (and vice versa)
+DB_EXECUTOR = ThreadPoolExecutor(max_workers = get_mongo_max_query_threads(), thread_name_prefix = "dbquery")
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
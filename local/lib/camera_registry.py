@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:26:40 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import asyncio
+
+from time import monotonic
+
+from local.lib.environment import get_env_camera_registry_refresh_period_sec
+
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.async_db_helpers import get_camera_names_list
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+class Camera_Registry:
+    
+    # .................................................................................................................
+    
+    def __init__(self, mongo_client, refresh_period_sec):
+        
+        '''
+        Class used to keep an in-memory listing of all camera names (i.e. database names)
+        Used to avoid listing all databases on every request that needs to loop over cameras
+        
+        The listing is loaded from the db on first use and is kept up to date by adding/removing cameras
+        as data is posted or cameras are deleted (see add_camera(...) & remove_camera(...)). Since cameras can
+        also be removed by other processes (i.e. autodelete), the listing is also periodically refreshed,
+        either by a background task (see start()) or on request, if the listing gets too old
+        '''
+        
+        # Store inputs
+        self._mongo_client = mongo_client
+        self._refresh_period_sec = refresh_period_sec
+        
+        # Storage for camera names & refresh timing
+        self._camera_names_set = None
+        self._last_refresh_time = None
+        self._refresh_count = 0
+        self._refresh_lock = None
+        
+        # Storage for cameras added/removed while a refresh is in progress (keys are names, values are 'is added')
+        # -> These are applied on top of the refreshed listing, since the db may have been read before the change
+        self._changes_during_refresh_dict = None
+        
+        # Allocate storage for the periodic refresh task
+        self._refresh_task = None
+    
+    # .................................................................................................................
+    
+    def __repr__(self):
+        num_cameras = 0 if self._camera_names_set is None else len(self._camera_names_set)
+        return "Camera registry: {} cameras".format(num_cameras)
+    
+    # .................................................................................................................
+    
+    async def start(self):
+        
+        ''' Function used to load the camera listing & begin periodic refreshing '''
+        
+        await self._safe_refresh()
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._periodic_refresh())
+        
+        return
+    
+    # .................................................................................................................
+    
+    async def stop(self):
+        
+        ''' Function used to stop periodic refreshing '''
+        
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        
+        return
+    
+    # .................................................................................................................
+    
+    async def get_camera_names_list(self, sort_names = True):
+        
+        ''' Cached equivalent of the get_camera_names_list(...) db helper '''
+        
+        # Refresh the listing if it hasn't been loaded or is too old (e.g. if periodic refreshing isn't running)
+        need_refresh = (self._last_refresh_time is None)
+        if not need_refresh:
+            need_refresh = ((monotonic() - self._last_refresh_time) >= self._refresh_period_sec)
+        if need_refresh:
+            await self.refresh()
+        
+        # Always hand out a copy, so callers can't modify the listing
+        camera_names_list = list(self._camera_names_set)
+        if sort_names:
+            camera_names_list = sorted(camera_names_list)
+        
+        return camera_names_list
+    
+    # .................................................................................................................
+    
+    async def refresh(self):
+        
+        ''' Function used to re-load the camera listing from the db '''
+        
+        # Only allow one refresh at a time, other requests wait for the result
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        refresh_count_on_call = self._refresh_count
+        async with self._refresh_lock:
+            
+            # Skip the db if another request already refreshed the listing while we were waiting
+            if self._refresh_count != refresh_count_on_call:
+                return
+            
+            # Keep track of changes made while waiting on the db, so they aren't lost when the listing is replaced
+            self._changes_during_refresh_dict = {}
+            try:
+                camera_names_list = await get_camera_names_list(self._mongo_client, sort_names = False)
+                new_camera_names_set = set(camera_names_list)
+                for each_camera_name, each_is_added in self._changes_during_refresh_dict.items():
+                    if each_is_added:
+                        new_camera_names_set.add(each_camera_name)
+                    else:
+                        new_camera_names_set.discard(each_camera_name)
+            finally:
+                self._changes_during_refresh_dict = None
+            
+            self._camera_names_set = new_camera_names_set
+            self._last_refresh_time = monotonic()
+            self._refresh_count += 1
+        
+        return
+    
+    # .................................................................................................................
+    
+    def add_camera(self, camera_select):
+        
+        '''
+        Function used to register a camera as soon as its data is stored (which creates the camera database)
+        Should only be called after a successful insert, otherwise the camera may not actually exist!
+        Does nothing if the listing hasn't been loaded yet (it'll be loaded from the db when needed)
+        '''
+        
+        if self._changes_during_refresh_dict is not None:
+            self._changes_during_refresh_dict[camera_select] = True
+        
+        if self._camera_names_set is not None:
+            self._camera_names_set.add(camera_select)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def remove_camera(self, camera_select):
+        
+        ''' Function used to un-register a camera, should be called whenever a camera database is dropped '''
+        
+        if self._changes_during_refresh_dict is not None:
+            self._changes_during_refresh_dict[camera_select] = False
+        
+        if self._camera_names_set is not None:
+            self._camera_names_set.discard(camera_select)
+        
+        return
+    
+    # .................................................................................................................
+    
+    async def _periodic_refresh(self):
+        
+        ''' Helper used to refresh the camera listing on a fixed time interval, until cancelled '''
+        
+        while True:
+            await asyncio.sleep(self._refresh_period_sec)
+            await self._safe_refresh()
+        
+        return
+    
+    # .................................................................................................................
+    
+    async def _safe_refresh(self):
+        
+        ''' Helper used to refresh the camera listing without raising errors (e.g. if the db isn't available) '''
+        
+        try:
+            await self.refresh()
+        except Exception as err:
+            error_type = (err.__class__.__name__)
+            print("", "Camera registry refresh error ({})".format(error_type), err, sep = "\n", flush = True)
+        
+        return
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Global setup
+
+# Create (global!) camera registry, used to avoid listing all databases whenever cameras need to be looped over
+CAMERA_REGISTRY = Camera_Registry(MCLIENT, refresh_period_sec = get_env_camera_registry_refresh_period_sec())
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -53,19 +53,21 @@ import json
 
 from multiprocessing import Process, Event
 from time import perf_counter
-from shutil import rmtree, disk_usage
+from shutil import disk_usage
 
 from random import random as unit_random
 
-from local.lib.pathing import BASE_DATA_FOLDER_PATH, build_camera_data_path
+from local.lib.pathing import BASE_DATA_FOLDER_PATH
 from local.lib.pathing import build_system_configs_folder_path, build_system_logs_folder_path
-from local.lib.pathing import get_old_snapshot_image_folders_list, get_old_background_image_folders_list
 
 from local.lib.environment import get_env_autodelete_on_startup, get_env_hour_to_run, get_env_upper_max_disk_usage_pct
 from local.lib.environment import get_default_max_disk_usage_pct, get_default_days_to_keep
 
 from local.lib.mongo_helpers import connect_to_mongo, get_camera_names_list, remove_camera_entry
 from local.lib.query_helpers import get_closest_metadata_before_target_ems, get_oldest_metadata
+from local.lib.time_bucket_helpers import delete_time_buckets_by_cutoff
+from local.lib.response_cache import signal_data_deletion
+from local.lib.image_store import IMAGE_STORE
 
 from local.lib.timekeeper_utils import datetime_to_epoch_ms, datetime_convert_to_day_start, epoch_ms_to_local_datetime
 from local.lib.timekeeper_utils import get_local_datetime, get_local_datetime_tomorrow, get_local_datetime_in_past
@@ -75,11 +77,13 @@ from local.routes.camerainfo import get_camera_info_collection
 from local.routes.configinfo import get_config_info_collection
 from local.routes.backgrounds import get_background_collection
 from local.routes.snapshots import get_snapshot_collection
-from local.routes.objects import get_object_collection
+from local.routes.objects import get_object_collection, get_object_timebucket_collection
 from local.routes.stations import get_station_collection
 
 from local.routes.objects import FINAL_EPOCH_MS_FIELD as OBJ_FINAL_EMS_FIELD
 from local.routes.stations import FINAL_EPOCH_MS_FIELD as STN_FINAL_EMS_FIELD
+from local.routes.backgrounds import COLLECTION_NAME as BG_COLLECTION_NAME
+from local.routes.snapshots import COLLECTION_NAME as SNAP_COLLECTION_NAME
 
 from local.eolib.utils.logging import Daily_Logger
 
@@ -440,13 +444,8 @@ def delete_backgrounds_by_cutoff(camera_select, cutoff_ems):
     # Important to do this before image data so that we won't have any metadata pointing at missing images!
     num_deleted = delete_collection_by_target_time(collection_ref, oldest_allowed_ems, epoch_ms_field)
     
-    # Get list of all folder paths that hold data older than the allowable time
-    old_image_folder_paths = get_old_background_image_folders_list(BASE_DATA_FOLDER_PATH,
-                                                                   camera_select, oldest_allowed_ems)
-    
-    # Delete all the folders containing old background images
-    for each_folder_path in old_image_folder_paths:
-        rmtree(each_folder_path, ignore_errors = True)
+    # Delete all the (hourly) groups of old background images
+    IMAGE_STORE.delete_before(camera_select, BG_COLLECTION_NAME, oldest_allowed_ems)
     
     return num_deleted
 
@@ -459,6 +458,10 @@ def delete_objects_by_cutoff(camera_select, cutoff_ems):
     collection_ref = get_object_collection(camera_select)
     num_deleted = delete_collection_by_target_time(collection_ref, cutoff_ems, epoch_ms_field)
     
+    # Remove the matching time bucket entries, so bucketed lookups don't report deleted objects
+    bucket_collection_ref = get_object_timebucket_collection(camera_select)
+    delete_time_buckets_by_cutoff(bucket_collection_ref, cutoff_ems)
+    
     return num_deleted
 
 # .....................................................................................................................
@@ -491,13 +494,8 @@ def delete_snapshots_by_cutoff(camera_select, cutoff_ems):
     collection_ref = get_snapshot_collection(camera_select)
     num_deleted = delete_collection_by_target_time(collection_ref, cutoff_ems, epoch_ms_field)
     
-    # Get list of all folder paths that hold data older than the allowable time
-    old_image_folder_paths = get_old_snapshot_image_folders_list(BASE_DATA_FOLDER_PATH,
-                                                                 camera_select, cutoff_ems)
-    
-    # Delete all the folders containing old snapshot images
-    for each_folder_path in old_image_folder_paths:
-        rmtree(each_folder_path, ignore_errors = True)
+    # Delete all the (hourly) groups of old snapshot images
+    IMAGE_STORE.delete_before(camera_select, SNAP_COLLECTION_NAME, cutoff_ems)
     
     return num_deleted
 
@@ -522,6 +520,9 @@ def delete_all_realtime_by_cutoff_dt(camera_select, cutoff_datetime):
     delete_stations_by_cutoff(*deletion_args)
     delete_snapshots_by_cutoff(*deletion_args)
     
+    # Clear any cached responses (in the server process) which may include deleted data
+    signal_data_deletion()
+    
     # End timing
     t_end = perf_counter()
     time_taken_ms = int(round(1000 * (t_end - t_start)))
@@ -546,9 +547,11 @@ def delete_empty_cameras(mongo_client, cameras_to_delete_list):
     
     # Loop through all cameras to delete and wipe out all mongo + file-system data
     for each_camera_name in cameras_to_delete_list:    
-        camera_data_folder_path = build_camera_data_path(BASE_DATA_FOLDER_PATH, each_camera_name)
         remove_camera_entry(mongo_client, each_camera_name)
-        rmtree(camera_data_folder_path, ignore_errors = True)
+        IMAGE_STORE.delete_camera(each_camera_name)
+    
+    # Clear any cached responses (in the server process) which may include deleted data
+    signal_data_deletion()
     
     return
 
@@ -63,6 +63,11 @@ def get_env_code_folder():
 def get_env_data_folder():
     return os.environ.get("DBSERVER_DATA_FOLDER_PATH", None)
 
+# .....................................................................................................................
+
+def get_env_image_storage_engine():
+    return os.environ.get("IMAGE_STORAGE_ENGINE", "folders")
+
 # .....................................................................................................................
 # .....................................................................................................................
 
@@ -85,6 +90,11 @@ def get_mongo_host():
 def get_mongo_port():
     return int(os.environ.get("MONGO_PORT", 27017))
 
+# .....................................................................................................................
+
+def get_mongo_max_query_threads():
+    return int(os.environ.get("MONGO_MAX_QUERY_THREADS", 32))
+
 # .....................................................................................................................
 # .....................................................................................................................
 
@@ -107,6 +117,82 @@ def get_dbserver_host():
 def get_dbserver_port():
     return int(os.environ.get("DBSERVER_PORT", 8050))
 
+# .....................................................................................................................
+
+def get_dbserver_max_ingest_threads():
+    return int(os.environ.get("DBSERVER_MAX_INGEST_THREADS", 8))
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Write-behind functions
+
+# .....................................................................................................................
+
+def get_env_write_behind_enabled():
+    return bool(int(os.environ.get("WRITE_BEHIND_ENABLED", 0)))
+
+# .....................................................................................................................
+
+def get_env_write_behind_max_batch_size():
+    return int(os.environ.get("WRITE_BEHIND_MAX_BATCH_SIZE", 500))
+
+# .....................................................................................................................
+
+def get_env_write_behind_flush_period_ms():
+    return int(os.environ.get("WRITE_BEHIND_FLUSH_PERIOD_MS", 250))
+
+# .....................................................................................................................
+
+def get_env_write_behind_use_wal():
+    return bool(int(os.environ.get("WRITE_BEHIND_USE_WAL", 1)))
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Caching functions
+
+# .....................................................................................................................
+
+def get_env_newest_metadata_cache_ttl_sec():
+    return float(os.environ.get("NEWEST_METADATA_CACHE_TTL_SEC", 10))
+
+# .....................................................................................................................
+
+def get_env_camera_registry_refresh_period_sec():
+    return float(os.environ.get("CAMERA_REGISTRY_REFRESH_PERIOD_SEC", 60))
+
+# .....................................................................................................................
+
+def get_env_gzip_response_cache_max_mb():
+    return float(os.environ.get("GZIP_RESPONSE_CACHE_MAX_MB", 128))
+
+# .....................................................................................................................
+
+def get_env_gzip_response_cache_horizon_sec():
+    return float(os.environ.get("GZIP_RESPONSE_CACHE_HORIZON_SEC", 7200))
+
+# .....................................................................................................................
+
+def get_env_hot_image_cache_max_mb():
+    return float(os.environ.get("HOT_IMAGE_CACHE_MAX_MB", 64))
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Response functions
+
+# .....................................................................................................................
+
+def get_env_json_serializer():
+    return os.environ.get("JSON_SERIALIZER", "auto")
+
 # .....................................................................................................................
 # .....................................................................................................................
 
@@ -166,14 +252,30 @@ if __name__ == "__main__":
     print("")
     print("DBSERVER_CODE_FOLDER_PATH:", get_env_code_folder())
     print("DBSERVER_DATA_FOLDER_PATH:", get_env_data_folder())
+    print("IMAGE_STORAGE_ENGINE:", get_env_image_storage_engine())
     print("")
     print("MONGO_PROTOCOL:", get_mongo_protocol())
     print("MONGO_HOST:", get_mongo_host())
     print("MONGO_PORT:", get_mongo_port())
+    print("MONGO_MAX_QUERY_THREADS:", get_mongo_max_query_threads())
     print("")
     print("DBSERVER_PROTOCOL:", get_dbserver_protocol())
     print("DBSERVER_HOST:", get_dbserver_host())
     print("DBSERVER_PORT:", get_dbserver_port())
+    print("DBSERVER_MAX_INGEST_THREADS:", get_dbserver_max_ingest_threads())
+    print("")
+    print("WRITE_BEHIND_ENABLED:", get_env_write_behind_enabled())
+    print("WRITE_BEHIND_MAX_BATCH_SIZE:", get_env_write_behind_max_batch_size())
+    print("WRITE_BEHIND_FLUSH_PERIOD_MS:", get_env_write_behind_flush_period_ms())
+    print("WRITE_BEHIND_USE_WAL:", get_env_write_behind_use_wal())
+    print("")
+    print("NEWEST_METADATA_CACHE_TTL_SEC:", get_env_newest_metadata_cache_ttl_sec())
+    print("CAMERA_REGISTRY_REFRESH_PERIOD_SEC:", get_env_camera_registry_refresh_period_sec())
+    print("GZIP_RESPONSE_CACHE_MAX_MB:", get_env_gzip_response_cache_max_mb())
+    print("GZIP_RESPONSE_CACHE_HORIZON_SEC:", get_env_gzip_response_cache_horizon_sec())
+    print("HOT_IMAGE_CACHE_MAX_MB:", get_env_hot_image_cache_max_mb())
+    print("")
+    print("JSON_SERIALIZER:", get_env_json_serializer())
     print("")
 
 
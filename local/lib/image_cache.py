@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:47:09 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+from threading import Lock
+from collections import OrderedDict
+
+from local.lib.environment import get_env_hot_image_cache_max_mb
+
+from local.lib.response_cache import DATA_DELETION_COUNTER
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+class Hot_Image_Cache:
+    
+    # .................................................................................................................
+    
+    def __init__(self, max_size_bytes, deletion_counter):
+        
+        '''
+        Class used to hold the data of recently saved images in memory (i.e. the 'hot tier' of image storage)
+        Used so that live views, which repeatedly request the newest images from many clients,
+        can be served from RAM rather than going back to disk on every request
+        
+        Images are added as they're saved (write-through) and evicted (least-recently-used first)
+        once the total size of all cached images exceeds the max size. Since images can be removed by
+        other processes (i.e. autodelete), a shared deletion counter is checked on every access &
+        the cache is cleared whenever it changes
+        
+        Functions are called from many threads (image loading happens in the threadpool), so all access is locked
+        '''
+        
+        # Store inputs
+        self._max_size_bytes = max_size_bytes
+        self._deletion_counter = deletion_counter
+        
+        # Storage for image data, keyed by (camera, image type, epoch_ms) & kept in least-to-most recently used order
+        self._entries_dict = OrderedDict()
+        self._total_bytes = 0
+        self._last_deletion_count = deletion_counter.value
+        self._lock = Lock()
+        
+        # Counters used to report on cache effectiveness
+        self._num_hits = 0
+        self._num_misses = 0
+        self._num_evictions = 0
+    
+    # .................................................................................................................
+    
+    def __repr__(self):
+        return "Hot image cache: {} entries ({:.1f} MB)".format(len(self._entries_dict), self._total_bytes / 1E6)
+    
+    # .................................................................................................................
+    
+    @property
+    def enabled(self):
+        return self._max_size_bytes > 0
+    
+    # .................................................................................................................
+    
+    @property
+    def max_entry_bytes(self):
+        
+        ''' Largest image that will be stored, so that no single image can take over the cache '''
+        
+        return max(0, self._max_size_bytes // 4)
+    
+    # .................................................................................................................
+    
+    def get(self, cache_key, record_miss = True):
+        
+        '''
+        Returns the cached image data for the given key, or None if the key isn't in the cache
+        Every successful lookup counts as a hit. Failed lookups count as misses, unless disabled
+        (used when the caller may still find the image in the cache, see record_miss(...))
+        '''
+        
+        with self._lock:
+            self._check_deletions()
+            image_data = self._entries_dict.get(cache_key, None)
+            if image_data is not None:
+                self._entries_dict.move_to_end(cache_key)
+                self._num_hits += 1
+            elif record_miss:
+                self._num_misses += 1
+        
+        return image_data
+    
+    # .................................................................................................................
+    
+    def contains(self, cache_key):
+        
+        ''' Check if an image is cached, without affecting the hit/miss counts or eviction order '''
+        
+        with self._lock:
+            self._check_deletions()
+            is_cached = (cache_key in self._entries_dict)
+        
+        return is_cached
+    
+    # .................................................................................................................
+    
+    def record_miss(self):
+        
+        ''' Function used to count a miss for lookups that don't go through get(...) (e.g. sending files) '''
+        
+        with self._lock:
+            self._num_misses += 1
+        
+        return
+    
+    # .................................................................................................................
+    
+    def store(self, cache_key, image_data):
+        
+        ''' Function used to add image data to the cache, evicting older entries to make space if needed '''
+        
+        # Don't store anything that would take up too much of the cache by itself
+        num_bytes = len(image_data)
+        if num_bytes > self.max_entry_bytes:
+            return
+        
+        # Add (or replace) the entry & evict least-recently used entries until we're back within the size limit
+        with self._lock:
+            self._check_deletions()
+            self._remove_entry(cache_key)
+            self._entries_dict[cache_key] = image_data
+            self._total_bytes += num_bytes
+            while self._total_bytes > self._max_size_bytes:
+                oldest_key = next(iter(self._entries_dict))
+                self._remove_entry(oldest_key)
+                self._num_evictions += 1
+        
+        return
+    
+    # .................................................................................................................
+    
+    def discard(self, cache_key):
+        
+        ''' Function used to remove a single image from the cache (e.g. if the stored copy is removed) '''
+        
+        with self._lock:
+            self._remove_entry(cache_key)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def discard_before(self, camera_select, image_type, oldest_allowed_ems):
+        
+        ''' Function used to remove all cached images (of one type, for one camera) older than the given time '''
+        
+        with self._lock:
+            old_keys_list = [each_key for each_key in self._entries_dict
+                             if each_key[:2] == (camera_select, image_type) and each_key[2] < oldest_allowed_ems]
+            for each_key in old_keys_list:
+                self._remove_entry(each_key)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def invalidate(self, camera_select = None):
+        
+        '''
+        Function used to clear cached images, should be called whenever camera data is deleted
+        If no camera is given, all entries are cleared
+        '''
+        
+        with self._lock:
+            self._invalidate(camera_select)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def get_stats(self):
+        
+        ''' Function used to get info about cache usage & effectiveness (e.g. for diagnostics) '''
+        
+        with self._lock:
+            num_lookups = (self._num_hits + self._num_misses)
+            hit_rate = (self._num_hits / num_lookups) if num_lookups > 0 else None
+            stats_dict = {"enabled": self.enabled,
+                          "max_size_bytes": self._max_size_bytes,
+                          "size_bytes": self._total_bytes,
+                          "num_entries": len(self._entries_dict),
+                          "hits": self._num_hits,
+                          "misses": self._num_misses,
+                          "hit_rate": hit_rate,
+                          "evictions": self._num_evictions}
+        
+        return stats_dict
+    
+    # .................................................................................................................
+    
+    def _invalidate(self, camera_select):
+        
+        ''' Helper used to clear cached images. Must be called while holding the lock! '''
+        
+        if camera_select is None:
+            self._entries_dict.clear()
+            self._total_bytes = 0
+            return
+        
+        camera_keys_list = [each_key for each_key in self._entries_dict if each_key[0] == camera_select]
+        for each_key in camera_keys_list:
+            self._remove_entry(each_key)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def _check_deletions(self):
+        
+        '''
+        Helper used to clear the cache if data has been deleted (possibly by another process) since last check
+        Must be called while holding the lock!
+        '''
+        
+        deletion_count = self._deletion_counter.value
+        if deletion_count != self._last_deletion_count:
+            self._last_deletion_count = deletion_count
+            self._invalidate(None)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def _remove_entry(self, cache_key):
+        
+        ''' Helper used to remove a single entry, while keeping track of the total cache size '''
+        
+        image_data = self._entries_dict.pop(cache_key, None)
+        if image_data is not None:
+            self._total_bytes -= len(image_data)
+        
+        return
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Global setup
+
+# Create (global!) in-memory cache of recently saved images
+HOT_IMAGE_CACHE = Hot_Image_Cache(max_size_bytes = int(1E6 * get_env_hot_image_cache_max_mb()),
+                                  deletion_counter = DATA_DELETION_COUNTER)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -0,0 +1,931 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:58:12 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import mmap
+import struct
+
+from shutil import rmtree
+from threading import Lock, RLock
+from collections import OrderedDict
+
+from local.lib.environment import get_env_image_storage_engine
+
+from local.lib.image_cache import HOT_IMAGE_CACHE
+
+from local.lib.timekeeper_utils import epoch_ms_to_image_folder_names
+
+from local.lib.pathing import BASE_DATA_FOLDER_PATH
+from local.lib.pathing import build_cameras_data_folder_path, build_camera_data_path
+from local.lib.pathing import build_image_pathing, build_image_segment_pathing, get_old_image_folders_list
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+class Image_Store:
+    
+    # .................................................................................................................
+    
+    def __init__(self, base_data_folder_path):
+        
+        '''
+        Base class defining the interface used for all image storage engines
+        Images are identified by: camera name, image type (e.g. "snapshots" or "backgrounds") & epoch_ms
+        
+        Engines must implement:
+            put, get, exists, stat, remove, delete_before, iter_range, delete_camera, list_cameras
+        Other functions (e.g. get_many) have default implementations, which may be overridden for speed
+        
+        All functions are blocking (i.e. file i/o) and should be run in a separate thread when used in async code
+        New engines can be made available to the server using: register_image_store_engine(...)
+        '''
+        
+        # Store inputs
+        self._base_data_folder_path = base_data_folder_path
+    
+    # .................................................................................................................
+    
+    def __repr__(self):
+        return "{} @ {}".format(self.__class__.__name__, self._base_data_folder_path)
+    
+    # .................................................................................................................
+    
+    def put(self, camera_select, image_type, epoch_ms, image_data):
+        
+        '''
+        Function used to save image data. Existing images must never be overwritten!
+        Returns:
+            image_saved (False if the image already exists)
+        '''
+        
+        raise NotImplementedError("Storage engine must implement put(...)")
+    
+    # .................................................................................................................
+    
+    def get(self, camera_select, image_type, epoch_ms):
+        
+        ''' Function used to load image data. Returns None if the image doesn't exist '''
+        
+        raise NotImplementedError("Storage engine must implement get(...)")
+    
+    # .................................................................................................................
+    
+    def get_many(self, camera_select, image_type, epoch_ms_list):
+        
+        '''
+        Function used to load many images at once
+        Returns:
+            image_data_list (same order as the given epoch_ms values, missing images are None)
+        '''
+        
+        return [self.get(camera_select, image_type, each_ems) for each_ems in epoch_ms_list]
+    
+    # .................................................................................................................
+    
+    def get_cached(self, camera_select, image_type, epoch_ms):
+        
+        '''
+        Function used to load image data only if it's held in memory, so it's safe to call from async code
+        Returns None if the image isn't in memory (it may still be stored, see get(...))
+        '''
+        
+        return None
+    
+    # .................................................................................................................
+    
+    def exists(self, camera_select, image_type, epoch_ms):
+        raise NotImplementedError("Storage engine must implement exists(...)")
+    
+    # .................................................................................................................
+    
+    def stat(self, camera_select, image_type, epoch_ms):
+        
+        '''
+        Function used to get info about a stored image, without loading it
+        Returns:
+            stat_dict (or None if the image doesn't exist)
+        
+        The stat dictionary has keys: "epoch_ms", "size_bytes", "engine"
+        '''
+        
+        raise NotImplementedError("Storage engine must implement stat(...)")
+    
+    # .................................................................................................................
+    
+    def get_file_path(self, camera_select, image_type, epoch_ms):
+        
+        '''
+        Function used to get pathing to an image stored as a file, so that it can be sent directly from disk
+        Returns None if the image isn't stored as a separate file (it may still be stored, see get(...))
+        '''
+        
+        return None
+    
+    # .................................................................................................................
+    
+    def remove(self, camera_select, image_type, epoch_ms):
+        
+        ''' Function used to delete a single image (intended for cleaning up after failed uploads) '''
+        
+        raise NotImplementedError("Storage engine must implement remove(...)")
+    
+    # .................................................................................................................
+    
+    def delete_before(self, camera_select, image_type, oldest_allowed_ems):
+        
+        '''
+        Function used to delete stored images older than the given time (i.e. autodelete)
+        Engines are allowed to delete in groups, so some images slightly older than the given time may remain
+        Returns:
+            num_deleted (number of deleted images or groups of images, depending on the engine)
+        '''
+        
+        raise NotImplementedError("Storage engine must implement delete_before(...)")
+    
+    # .................................................................................................................
+    
+    def iter_range(self, camera_select, image_type, start_ems, end_ems):
+        
+        '''
+        Function used to iterate over all stored images within a time range (inclusive), in time order
+        Returns:
+            iterator of (epoch_ms, image_data) tuples
+        '''
+        
+        raise NotImplementedError("Storage engine must implement iter_range(...)")
+    
+    # .................................................................................................................
+    
+    def delete_camera(self, camera_select):
+        
+        ''' Function used to delete all stored images for a camera '''
+        
+        raise NotImplementedError("Storage engine must implement delete_camera(...)")
+    
+    # .................................................................................................................
+    
+    def list_cameras(self):
+        
+        ''' Function used to get a list of all cameras with stored images '''
+        
+        raise NotImplementedError("Storage engine must implement list_cameras(...)")
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+class Folder_Image_Store(Image_Store):
+    
+    # .................................................................................................................
+    
+    def __init__(self, base_data_folder_path):
+        
+        '''
+        Image storage engine which saves every image as a separate (jpg) file, grouped into hourly folders:
+            .../cameras/<camera>/<image type>/<date>/<hour>/<epoch_ms>.jpg
+        This is the original storage layout of the dbserver
+        '''
+        
+        # Inherit from parent
+        super().__init__(base_data_folder_path)
+    
+    # .................................................................................................................
+    
+    def put(self, camera_select, image_type, epoch_ms, image_data):
+        
+        # Use 'exclusive' file creation, so we can't overwrite an existing image
+        image_save_path = build_image_pathing(self._base_data_folder_path, camera_select, image_type, epoch_ms,
+                                              create_folder_if_missing = True)
+        try:
+            with open(image_save_path, "xb") as out_file:
+                out_file.write(image_data)
+        except FileExistsError:
+            return False
+        
+        return True
+    
+    # .................................................................................................................
+    
+    def get(self, camera_select, image_type, epoch_ms):
+        
+        image_load_path = self._build_file_path(camera_select, image_type, epoch_ms)
+        try:
+            with open(image_load_path, "rb") as in_file:
+                image_data = in_file.read()
+        except FileNotFoundError:
+            image_data = None
+        
+        return image_data
+    
+    # .................................................................................................................
+    
+    def exists(self, camera_select, image_type, epoch_ms):
+        return os.path.exists(self._build_file_path(camera_select, image_type, epoch_ms))
+    
+    # .................................................................................................................
+    
+    def stat(self, camera_select, image_type, epoch_ms):
+        
+        try:
+            file_stat = os.stat(self._build_file_path(camera_select, image_type, epoch_ms))
+        except FileNotFoundError:
+            return None
+        
+        return {"epoch_ms": epoch_ms, "size_bytes": file_stat.st_size, "engine": "folders"}
+    
+    # .................................................................................................................
+    
+    def get_file_path(self, camera_select, image_type, epoch_ms):
+        
+        image_load_path = self._build_file_path(camera_select, image_type, epoch_ms)
+        
+        return image_load_path if os.path.exists(image_load_path) else None
+    
+    # .................................................................................................................
+    
+    def remove(self, camera_select, image_type, epoch_ms):
+        
+        try:
+            os.remove(self._build_file_path(camera_select, image_type, epoch_ms))
+        except FileNotFoundError:
+            pass
+        
+        return
+    
+    # .................................................................................................................
+    
+    def delete_before(self, camera_select, image_type, oldest_allowed_ems):
+        
+        ''' Deletes all (hourly) groups of images which are entirely older than the given time '''
+        
+        # Hourly groups may be folders (per-file layout) or segment files (packed layout), so handle both
+        old_paths_list = get_old_image_folders_list(self._base_data_folder_path,
+                                                    camera_select, image_type, oldest_allowed_ems)
+        for each_path in old_paths_list:
+            if os.path.isdir(each_path):
+                rmtree(each_path, ignore_errors = True)
+                continue
+            try:
+                os.remove(each_path)
+            except FileNotFoundError:
+                pass
+        
+        return len(old_paths_list)
+    
+    # .................................................................................................................
+    
+    def iter_range(self, camera_select, image_type, start_ems, end_ems):
+        
+        # Find all images in the range, by listing the hour folders covering the range
+        epoch_ms_list = []
+        for each_hour_folder_path in self._get_hour_folder_paths(camera_select, image_type, start_ems, end_ems):
+            epoch_ms_list += list_image_folder_epoch_ms(each_hour_folder_path, start_ems, end_ems)
+        
+        # Load images in time order (skipping any that get deleted while iterating)
+        for each_ems in sorted(epoch_ms_list):
+            image_data = self.get(camera_select, image_type, each_ems)
+            if image_data is not None:
+                yield each_ems, image_data
+        
+        return
+    
+    # .................................................................................................................
+    
+    def delete_camera(self, camera_select):
+        
+        camera_data_folder_path = build_camera_data_path(self._base_data_folder_path, camera_select)
+        rmtree(camera_data_folder_path, ignore_errors = True)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def list_cameras(self):
+        
+        cameras_folder_path = build_cameras_data_folder_path(self._base_data_folder_path)
+        try:
+            camera_names_list = sorted(os.listdir(cameras_folder_path))
+        except FileNotFoundError:
+            camera_names_list = []
+        
+        return camera_names_list
+    
+    # .................................................................................................................
+    
+    def _build_file_path(self, camera_select, image_type, epoch_ms):
+        return build_image_pathing(self._base_data_folder_path, camera_select, image_type, epoch_ms,
+                                   create_folder_if_missing = False)
+    
+    # .................................................................................................................
+    
+    def _get_hour_folder_paths(self, camera_select, image_type, start_ems, end_ems):
+        
+        ''' Helper used to get pathing to every (per-file layout) hour folder covering a time range '''
+        
+        hour_folder_paths_list = []
+        for each_hour_ems in get_hour_epoch_ms_list(start_ems, end_ems):
+            date_folder_name, hour_folder_name = epoch_ms_to_image_folder_names(each_hour_ems)
+            hour_folder_path = build_camera_data_path(self._base_data_folder_path, camera_select,
+                                                      image_type, date_folder_name, hour_folder_name)
+            if hour_folder_path not in hour_folder_paths_list:
+                hour_folder_paths_list.append(hour_folder_path)
+        
+        return hour_folder_paths_list
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+class Packed_Image_Store(Folder_Image_Store):
+    
+    # .................................................................................................................
+    
+    def __init__(self, base_data_folder_path, max_cached_indexes = 256, num_segment_locks = 64):
+        
+        '''
+        Image storage engine which appends images into a single 'segment' file per hour, instead of one file per image:
+            .../cameras/<camera>/<image type>/<date>/<hour>.seg
+        
+        Each segment has a matching index file (<hour>.idx) made of fixed-size (epoch_ms, offset, length) records,
+        which is used to locate images within the segment. Images are read back using mmap.
+        This greatly reduces the number of files stored, and deletion only needs to remove whole segment files
+        
+        Images stored using the per-file layout (e.g. from before switching engines) can still be read & deleted,
+        see the 'migrate_image_storage.py' script for converting existing images to segments
+        Note: segments must only be written by a single process (i.e. the server)
+        '''
+        
+        # Inherit from parent, which handles images stored as separate files
+        super().__init__(base_data_folder_path)
+        
+        # Storage for loaded segment indexes (kept in least-to-most recently used order)
+        self._max_cached_indexes = max_cached_indexes
+        self._index_cache_dict = OrderedDict()
+        
+        # Set up locking, since storage functions are called from many threads
+        # -> The cache lock only guards the index cache itself (no file access), so it's always held briefly
+        # -> Segment locks make appends/removals & index (re-)loading exclusive per segment (shared by hashing),
+        #    while reads of already-loaded indexes don't need to lock the segment at all
+        self._cache_lock = Lock()
+        self._segment_locks_list = [RLock() for _ in range(max(1, num_segment_locks))]
+    
+    # .................................................................................................................
+    
+    def put(self, camera_select, image_type, epoch_ms, image_data):
+        
+        # Don't overwrite existing (per-file layout) images
+        if super().exists(camera_select, image_type, epoch_ms):
+            return False
+        
+        return self.append_to_segment(camera_select, image_type, epoch_ms, image_data)
+    
+    # .................................................................................................................
+    
+    def append_to_segment(self, camera_select, image_type, epoch_ms, image_data):
+        
+        '''
+        Function used to add image data to the end of the corresponding (hourly) segment
+        Unlike put(...), this doesn't check for images stored using the per-file layout (used for migrating data)
+        Returns:
+            image_saved (False if the image already exists in the segment)
+        '''
+        
+        segment_data_path, segment_index_path = \
+            build_image_segment_pathing(self._base_data_folder_path, camera_select, image_type, epoch_ms,
+                                        create_folder_if_missing = True)
+        
+        with self._get_segment_lock(segment_index_path):
+            
+            # Don't overwrite existing images
+            if epoch_ms in self._get_segment_index(segment_index_path):
+                return False
+            
+            # Append image data first, then record its location, so the index never points at missing data
+            with open(segment_data_path, "ab") as data_file:
+                data_offset = data_file.tell()
+                data_file.write(image_data)
+            self._append_index_record(segment_index_path, epoch_ms, data_offset, len(image_data))
+        
+        return True
+    
+    # .................................................................................................................
+    
+    def get(self, camera_select, image_type, epoch_ms):
+        
+        # Look for the image in the segment, otherwise check for a (per-file layout) file
+        segment_data_path, segment_index_path = self._build_segment_paths(camera_select, image_type, epoch_ms)
+        data_location = self._get_segment_index(segment_index_path).get(epoch_ms, None)
+        if data_location is None:
+            return super().get(camera_select, image_type, epoch_ms)
+        
+        data_offset, data_length = data_location
+        
+        return read_segment_data(segment_data_path, data_offset, data_length)
+    
+    # .................................................................................................................
+    
+    def exists(self, camera_select, image_type, epoch_ms):
+        
+        _, segment_index_path = self._build_segment_paths(camera_select, image_type, epoch_ms)
+        in_segment = (epoch_ms in self._get_segment_index(segment_index_path))
+        
+        return in_segment or super().exists(camera_select, image_type, epoch_ms)
+    
+    # .................................................................................................................
+    
+    def stat(self, camera_select, image_type, epoch_ms):
+        
+        _, segment_index_path = self._build_segment_paths(camera_select, image_type, epoch_ms)
+        data_location = self._get_segment_index(segment_index_path).get(epoch_ms, None)
+        if data_location is None:
+            return super().stat(camera_select, image_type, epoch_ms)
+        
+        _, data_length = data_location
+        
+        return {"epoch_ms": epoch_ms, "size_bytes": data_length, "engine": "packed"}
+    
+    # .................................................................................................................
+    
+    def remove(self, camera_select, image_type, epoch_ms):
+        
+        '''
+        Images can't be removed from the middle of a segment file, instead a 'removal' record
+        (with zero length) is added to the index. The image data is cleared when the whole segment is deleted
+        '''
+        
+        _, segment_index_path = self._build_segment_paths(camera_select, image_type, epoch_ms)
+        with self._get_segment_lock(segment_index_path):
+            if epoch_ms in self._get_segment_index(segment_index_path):
+                self._append_index_record(segment_index_path, epoch_ms, 0, 0)
+        
+        return super().remove(camera_select, image_type, epoch_ms)
+    
+    # .................................................................................................................
+    
+    def delete_before(self, camera_select, image_type, oldest_allowed_ems):
+        
+        # Delete segments (and any per-file layout folders) then forget about any deleted indexes
+        num_deleted = super().delete_before(camera_select, image_type, oldest_allowed_ems)
+        with self._cache_lock:
+            self._index_cache_dict.clear()
+        
+        return num_deleted
+    
+    # .................................................................................................................
+    
+    def iter_range(self, camera_select, image_type, start_ems, end_ems):
+        
+        # Find all images in the range, from every segment covering the range
+        epoch_ms_set = set()
+        for each_hour_ems in get_hour_epoch_ms_list(start_ems, end_ems):
+            _, segment_index_path = self._build_segment_paths(camera_select, image_type, each_hour_ems)
+            segment_ems_list = list(self._get_segment_index(segment_index_path).keys())
+            epoch_ms_set.update(ems for ems in segment_ems_list if start_ems <= ems <= end_ems)
+        
+        # Include any images stored using the per-file layout
+        for each_hour_folder_path in self._get_hour_folder_paths(camera_select, image_type, start_ems, end_ems):
+            epoch_ms_set.update(list_image_folder_epoch_ms(each_hour_folder_path, start_ems, end_ems))
+        
+        # Load images in time order (skipping any that get deleted while iterating)
+        for each_ems in sorted(epoch_ms_set):
+            image_data = self.get(camera_select, image_type, each_ems)
+            if image_data is not None:
+                yield each_ems, image_data
+        
+        return
+    
+    # .................................................................................................................
+    
+    def delete_camera(self, camera_select):
+        
+        super().delete_camera(camera_select)
+        with self._cache_lock:
+            self._index_cache_dict.clear()
+        
+        return
+    
+    # .................................................................................................................
+    
+    def _build_segment_paths(self, camera_select, image_type, epoch_ms):
+        return build_image_segment_pathing(self._base_data_folder_path, camera_select, image_type, epoch_ms,
+                                           create_folder_if_missing = False)
+    
+    # .................................................................................................................
+    
+    def _get_segment_lock(self, segment_index_path):
+        
+        ''' Helper used to get the lock for a given segment (locks are shared between segments, by hashing) '''
+        
+        lock_idx = hash(segment_index_path) % len(self._segment_locks_list)
+        
+        return self._segment_locks_list[lock_idx]
+    
+    # .................................................................................................................
+    
+    def _get_segment_index(self, segment_index_path):
+        
+        '''
+        Helper used to get the index of a segment, as a dictionary: {epoch_ms: (offset, length)}
+        Indexes are cached, but re-checked against the file on every call, since segments can be deleted
+        by other processes (i.e. autodelete). Records added since the last check are read incrementally
+        Up-to-date cached indexes are returned without locking the segment, so concurrent reads don't block
+        each other. Loading is done while holding the segment lock, so appends are never read half-way
+        '''
+        
+        # Treat missing index files as an empty index (don't bother caching it)
+        try:
+            index_stat = os.stat(segment_index_path)
+        except FileNotFoundError:
+            with self._cache_lock:
+                self._index_cache_dict.pop(segment_index_path, None)
+            return {}
+        
+        # Use the cached index directly if it's up-to-date
+        index_inode, index_size = index_stat.st_ino, index_stat.st_size
+        cached_inode, cached_size, index_dict = self._get_cached_index(segment_index_path)
+        if cached_inode == index_inode and cached_size == index_size:
+            return index_dict
+        
+        with self._get_segment_lock(segment_index_path):
+            
+            # Re-check the cache, in case another thread loaded the index while we were waiting
+            cached_inode, cached_size, index_dict = self._get_cached_index(segment_index_path)
+            
+            # Re-load the whole index if it's new to us (or it's been replaced), otherwise just read new records
+            # -> Reading new records updates the cached dictionary in-place, which is safe for concurrent readers
+            if cached_inode != index_inode or index_size < cached_size:
+                cached_size, index_dict = 0, {}
+            if index_size > cached_size:
+                cached_size = load_segment_index_records(segment_index_path, index_dict, cached_size)
+            
+            # Store updated index & remove least-recently used indexes if we're storing too many
+            with self._cache_lock:
+                self._index_cache_dict[segment_index_path] = (index_inode, cached_size, index_dict)
+                self._index_cache_dict.move_to_end(segment_index_path)
+                while len(self._index_cache_dict) > self._max_cached_indexes:
+                    self._index_cache_dict.popitem(last = False)
+        
+        return index_dict
+    
+    # .................................................................................................................
+    
+    def _get_cached_index(self, segment_index_path):
+        
+        ''' Helper used to get a cached index entry: (inode, size, index_dict), or (None, 0, None) if missing '''
+        
+        with self._cache_lock:
+            cached_entry = self._index_cache_dict.get(segment_index_path, None)
+            if cached_entry is None:
+                return (None, 0, None)
+            self._index_cache_dict.move_to_end(segment_index_path)
+        
+        return cached_entry
+    
+    # .................................................................................................................
+    
+    def _append_index_record(self, segment_index_path, epoch_ms, data_offset, data_length):
+        
+        ''' Helper used to add a record to a segment index file. Must be called while holding the segment lock! '''
+        
+        with open(segment_index_path, "ab") as index_file:
+            
+            # Drop any partially written record (e.g. from a crash), so all following records stay aligned
+            index_size = index_file.tell()
+            partial_record_size = (index_size % SEGMENT_RECORD.size)
+            if partial_record_size > 0:
+                index_file.truncate(index_size - partial_record_size)
+            
+            index_file.write(SEGMENT_RECORD.pack(epoch_ms, data_offset, data_length))
+        
+        return
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+class Hot_Tier_Image_Store(Image_Store):
+    
+    # .................................................................................................................
+    
+    def __init__(self, image_store, hot_image_cache):
+        
+        '''
+        Wrapper around another storage engine, which keeps recently saved images in memory
+        Images are added to the in-memory cache as they're saved (write-through) and all reads check
+        the cache before falling back to the wrapped engine. Hits & misses are counted by the cache
+        '''
+        
+        # Inherit from parent, using the same storage location as the wrapped engine
+        super().__init__(image_store._base_data_folder_path)
+        
+        # Store inputs
+        self._image_store = image_store
+        self._hot_cache = hot_image_cache
+    
+    # .................................................................................................................
+    
+    def __repr__(self):
+        return "{} (hot tier) @ {}".format(self._image_store.__class__.__name__, self._base_data_folder_path)
+    
+    # .................................................................................................................
+    
+    def put(self, camera_select, image_type, epoch_ms, image_data):
+        
+        image_saved = self._image_store.put(camera_select, image_type, epoch_ms, image_data)
+        if image_saved:
+            self._hot_cache.store((camera_select, image_type, epoch_ms), image_data)
+        
+        return image_saved
+    
+    # .................................................................................................................
+    
+    def get(self, camera_select, image_type, epoch_ms):
+        
+        image_data = self._hot_cache.get((camera_select, image_type, epoch_ms))
+        if image_data is None:
+            image_data = self._image_store.get(camera_select, image_type, epoch_ms)
+        
+        return image_data
+    
+    # .................................................................................................................
+    
+    def get_many(self, camera_select, image_type, epoch_ms_list):
+        
+        # Grab everything we can from memory, then load all missing images from the wrapped engine together
+        image_data_list = [self._hot_cache.get((camera_select, image_type, each_ems)) for each_ems in epoch_ms_list]
+        missing_idx_list = [each_idx for each_idx, each_data in enumerate(image_data_list) if each_data is None]
+        if missing_idx_list:
+            missing_ems_list = [epoch_ms_list[each_idx] for each_idx in missing_idx_list]
+            loaded_data_list = self._image_store.get_many(camera_select, image_type, missing_ems_list)
+            for each_idx, each_data in zip(missing_idx_list, loaded_data_list):
+                image_data_list[each_idx] = each_data
+        
+        return image_data_list
+    
+    # .................................................................................................................
+    
+    def get_cached(self, camera_select, image_type, epoch_ms):
+        
+        # Don't count misses here, since the caller will fall back to loading from the wrapped engine
+        return self._hot_cache.get((camera_select, image_type, epoch_ms), record_miss = False)
+    
+    # .................................................................................................................
+    
+    def exists(self, camera_select, image_type, epoch_ms):
+        
+        if self._hot_cache.contains((camera_select, image_type, epoch_ms)):
+            return True
+        
+        return self._image_store.exists(camera_select, image_type, epoch_ms)
+    
+    # .................................................................................................................
+    
+    def stat(self, camera_select, image_type, epoch_ms):
+        return self._image_store.stat(camera_select, image_type, epoch_ms)
+    
+    # .................................................................................................................
+    
+    def get_file_path(self, camera_select, image_type, epoch_ms):
+        
+        # Don't send cached images from disk. Otherwise the image is sent from disk, which counts as a miss
+        if self._hot_cache.contains((camera_select, image_type, epoch_ms)):
+            return None
+        
+        image_file_path = self._image_store.get_file_path(camera_select, image_type, epoch_ms)
+        if image_file_path is not None:
+            self._hot_cache.record_miss()
+        
+        return image_file_path
+    
+    # .................................................................................................................
+    
+    def remove(self, camera_select, image_type, epoch_ms):
+        
+        self._hot_cache.discard((camera_select, image_type, epoch_ms))
+        
+        return self._image_store.remove(camera_select, image_type, epoch_ms)
+    
+    # .................................................................................................................
+    
+    def delete_before(self, camera_select, image_type, oldest_allowed_ems):
+        
+        self._hot_cache.discard_before(camera_select, image_type, oldest_allowed_ems)
+        
+        return self._image_store.delete_before(camera_select, image_type, oldest_allowed_ems)
+    
+    # .................................................................................................................
+    
+    def iter_range(self, camera_select, image_type, start_ems, end_ems):
+        return self._image_store.iter_range(camera_select, image_type, start_ems, end_ems)
+    
+    # .................................................................................................................
+    
+    def delete_camera(self, camera_select):
+        
+        self._hot_cache.invalidate(camera_select)
+        
+        return self._image_store.delete_camera(camera_select)
+    
+    # .................................................................................................................
+    
+    def list_cameras(self):
+        return self._image_store.list_cameras()
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def load_segment_index_records(segment_index_path, index_dict, start_offset = 0):
+    
+    '''
+    Function used to read (epoch_ms, offset, length) records from a segment index file into a dictionary
+    Records with zero length mark removed images. Partially written records (at the end of the file) are ignored
+    Returns:
+        end_offset (file position following the last complete record that was read)
+    '''
+    
+    with open(segment_index_path, "rb") as index_file:
+        index_file.seek(start_offset)
+        index_data = index_file.read()
+    
+    # Apply records in order, so that later records (e.g. removals) take priority
+    num_records = len(index_data) // SEGMENT_RECORD.size
+    complete_records_data = index_data[:(num_records * SEGMENT_RECORD.size)]
+    for epoch_ms, data_offset, data_length in SEGMENT_RECORD.iter_unpack(complete_records_data):
+        if data_length > 0:
+            index_dict[epoch_ms] = (data_offset, data_length)
+        else:
+            index_dict.pop(epoch_ms, None)
+    
+    return start_offset + num_records * SEGMENT_RECORD.size
+
+# .....................................................................................................................
+
+def read_segment_data(segment_data_path, data_offset, data_length):
+    
+    ''' Function used to read a single image from a segment file (using mmap). Returns None if data is missing '''
+    
+    try:
+        with open(segment_data_path, "rb") as in_file:
+            with mmap.mmap(in_file.fileno(), 0, access = mmap.ACCESS_READ) as segment_map:
+                image_data = segment_map[data_offset:(data_offset + data_length)]
+    except (FileNotFoundError, ValueError):
+        return None
+    
+    return image_data if len(image_data) == data_length else None
+
+# .....................................................................................................................
+
+def list_image_folder_epoch_ms(image_folder_path, start_ems, end_ems):
+    
+    ''' Function used to list the epoch_ms values of all (per-file layout) images in a folder, within a range '''
+    
+    try:
+        file_names_list = os.listdir(image_folder_path)
+    except FileNotFoundError:
+        return []
+    
+    epoch_ms_list = []
+    for each_file_name in file_names_list:
+        file_name_only, file_ext = os.path.splitext(each_file_name)
+        if file_ext != ".jpg" or not file_name_only.isdigit():
+            continue
+        file_ems = int(file_name_only)
+        if start_ems <= file_ems <= end_ems:
+            epoch_ms_list.append(file_ems)
+    
+    return epoch_ms_list
+
+# .....................................................................................................................
+
+def get_hour_epoch_ms_list(start_ems, end_ems):
+    
+    '''
+    Function used to get a list of epoch_ms values falling in every hour between a start & end time
+    Used to find all hourly groups of images (folders or segments) that cover a time range
+    '''
+    
+    # Step through the range an hour at a time, making sure the end time is always included
+    one_hour_ms = (60 * 60 * 1000)
+    hour_ems_list = list(range(start_ems, end_ems, one_hour_ms))
+    hour_ems_list.append(end_ems)
+    
+    return hour_ems_list
+
+# .....................................................................................................................
+
+def register_image_store_engine(engine_name, image_store_class):
+    
+    '''
+    Function used to make a storage engine available for selection through the environment
+    The given class must inherit from Image_Store and take the base data folder path as its only init argument
+    Note: the global IMAGE_STORE is created on import, engines registered afterwards must be built directly
+    '''
+    
+    if not issubclass(image_store_class, Image_Store):
+        raise TypeError("Storage engine must inherit from Image_Store! ({})".format(image_store_class.__name__))
+    
+    IMAGE_STORE_ENGINES[engine_name.lower()] = image_store_class
+    
+    return
+
+# .....................................................................................................................
+
+def build_image_store(engine_name, base_data_folder_path, default_engine_name = "folders"):
+    
+    ''' Function used to create an image storage engine, from the name of a registered engine '''
+    
+    engine_name = engine_name.lower()
+    if engine_name not in IMAGE_STORE_ENGINES:
+        print("", "Unknown image storage engine: {}".format(engine_name),
+              "--> Using '{}'".format(default_engine_name),
+              "    (options: {})".format(", ".join(IMAGE_STORE_ENGINES.keys())), sep = "\n")
+        engine_name = default_engine_name
+    
+    return IMAGE_STORE_ENGINES[engine_name](base_data_folder_path)
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Global setup
+
+# Hard-code the format of segment index records: epoch_ms (int64), data offset (uint64), data length (uint32)
+SEGMENT_RECORD = struct.Struct("<qQI")
+
+# Set up (global!) listing of available storage engines, see register_image_store_engine(...) to add others
+IMAGE_STORE_ENGINES = {"folders": Folder_Image_Store, "packed": Packed_Image_Store}
+
+# Create (global!) image storage, used for all reading/writing/deleting of image data
+# -> Recently saved images are also kept in memory, if the hot image cache is enabled
+IMAGE_STORE = build_image_store(get_env_image_storage_engine(), BASE_DATA_FOLDER_PATH)
+if HOT_IMAGE_CACHE.enabled:
+    IMAGE_STORE = Hot_Tier_Image_Store(IMAGE_STORE, HOT_IMAGE_CACHE)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
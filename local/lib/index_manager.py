@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:48:31 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+from time import monotonic
+
+from local.lib.async_db_helpers import check_collection_indexing, set_collection_indexing
+from local.lib.response_cache import DATA_DELETION_COUNTER
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Declaration functions
+
+# .....................................................................................................................
+
+def declare_required_indexes(collection_name, index_key_list, *, is_name_prefix = False):
+    
+    '''
+    Function used to declare the indexes that are required for a given collection (for all cameras)
+    If 'is_name_prefix' is True, the declaration applies to all collections starting with the given name
+    (e.g. for collections with dynamically generated names)
+    '''
+    
+    target_dict = _REQUIRED_PREFIX_INDEXES_DICT if is_name_prefix else _REQUIRED_INDEXES_DICT
+    target_dict[collection_name] = list(index_key_list)
+    
+    return
+
+# .....................................................................................................................
+
+def get_required_indexes(collection_name):
+    
+    ''' Function which returns the list of index keys required for a given collection, or None if not declared '''
+    
+    # Check for exact matches first
+    index_key_list = _REQUIRED_INDEXES_DICT.get(collection_name, None)
+    if index_key_list is not None:
+        return index_key_list
+    
+    # Check for prefix matches
+    for each_prefix, each_index_key_list in _REQUIRED_PREFIX_INDEXES_DICT.items():
+        if collection_name.startswith(each_prefix):
+            return each_index_key_list
+    
+    return None
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Indexing functions
+
+# .....................................................................................................................
+
+async def ensure_collection_indexes(mongo_client, camera_select, collection_name):
+    
+    '''
+    Function which makes sure the declared indexes exist for a given camera collection
+    After the first check, the result is cached (in memory), so that repeat calls don't need to talk to the db
+    Cached results are cleared whenever data is deleted by other processes (i.e. autodelete), since that may
+    remove camera databases, and also expire periodically as a fallback
+    Returns:
+        indexes_were_set (True if new indexes were created, otherwise False)
+    '''
+    
+    # Skip the db check if we've recently confirmed indexing (and no data has been deleted since)
+    _check_deletions()
+    cache_key = (camera_select, collection_name)
+    last_ensured_time = _ENSURED_INDEXES_CACHE.get(cache_key, None)
+    if last_ensured_time is not None:
+        cache_is_valid = ((monotonic() - last_ensured_time) < INDEX_CACHE_TTL_SEC)
+        if cache_is_valid:
+            return False
+    
+    # Nothing to do if the collection doesn't have any declared indexes
+    index_key_list = get_required_indexes(collection_name)
+    if not index_key_list:
+        _ENSURED_INDEXES_CACHE[cache_key] = monotonic()
+        return False
+    
+    # Check the db for indexing & set if needed
+    collection_ref = mongo_client[camera_select][collection_name]
+    indexes_already_set = await check_collection_indexing(collection_ref, index_key_list)
+    if not indexes_already_set:
+        await set_collection_indexing(collection_ref, index_key_list)
+    
+    # Record the result so we don't need to check again
+    _ENSURED_INDEXES_CACHE[cache_key] = monotonic()
+    indexes_were_set = (not indexes_already_set)
+    
+    return indexes_were_set
+
+# .....................................................................................................................
+
+def invalidate_index_cache(camera_select = None, collection_name = None):
+    
+    '''
+    Function used to clear cached indexing results, should be called whenever camera databases are dropped
+    If no camera is given, the entire cache is cleared.
+    If no collection name is given, all collections for the given camera are cleared
+    '''
+    
+    # Wipe out everything if no camera is specified
+    if camera_select is None:
+        _ENSURED_INDEXES_CACHE.clear()
+        return
+    
+    # Otherwise only remove matching entries
+    keys_to_remove_list = [each_key for each_key in _ENSURED_INDEXES_CACHE.keys()
+                           if each_key[0] == camera_select and collection_name in (None, each_key[1])]
+    for each_key in keys_to_remove_list:
+        _ENSURED_INDEXES_CACHE.pop(each_key, None)
+    
+    return
+
+# .....................................................................................................................
+
+def _check_deletions():
+    
+    ''' Helper used to clear the cache if data has been deleted (possibly by another process) since last check '''
+    
+    global _LAST_DELETION_COUNT
+    
+    deletion_count = DATA_DELETION_COUNTER.value
+    if deletion_count != _LAST_DELETION_COUNT:
+        _LAST_DELETION_COUNT = deletion_count
+        invalidate_index_cache()
+    
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Global setup
+
+# Storage for declared indexes, keyed by collection name (or collection name prefix)
+_REQUIRED_INDEXES_DICT = {}
+_REQUIRED_PREFIX_INDEXES_DICT = {}
+
+# Storage for (camera, collection) pairings whose indexing has been confirmed, along with the time of confirmation
+_ENSURED_INDEXES_CACHE = {}
+INDEX_CACHE_TTL_SEC = (60 * 60)
+
+# Keep track of the shared data deletion count, so cached results can be cleared when data is deleted
+_LAST_DELETION_COUNT = DATA_DELETION_COUNTER.value
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:02:37 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import io
+import asyncio
+import tarfile
+import struct
+import ujson
+
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from local.lib.environment import get_dbserver_max_ingest_threads
+
+from local.lib.mongo_helpers import post_one_to_mongo, post_many_to_mongo
+from local.lib.image_store import IMAGE_STORE
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Executor functions
+
+# .....................................................................................................................
+
+async def run_in_ingest_executor(blocking_func, *args, **kwargs):
+    
+    '''
+    Helper function used to run blocking work associated with incoming (POSTed) data
+    Uses a dedicated thread pool, so that heavy uploading can't starve the threads used to serve GET requests
+    '''
+    
+    event_loop = asyncio.get_event_loop()
+    func_with_args = partial(blocking_func, *args, **kwargs)
+    
+    return await event_loop.run_in_executor(INGEST_EXECUTOR, func_with_args)
+
+# .....................................................................................................................
+
+def shutdown_ingest_executor():
+    
+    ''' Helper function used to clean up the ingest executor threads (waits for in-progress writes to finish!) '''
+    
+    INGEST_EXECUTOR.shutdown(wait = True)
+    
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Metadata functions
+
+# .....................................................................................................................
+
+async def ingest_one_to_mongo(mongo_client, database_name, collection_name, data_to_insert):
+    
+    ''' Non-blocking version of the mongo 'post_one' call, which runs on the ingest executor '''
+    
+    return await run_in_ingest_executor(post_one_to_mongo,
+                                        mongo_client, database_name, collection_name, data_to_insert)
+
+# .....................................................................................................................
+
+async def ingest_many_to_mongo(mongo_client, database_name, collection_name, data_to_insert):
+    
+    ''' Non-blocking version of the mongo 'post_many' call, which runs on the ingest executor '''
+    
+    return await run_in_ingest_executor(post_many_to_mongo,
+                                        mongo_client, database_name, collection_name, data_to_insert)
+
+# .....................................................................................................................
+
+def unpack_metadata_and_image_data(post_data):
+    
+    '''
+    Function used to split combined metadata & image data (from a single post body) into separate parts
+    Expects data in the format:
+        [4 bytes: metadata size (N), big-endian] + [N bytes: json metadata] + [remaining bytes: image data]
+    Raises a ValueError if the data isn't formatted correctly!
+    Returns:
+        metadata_dict, image_data
+    '''
+    
+    # Figure out how much of the data is metadata
+    header_size = 4
+    if len(post_data) < header_size:
+        raise ValueError("Missing metadata size header")
+    metadata_size, = struct.unpack(">I", post_data[:header_size])
+    
+    # Make sure the metadata size is sensible
+    metadata_end_idx = header_size + metadata_size
+    if metadata_end_idx > len(post_data):
+        raise ValueError("Metadata size ({}) exceeds data size ({})".format(metadata_size, len(post_data)))
+    
+    # Split data into the metadata and image components
+    metadata_dict = ujson.loads(post_data[header_size:metadata_end_idx])
+    image_data = post_data[metadata_end_idx:]
+    if not isinstance(metadata_dict, dict):
+        raise ValueError("Metadata must be a single json object")
+    
+    return metadata_dict, image_data
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Image functions
+
+# .....................................................................................................................
+
+def _save_many_images_from_tar(camera_select, image_type, tar_data):
+    
+    '''
+    Blocking helper which unpacks tar data containing many images and saves each image to the image store
+    Image files inside the tar data must be named by their epoch_ms value (e.g. 1600000000000.jpg)
+    The tar data is read as a stream, so that all images are handled in a single pass
+    Returns:
+        image_status_dict (keys are image file names, values are one of: "saved", "exists", "bad name")
+    '''
+    
+    image_status_dict = {}
+    with tarfile.open(fileobj = io.BytesIO(tar_data), mode = "r|*") as in_tar:
+        for each_member in in_tar:
+            
+            # Skip folders, links etc.
+            if not each_member.isfile():
+                continue
+            
+            # Get the epoch_ms value from the image file name
+            image_file_name = os.path.basename(each_member.name)
+            name_only, _ = os.path.splitext(image_file_name)
+            try:
+                image_epoch_ms = int(name_only)
+            except ValueError:
+                image_status_dict[image_file_name] = "bad name"
+                continue
+            
+            # Save the data (existing images are never overwritten)
+            image_data = in_tar.extractfile(each_member).read()
+            image_saved = IMAGE_STORE.put(camera_select, image_type, image_epoch_ms, image_data)
+            image_status_dict[image_file_name] = "saved" if image_saved else "exists"
+    
+    return image_status_dict
+
+# .....................................................................................................................
+
+async def save_many_images_from_tar(camera_select, image_type, tar_data):
+    
+    '''
+    Function which saves many images (bundled as tar data) to the image store, without blocking the event loop
+    Raises a tarfile.TarError if the provided data can't be read as a tar file!
+    Returns:
+        image_status_dict (keys are image file names, values are one of: "saved", "exists", "bad name")
+    '''
+    
+    return await run_in_ingest_executor(_save_many_images_from_tar, camera_select, image_type, tar_data)
+
+# .....................................................................................................................
+
+async def check_image_exists(camera_select, image_type, epoch_ms):
+    
+    ''' Function used to check if an image has already been stored, without blocking the event loop '''
+    
+    return await run_in_ingest_executor(IMAGE_STORE.exists, camera_select, image_type, epoch_ms)
+
+# .....................................................................................................................
+
+async def save_image_data(camera_select, image_type, epoch_ms, image_data):
+    
+    '''
+    Function which saves (already encoded) image data to the image store, without blocking the event loop
+    Returns:
+        image_saved (False if the image already exists, since existing images are never overwritten)
+    '''
+    
+    return await run_in_ingest_executor(IMAGE_STORE.put, camera_select, image_type, epoch_ms, image_data)
+
+# .....................................................................................................................
+
+async def remove_image_data(camera_select, image_type, epoch_ms):
+    
+    ''' Function which deletes a (previously saved) image, used to clean up after failed uploads '''
+    
+    return await run_in_ingest_executor(IMAGE_STORE.remove, camera_select, image_type, epoch_ms)
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Global setup
+
+# Create (global!) thread pool used to handle all incoming (POSTed) data
+# -> Kept separate from the db query pool, so that bursts of uploads don't slow down data retrieval
+INGEST_EXECUTOR = ThreadPoolExecutor(max_workers = get_dbserver_max_ingest_threads(), thread_name_prefix = "ingest")
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
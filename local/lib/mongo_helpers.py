@@ -231,9 +231,28 @@ def convert_to_many(data_to_insert):
 
 # .....................................................................................................................
 
+def get_index_name(index_key):
+    
+    '''
+    Helper function which generates the (default) name mongo gives to an index
+    Index keys can be given as a single key-name (e.g. "key_name"), or as a list of (key-name, direction) tuples,
+    for compound indexes (e.g. [("key_1", pymongo.ASCENDING), ("key_2", pymongo.DESCENDING)])
+    '''
+    
+    # Single key-names are indexed in ascending order by default
+    if isinstance(index_key, str):
+        return "{}_1".format(index_key)
+    
+    return "_".join("{}_{}".format(each_key, each_direction) for each_key, each_direction in index_key)
+
+# .....................................................................................................................
+
 def check_collection_indexing(collection_ref, index_key_list):
     
-    ''' Helper function which can be used to check if a set of key-names are indexed already '''
+    '''
+    Helper function which can be used to check if a set of key-names are indexed already
+    Entries in the index key list can be single key-names or compound index listings (see get_index_name(...))
+    '''
     
     # Get current keys being indexed
     current_index_info_dict = collection_ref.index_information()
@@ -241,6 +260,13 @@ def check_collection_indexing(collection_ref, index_key_list):
     # Loop over all target keys and check if they're in the set of keys already indexed
     target_set_list = []
     for each_target_key in index_key_list:
+        
+        # Compound indexes must match exactly
+        if not isinstance(each_target_key, str):
+            target_is_set = (get_index_name(each_target_key) in current_index_info_dict)
+            target_set_list.append(target_is_set)
+            continue
+        
         target_is_set = any(each_target_key in each_key for each_key in current_index_info_dict.keys())
         target_set_list.append(target_is_set)
     
@@ -253,7 +279,10 @@ def check_collection_indexing(collection_ref, index_key_list):
 
 def set_collection_indexing(collection_ref, index_key_list):
     
-    ''' Helper function which can be used to set up indexing on a list of key-names '''
+    '''
+    Helper function which can be used to set up indexing on a list of key-names
+    Entries in the index key list can be single key-names or compound index listings (see get_index_name(...))
+    '''
     
     # Add each key, one-by-one to the collection indexing
     mongo_response_list = [collection_ref.create_index(each_target_key) for each_target_key in index_key_list]
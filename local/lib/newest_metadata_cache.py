@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:41:17 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import asyncio
+
+from time import monotonic
+
+from local.lib.environment import get_env_newest_metadata_cache_ttl_sec
+
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.async_db_helpers import get_newest_metadata
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+class Newest_Metadata_Cache:
+    
+    # .................................................................................................................
+    
+    def __init__(self, mongo_client, ttl_sec):
+        
+        '''
+        Class used to keep a copy of the newest metadata entry of a collection, for every camera
+        Used to answer (frequently polled) 'get newest' requests without the db
+        
+        Entries are loaded from the db on first use and are updated as new data is stored
+        (see update_newest_metadata(...)). Since data can also be written/removed by other processes,
+        entries are re-loaded from the db once they're older than the given ttl
+        '''
+        
+        # Store inputs
+        self._mongo_client = mongo_client
+        self._ttl_sec = ttl_sec
+        
+        # Storage for cached entries, keyed by (camera_select, collection_name, epoch_ms_field)
+        self._metadata_dict = {}
+        self._load_time_dict = {}
+        self._update_time_dict = {}
+        self._load_locks_dict = {}
+    
+    # .................................................................................................................
+    
+    def __repr__(self):
+        num_cameras = len(set(each_key[0] for each_key in self._metadata_dict.keys()))
+        return "Newest metadata cache: {} entries across {} cameras".format(len(self._metadata_dict), num_cameras)
+    
+    # .................................................................................................................
+    
+    async def get_newest_metadata(self, camera_select, collection_name, epoch_ms_field = "_id"):
+        
+        '''
+        Cached equivalent of the get_newest_metadata(...) db helper
+        Returns:
+            no_newest_metadata, metadata_dict
+        '''
+        
+        # Use existing entry if it's recent enough
+        cache_key = (camera_select, collection_name, epoch_ms_field)
+        if self._is_fresh(cache_key):
+            metadata_dict = self._metadata_dict[cache_key]
+            return (metadata_dict is None), metadata_dict
+        
+        # Only allow one load per entry at a time, other requests wait for the result
+        load_lock = self._load_locks_dict.setdefault(cache_key, asyncio.Lock())
+        async with load_lock:
+            
+            # Only hit the db if another request didn't already load the entry while we were waiting
+            if not self._is_fresh(cache_key):
+                load_start_time = monotonic()
+                collection_ref = self._mongo_client[camera_select][collection_name]
+                _, db_metadata_dict = await get_newest_metadata(collection_ref, epoch_ms_field)
+                
+                # Store results for re-use, unless newer data was stored while the db was being queried
+                cached_metadata_dict = self._metadata_dict.get(cache_key, None)
+                updated_during_load = (self._update_time_dict.get(cache_key, -1) >= load_start_time)
+                keep_cached = updated_during_load and self._is_newer(cached_metadata_dict, db_metadata_dict,
+                                                                     epoch_ms_field)
+                if not keep_cached:
+                    self._metadata_dict[cache_key] = db_metadata_dict
+                self._load_time_dict[cache_key] = monotonic()
+            
+            metadata_dict = self._metadata_dict[cache_key]
+        
+        return (metadata_dict is None), metadata_dict
+    
+    # .................................................................................................................
+    
+    def update_newest_metadata(self, camera_select, collection_name, metadata_list, all_inserted = True):
+        
+        '''
+        Function used to update cached entries with newly stored metadata
+        Should only be called after the corresponding data has been stored in the db!
+        Entries that haven't been loaded yet are ignored (they'll be loaded from the db when needed)
+        If not all of the metadata was inserted (e.g. duplicates), we can't tell which entries were rejected,
+        so the cached entries are cleared instead (and re-loaded from the db when needed)
+        '''
+        
+        # Don't risk caching rejected data
+        if not all_inserted:
+            self.invalidate(camera_select, collection_name)
+            return
+        
+        # Update every loaded entry for the given camera & collection (there is one per sorting field)
+        for each_key in list(self._metadata_dict.keys()):
+            
+            # Skip entries for other cameras/collections
+            each_camera_select, each_collection_name, each_epoch_ms_field = each_key
+            if each_camera_select != camera_select or each_collection_name != collection_name:
+                continue
+            
+            # Replace the cached entry with the newest of the new entries, if it's newer
+            newest_metadata_dict = self._metadata_dict[each_key]
+            for each_metadata_dict in metadata_list:
+                if self._is_newer(each_metadata_dict, newest_metadata_dict, each_epoch_ms_field):
+                    newest_metadata_dict = each_metadata_dict
+            self._metadata_dict[each_key] = newest_metadata_dict
+            self._update_time_dict[each_key] = monotonic()
+        
+        return
+    
+    # .................................................................................................................
+    
+    def build_flush_listener(self, collection_name):
+        
+        ''' Helper used to create a write-behind flush listener, which updates entries for a given collection '''
+        
+        def flush_listener(camera_select, metadata_list):
+            return self.update_newest_metadata(camera_select, collection_name, metadata_list)
+        
+        return flush_listener
+    
+    # .................................................................................................................
+    
+    def invalidate(self, camera_select = None, collection_name = None):
+        
+        '''
+        Function used to clear cached entries, should be called whenever camera databases are dropped
+        or when the stored data isn't known exactly (e.g. after a partially failed insert)
+        If no camera is given, all entries are cleared.
+        If no collection name is given, all collections for the given camera are cleared
+        '''
+        
+        keys_to_remove = [each_key for each_key in self._metadata_dict.keys()
+                          if camera_select is None
+                          or (each_key[0] == camera_select and collection_name in (None, each_key[1]))]
+        for each_key in keys_to_remove:
+            self._metadata_dict.pop(each_key, None)
+            self._load_time_dict.pop(each_key, None)
+            self._update_time_dict.pop(each_key, None)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def _is_fresh(self, cache_key):
+        
+        ''' Helper used to check if a cached entry exists and is within the ttl '''
+        
+        load_time = self._load_time_dict.get(cache_key, None)
+        if load_time is None:
+            return False
+        
+        return ((monotonic() - load_time) < self._ttl_sec)
+    
+    # .................................................................................................................
+    
+    @staticmethod
+    def _is_newer(metadata_dict, compare_metadata_dict, epoch_ms_field):
+        
+        ''' Helper used to check if one metadata entry is newer than another (missing entries are never newer) '''
+        
+        # Handle missing entries/timing data
+        new_ems = None if metadata_dict is None else metadata_dict.get(epoch_ms_field, None)
+        if new_ems is None:
+            return False
+        if compare_metadata_dict is None:
+            return True
+        
+        return (new_ems > compare_metadata_dict.get(epoch_ms_field, new_ems))
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Global setup
+
+# Create (global!) newest-metadata cache, used to avoid repeated db lookups for frequently polled 'newest' data
+NEWEST_METADATA_CACHE = Newest_Metadata_Cache(MCLIENT, ttl_sec = get_env_newest_metadata_cache_ttl_sec())
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -160,6 +160,31 @@ def build_image_pathing(base_data_folder_path, camera_select, image_folder_type,
 
 # .....................................................................................................................
 
+def build_image_segment_pathing(base_data_folder_path, camera_select, image_folder_type, epoch_ms,
+                                create_folder_if_missing = False):
+    
+    '''
+    Function which generates local pathing to the (packed) image segment files holding the given timestamp
+    Segments hold all images for a single hour, which replaces the hour folder of the per-file layout
+    Returns:
+        segment_data_path, segment_index_path
+    '''
+    
+    # Figure out the folder pathing for the given timestamp
+    date_folder_name, hour_folder_name = epoch_ms_to_image_folder_names(epoch_ms)
+    date_folder_path = build_camera_data_path(base_data_folder_path, camera_select,
+                                              image_folder_type, date_folder_name)
+    segment_data_path = os.path.join(date_folder_path, "{}.seg".format(hour_folder_name))
+    segment_index_path = os.path.join(date_folder_path, "{}.idx".format(hour_folder_name))
+    
+    # Create the folder path if needed
+    if create_folder_if_missing:
+        os.makedirs(date_folder_path, exist_ok = True)
+    
+    return segment_data_path, segment_index_path
+
+# .....................................................................................................................
+
 def build_snapshot_image_pathing(base_data_folder_path, camera_select, epoch_ms, create_folder_if_missing = False):
     return build_image_pathing(base_data_folder_path, camera_select, "snapshots", epoch_ms, create_folder_if_missing)
 
@@ -172,7 +197,10 @@ def build_background_image_pathing(base_data_folder_path, camera_select, epoch_m
 
 def get_old_image_folders_list(base_data_folder_path, camera_select, image_folder_type, oldest_allowed_ems):
     
-    ''' Helper function which provides pathing to all image date folders (likely used for deletion!) '''
+    '''
+    Helper function which provides pathing to all image date folders (likely used for deletion!)
+    Hour entries may be folders (per-file layout) or segment files (packed layout), both are included
+    '''
     
     # Get list of all date folders for the provided camera & image type
     image_type_folder_path = build_camera_data_path(base_data_folder_path, camera_select, image_folder_type)
@@ -200,7 +228,8 @@ def get_old_image_folders_list(base_data_folder_path, camera_select, image_folde
             
             # Consider an hour folder 'too old' if the end of the hour is older than the oldest allowed time
             # (as opposed to using the start of the hour, since some files within may be new enough)
-            _, end_of_hour_ems = image_folder_names_to_epoch_ms(each_date_name, each_hour_name)
+            hour_name_only, _ = os.path.splitext(each_hour_name)
+            _, end_of_hour_ems = image_folder_names_to_epoch_ms(each_date_name, hour_name_only)
             if end_of_hour_ems < oldest_allowed_ems:
                 hour_folder_path = os.path.join(date_folder_path, each_hour_name)
                 old_image_folders_path.append(hour_folder_path)
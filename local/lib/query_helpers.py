@@ -218,6 +218,55 @@ def get_closest_metadata_after_target_ems(collection_ref, target_ems, epoch_ms_f
 
 # .....................................................................................................................
 
+def select_closest_metadata(target_ems, lower_metadata_dict, upper_metadata_dict, epoch_ms_field = "_id"):
+    
+    '''
+    Helper function which picks whichever of the given lower/upper bounding entries is closest to a target time
+    Either (or both) of the bounding entries can be None, if they're missing
+    If both entries are equally close, the upper entry is returned
+    
+    Outputs:
+        closest_entry_dict (dictionary or None)
+    '''
+    
+    # Handle missing values
+    if lower_metadata_dict is None:
+        return upper_metadata_dict
+    if upper_metadata_dict is None:
+        return lower_metadata_dict
+    
+    # Pick the closer of the two entries
+    lower_diff = (target_ems - lower_metadata_dict[epoch_ms_field])
+    upper_diff = (upper_metadata_dict[epoch_ms_field] - target_ems)
+    closest_entry_dict = lower_metadata_dict if (lower_diff < upper_diff) else upper_metadata_dict
+    
+    return closest_entry_dict
+
+# .....................................................................................................................
+
+def get_closest_metadata_by_target_ems(collection_ref, target_ems, epoch_ms_field = "_id"):
+    
+    '''
+    Helper function which finds the entry in a collection that is closest (in time) to a given epoch_ms time
+    Works by finding the closest entries before & after the target time, which are both single (indexed) lookups,
+    so the cost doesn't depend on the size of the collection
+    
+    Outputs:
+        lower_entry_dict, upper_entry_dict, closest_entry_dict (each is a dictionary or None if missing)
+    '''
+    
+    # Find bounding entries on either side of the target time
+    _, lower_metadata_dict = get_closest_metadata_before_target_ems(collection_ref, target_ems, epoch_ms_field)
+    _, upper_metadata_dict = get_closest_metadata_after_target_ems(collection_ref, target_ems, epoch_ms_field)
+    
+    # Pick the closer of the two entries
+    closest_metadata_dict = select_closest_metadata(target_ems, lower_metadata_dict, upper_metadata_dict,
+                                                    epoch_ms_field)
+    
+    return lower_metadata_dict, upper_metadata_dict, closest_metadata_dict
+
+# .....................................................................................................................
+
 def get_many_metadata_since_target_ems(collection_ref, target_ems, epoch_ms_field = "_id",
                                        ascending_order = True):
     
@@ -269,6 +318,28 @@ def get_many_metadata_in_id_range(collection_ref, start_id, end_id, ascending_or
 
 # .....................................................................................................................
 
+def get_many_metadata_by_ids(collection_ref, ids_list, id_field = "_id", ascending_order = True, batch_size = None):
+    
+    '''
+    Function used to get metadata for a list of ids, using a single query (instead of one query per id)
+    Returns a cursor, so results can be retrieved in chunks. The 'batch_size' sets how many entries
+    are retrieved from the db per round trip (uses the pymongo default if None)
+    '''
+    
+    # Build query
+    query_dict = {id_field: {"$in": list(ids_list)}}
+    projection_dict = None
+    
+    # Request data from the db
+    sort_order = ASCENDING if ascending_order else DESCENDING
+    query_result = collection_ref.find(query_dict, projection_dict).sort(id_field, sort_order)
+    if batch_size is not None:
+        query_result = query_result.batch_size(batch_size)
+    
+    return query_result
+
+# .....................................................................................................................
+
 def get_epoch_ms_list_in_time_range(collection_ref, start_ems, end_ems, epoch_ms_field = "_id",
                                     ascending_order = True):
     
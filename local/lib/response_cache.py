@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:21:37 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+from time import time
+from collections import OrderedDict
+from multiprocessing import Value
+
+from local.lib.environment import get_env_gzip_response_cache_max_mb, get_env_gzip_response_cache_horizon_sec
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+class Gzip_Response_Cache:
+    
+    # .................................................................................................................
+    
+    def __init__(self, max_size_bytes, horizon_sec, deletion_counter):
+        
+        '''
+        Class used to hold already-gzipped response bodies for (immutable) historical queries
+        Used to serve repeated requests (e.g. re-opening a report for yesterday) without querying
+        the db or re-compressing the response
+        
+        Only requests ending before the 'horizon' (relative to the current time) are cached, since
+        newer data may still be arriving. Entries are evicted (least-recently-used first) once the total
+        size of all cached bodies exceeds the max size. Since old data can be removed by other processes
+        (i.e. autodelete), a shared deletion counter is checked on every access & the cache is
+        cleared whenever it changes. Late-arriving (historical) data must be reported using
+        the 'invalidate_for_new_data' function, so that affected responses are cleared
+        '''
+        
+        # Store inputs
+        self._max_size_bytes = max_size_bytes
+        self._horizon_ms = int(round(1000 * horizon_sec))
+        self._deletion_counter = deletion_counter
+        
+        # Storage for cached bodies, keyed by (camera, request path, end ems) & kept in least-to-most recently used
+        # order, along with the newest (end) time cached for each camera, so new data can usually skip invalidation
+        self._entries_dict = OrderedDict()
+        self._total_bytes = 0
+        self._newest_end_ems_dict = {}
+        self._last_deletion_count = deletion_counter.value
+    
+    # .................................................................................................................
+    
+    def __repr__(self):
+        return "Gzip response cache: {} entries ({:.1f} MB)".format(len(self._entries_dict), self._total_bytes / 1E6)
+    
+    # .................................................................................................................
+    
+    @property
+    def max_entry_bytes(self):
+        
+        ''' Largest (gzipped) body that will be stored, so that no single response can take over the cache '''
+        
+        return max(0, self._max_size_bytes // 4)
+    
+    # .................................................................................................................
+    
+    def get_cache_key(self, request, camera_select, end_ems):
+        
+        '''
+        Function used to decide whether a request can be served from (or stored in) the cache
+        Returns None if the request can't be cached (e.g. the time range isn't old enough), otherwise
+        returns a key to use for storage/retrieval
+        '''
+        
+        # Don't cache anything if disabled or if the client can't accept gzipped data
+        if self._max_size_bytes <= 0:
+            return None
+        if "gzip" not in request.headers.get("Accept-Encoding", ""):
+            return None
+        
+        # Don't cache data which may still change
+        horizon_ems = int(1000 * time()) - self._horizon_ms
+        if end_ems >= horizon_ems:
+            return None
+        
+        return (camera_select, request.url.path, end_ems)
+    
+    # .................................................................................................................
+    
+    def get(self, cache_key):
+        
+        ''' Returns the cached gzip body for the given key, or None if the key isn't in the cache '''
+        
+        if cache_key is None:
+            return None
+        
+        self._check_deletions()
+        gzip_bytes = self._entries_dict.get(cache_key, None)
+        if gzip_bytes is not None:
+            self._entries_dict.move_to_end(cache_key)
+        
+        return gzip_bytes
+    
+    # .................................................................................................................
+    
+    def store(self, cache_key, gzip_bytes):
+        
+        ''' Function used to add a gzipped body to the cache, evicting older entries to make space if needed '''
+        
+        # Don't store anything that would take up too much of the cache by itself
+        num_bytes = len(gzip_bytes)
+        if cache_key is None or num_bytes > self.max_entry_bytes:
+            return
+        
+        # Add (or replace) the entry & evict least-recently used entries until we're back within the size limit
+        self._check_deletions()
+        self._remove_entry(cache_key)
+        self._entries_dict[cache_key] = gzip_bytes
+        self._total_bytes += num_bytes
+        camera_select, _, end_ems = cache_key
+        self._newest_end_ems_dict[camera_select] = max(end_ems, self._newest_end_ems_dict.get(camera_select, end_ems))
+        while self._total_bytes > self._max_size_bytes:
+            oldest_key = next(iter(self._entries_dict))
+            self._remove_entry(oldest_key)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def invalidate(self, camera_select = None):
+        
+        '''
+        Function used to clear cached responses, should be called whenever camera data is deleted
+        If no camera is given, all entries are cleared
+        '''
+        
+        if camera_select is None:
+            self._entries_dict.clear()
+            self._total_bytes = 0
+            self._newest_end_ems_dict.clear()
+            return
+        
+        self.invalidate_after(camera_select, None)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def invalidate_after(self, camera_select, changed_ems):
+        
+        '''
+        Function used to clear cached responses for a camera whose time range ends at or after a given time,
+        which are the only responses that can be affected by data changing at that time
+        If the changed time is None, all entries for the camera are cleared
+        '''
+        
+        # Skip the (full) search if nothing that is cached for the camera could be affected
+        newest_end_ems = self._newest_end_ems_dict.get(camera_select, None)
+        if newest_end_ems is None:
+            return
+        if changed_ems is not None and changed_ems > newest_end_ems:
+            return
+        
+        # Remove all affected entries
+        camera_keys_list = [each_key for each_key in self._entries_dict
+                            if each_key[0] == camera_select and (changed_ems is None or each_key[2] >= changed_ems)]
+        for each_key in camera_keys_list:
+            self._remove_entry(each_key)
+        
+        # Clear the newest time record if everything was removed for the camera
+        # -> Otherwise it's kept as-is, since it's only ever used as an upper bound
+        if changed_ems is None:
+            self._newest_end_ems_dict.pop(camera_select, None)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def invalidate_for_new_data(self, camera_select, data_list):
+        
+        '''
+        Function used to clear cached responses that may be affected by newly stored data
+        Should be called whenever data is written, since late-arriving data may belong to already-cached
+        (historical) time ranges. Newly arriving 'live' data is newer than anything cached, so is fast to check
+        '''
+        
+        # Don't bother invalidating anything if there's no data
+        if not data_list:
+            return
+        
+        # Find the oldest time in the new data. If any entry has no known timing, the whole camera is affected
+        oldest_ems = None
+        for each_entry in data_list:
+            entry_ems = get_data_epoch_ms(each_entry)
+            if entry_ems is None:
+                oldest_ems = None
+                break
+            oldest_ems = entry_ems if oldest_ems is None else min(entry_ems, oldest_ems)
+        
+        self.invalidate_after(camera_select, oldest_ems)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def _check_deletions(self):
+        
+        ''' Helper used to clear the cache if data has been deleted (possibly by another process) since last check '''
+        
+        deletion_count = self._deletion_counter.value
+        if deletion_count != self._last_deletion_count:
+            self._last_deletion_count = deletion_count
+            self.invalidate()
+        
+        return
+    
+    # .................................................................................................................
+    
+    def _remove_entry(self, cache_key):
+        
+        ''' Helper used to remove a single entry, while keeping track of the total cache size '''
+        
+        gzip_bytes = self._entries_dict.pop(cache_key, None)
+        if gzip_bytes is not None:
+            self._total_bytes -= len(gzip_bytes)
+        
+        return
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def get_data_epoch_ms(data_entry):
+    
+    ''' Helper used to get the (earliest) time associated with a data entry, or None if it has no known timing '''
+    
+    # Data may be given as metadata dictionaries or as plain epoch ms values (e.g. for image data)
+    if isinstance(data_entry, int):
+        return data_entry
+    
+    try:
+        for each_field in DATA_TIME_FIELDS:
+            if each_field in data_entry:
+                return int(data_entry[each_field])
+    except (TypeError, ValueError):
+        pass
+    
+    return None
+
+# .....................................................................................................................
+
+def signal_data_deletion():
+    
+    '''
+    Function used to indicate that (historical) data has been deleted, which clears the response cache
+    Safe to call from the (parallel) autodelete process, since the counter is shared across processes
+    '''
+    
+    with DATA_DELETION_COUNTER.get_lock():
+        DATA_DELETION_COUNTER.value += 1
+    
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Global setup
+
+# Hard-code the fields used to find the (earliest) time of stored data, in order of preference
+DATA_TIME_FIELDS = ("first_epoch_ms", "epoch_ms")
+
+# Create (global!) counter used to signal data deletion across processes. Must be created before forking!
+DATA_DELETION_COUNTER = Value("L", 0)
+
+# Create (global!) cache of gzipped responses for historical queries
+GZIP_RESPONSE_CACHE = Gzip_Response_Cache(max_size_bytes = int(1E6 * get_env_gzip_response_cache_max_mb()),
+                                          horizon_sec = get_env_gzip_response_cache_horizon_sec(),
+                                          deletion_counter = DATA_DELETION_COUNTER)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -50,12 +50,318 @@ find_path_to_local()
 #%% Imports
 
 import gzip
+import json
+import zlib
 import ujson
 
 from pymongo.errors import ServerSelectionTimeoutError, AutoReconnect
 
-from starlette.responses import JSONResponse, FileResponse
+from local.lib.environment import get_env_json_serializer
+from local.lib.async_db_helpers import run_in_db_executor, read_cursor_chunk
+from local.lib.response_cache import GZIP_RESPONSE_CACHE
+from local.lib.image_store import IMAGE_STORE
+
+# Optional (fastest) json library, only used for responses if it's installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, JSONResponse, FileResponse, StreamingResponse
 from starlette.status import HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_405_METHOD_NOT_ALLOWED
+from starlette.status import HTTP_304_NOT_MODIFIED
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+class Fast_JSON_Response(JSONResponse):
+    
+    ''' Drop-in replacement for the starlette JSONResponse, which uses the selected (faster) json serializer '''
+    
+    # .................................................................................................................
+    
+    def render(self, content):
+        return encode_json_bytes(content)
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+class Int_List_JSON_Response(JSONResponse):
+    
+    ''' JSON response for (potentially very long) lists of integers, e.g. epoch ms values or ids '''
+    
+    # .................................................................................................................
+    
+    def render(self, content):
+        return encode_int_list_json_bytes(content)
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+class Streaming_JSON_Response(StreamingResponse):
+    
+    # .................................................................................................................
+    
+    def __init__(self, cursor_ref, key_field = None, initial_items_list = None, chunk_size = 500,
+                 gzip_cache_key = None, status_code = 200, headers = None):
+        
+        '''
+        Response used to send the results of a (pymongo) cursor as json, without holding every result in memory
+        Results are read from the cursor in chunks (in the db executor) and are sent out as they're encoded,
+        so the client starts receiving data right away. Works with gzip middleware (as a streaming response)
+        
+        If a key_field is given, the results are sent as an object, keyed by the given field:
+            {"key1": {...}, "key2": {...}, etc.}
+        Otherwise results are sent as an array:
+            [{...}, {...}, etc.]
+        
+        An initial list of items can be given, which are sent ahead of the cursor results
+        Note: any errors while reading from the cursor (e.g. lost db connection) will cut off the response!
+        
+        If a gzip cache key is given (see the gzip response cache), the response is gzipped directly
+        (instead of by the gzip middleware) and the gzipped body is stored in the cache once complete
+        '''
+        
+        # Store inputs
+        self._cursor_ref = cursor_ref
+        self._key_field = key_field
+        self._initial_items_list = [] if initial_items_list is None else initial_items_list
+        self._chunk_size = chunk_size
+        self._gzip_cache_key = gzip_cache_key
+        
+        super().__init__(self._iter_json_chunks(), status_code, headers, media_type = "application/json")
+    
+    # .................................................................................................................
+    
+    async def __call__(self, scope, receive, send):
+        
+        # Compress the response ourselves if it's being cached (the gzip middleware will leave it alone)
+        accepts_gzip = ("gzip" in Headers(scope = scope).get("Accept-Encoding", ""))
+        if self._gzip_cache_key is not None and accepts_gzip:
+            self.headers["Content-Encoding"] = "gzip"
+            self.headers.add_vary_header("Accept-Encoding")
+            self.body_iterator = self._iter_gzip_chunks(self.body_iterator)
+        
+        await super().__call__(scope, receive, send)
+    
+    # .................................................................................................................
+    
+    async def _iter_json_chunks(self):
+        
+        ''' Async generator which produces (encoded) json chunks, one per chunk of results read from the cursor '''
+        
+        # Pick opening/closing characters & item encoding based on output format
+        is_object = (self._key_field is not None)
+        open_bytes, close_bytes = (b"{", b"}") if is_object else (b"[", b"]")
+        encode_item = self._encode_keyed_item if is_object else encode_json_bytes
+        
+        try:
+            # Send any initial items along with the opening character
+            encoded_items_list = [encode_item(each_item) for each_item in self._initial_items_list]
+            need_separator = (len(encoded_items_list) > 0)
+            yield b"".join((open_bytes, b",".join(encoded_items_list)))
+            
+            # Send each chunk of results from the cursor, until the cursor is exhausted
+            while True:
+                results_chunk = await read_cursor_chunk(self._cursor_ref, self._chunk_size)
+                if not results_chunk:
+                    break
+                encoded_chunk_bytes = b",".join(encode_item(each_item) for each_item in results_chunk)
+                yield b"".join((b"," if need_separator else b"", encoded_chunk_bytes))
+                need_separator = True
+            
+            yield close_bytes
+        
+        finally:
+            # Release the cursor resources (on the db side), even if the client disconnected part way through
+            await run_in_db_executor(self._cursor_ref.close)
+        
+        return
+    
+    # .................................................................................................................
+    
+    async def _iter_gzip_chunks(self, json_chunks_iter):
+        
+        ''' Async generator which gzips json chunks as they're sent & stores the full gzipped body when finished '''
+        
+        # Set up gzip compression (wbits of 16 + 15 gives a gzip container, rather than raw zlib data)
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+        max_store_bytes = GZIP_RESPONSE_CACHE.max_entry_bytes
+        gzip_chunks_list = []
+        num_gzip_bytes = 0
+        
+        # Compress chunks as they're generated, keeping a copy for storage (unless the result is too large)
+        async for each_json_chunk in json_chunks_iter:
+            gzip_chunk = compressor.compress(each_json_chunk)
+            if not gzip_chunk:
+                continue
+            num_gzip_bytes += len(gzip_chunk)
+            if num_gzip_bytes <= max_store_bytes:
+                gzip_chunks_list.append(gzip_chunk)
+            yield gzip_chunk
+        
+        # Finish compression & store the full body for re-use
+        final_gzip_chunk = compressor.flush()
+        num_gzip_bytes += len(final_gzip_chunk)
+        yield final_gzip_chunk
+        if num_gzip_bytes <= max_store_bytes:
+            gzip_chunks_list.append(final_gzip_chunk)
+            GZIP_RESPONSE_CACHE.store(self._gzip_cache_key, b"".join(gzip_chunks_list))
+        
+        return
+    
+    # .................................................................................................................
+    
+    def _encode_keyed_item(self, item):
+        
+        ''' Helper used to encode a single item as a "key":value pair (object keys must be strings in json) '''
+        
+        return b":".join((encode_json_bytes(str(item[self._key_field])), encode_json_bytes(item)))
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+class Image_File_Response(FileResponse):
+    
+    # .................................................................................................................
+    
+    # Read files in larger chunks than the starlette default (4KB), since images are typically 10's of KB or more
+    chunk_size = 65536
+    
+    # .................................................................................................................
+    
+    async def __call__(self, scope, receive, send):
+        
+        '''
+        File response which hands the file over to the server for a zero-copy (sendfile) transfer if possible
+        This requires server support for the asgi 'http.response.zerocopysend' extension (not provided by uvicorn),
+        otherwise the file is sent the same way as a regular (starlette) file response
+        '''
+        
+        # Use regular (chunked) file reading if the server can't send files directly
+        supports_zerocopy = ("http.response.zerocopysend" in scope.get("extensions", {}))
+        if not supports_zerocopy or self.send_header_only:
+            return await super().__call__(scope, receive, send)
+        
+        # Open the file in a separate thread, so slow disk access doesn't block the event loop
+        in_file = await run_in_threadpool(open, self.path, "rb")
+        try:
+            
+            # Fill in size/timing headers from the opened file, so they're guaranteed to match what we send
+            file_stat = await run_in_threadpool(os.fstat, in_file.fileno())
+            self.set_stat_headers(file_stat)
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.zerocopysend", "file": in_file, "more_body": False})
+            
+        finally:
+            in_file.close()
+        
+        if self.background is not None:
+            await self.background()
+        
+        return
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+class Stored_Image_Response(Response):
+    
+    # .................................................................................................................
+    
+    media_type = "image/jpeg"
+    
+    # .................................................................................................................
+    
+    def __init__(self, camera_select, image_type, epoch_ms, status_code = 200, headers = None):
+        
+        '''
+        Response used to send image data which isn't stored as a separate file (e.g. packed images)
+        Image data is loaded from the image store (in a separate thread) when the response is sent
+        '''
+        
+        # Store image info for loading when the response is sent
+        self._image_args = (camera_select, image_type, epoch_ms)
+        
+        super().__init__(None, status_code, headers)
+    
+    # .................................................................................................................
+    
+    async def __call__(self, scope, receive, send):
+        
+        # Load image data & respond with 'not found' if the image is gone (e.g. deleted since it was requested)
+        image_data = await run_in_threadpool(IMAGE_STORE.get, *self._image_args)
+        if image_data is None:
+            self.status_code = HTTP_404_NOT_FOUND
+            image_data = b""
+        
+        self.body = image_data
+        self.headers["content-length"] = str(len(image_data))
+        
+        return await super().__call__(scope, receive, send)
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+class Precompressed_GZip_Middleware(GZipMiddleware):
+    
+    '''
+    Replacement for the starlette gzip middleware, which doesn't re-compress responses that are already encoded
+    Image responses are also left as-is, since image formats are already compressed
+    '''
+    
+    # .................................................................................................................
+    
+    async def __call__(self, scope, receive, send):
+        
+        if scope["type"] == "http":
+            headers = Headers(scope = scope)
+            if "gzip" in headers.get("Accept-Encoding", ""):
+                responder = Precompressed_GZip_Responder(self.app, self.minimum_size)
+                await responder(scope, receive, send)
+                return
+        
+        await self.app(scope, receive, send)
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+class Precompressed_GZip_Responder(GZipResponder):
+    
+    ''' Gzip responder which passes responses through unchanged if they're already encoded (or are images) '''
+    
+    # .................................................................................................................
+    
+    def __init__(self, app, minimum_size):
+        super().__init__(app, minimum_size)
+        self._is_precompressed = False
+    
+    # .................................................................................................................
+    
+    async def send_with_gzip(self, message):
+        
+        if message["type"] == "http.response.start":
+            headers = Headers(raw = message["headers"])
+            is_image = headers.get("content-type", "").startswith("image/")
+            self._is_precompressed = (is_image or "content-encoding" in headers)
+        
+        if self._is_precompressed:
+            await self.send(message)
+            return
+        
+        await super().send_with_gzip(message)
+    
+    # .................................................................................................................
+    # .................................................................................................................
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -71,7 +377,7 @@ def no_data_response(error_message, additional_response_dict = None):
     if additional_response_dict is not None:
         response_dict.update(additional_response_dict)
     
-    return JSONResponse({"error": error_message}, status_code = HTTP_404_NOT_FOUND)
+    return Fast_JSON_Response({"error": error_message}, status_code = HTTP_404_NOT_FOUND)
 
 # .....................................................................................................................
 
@@ -83,7 +389,7 @@ def bad_request_response(error_message, additional_response_dict = None):
     if additional_response_dict is not None:
         response_dict.update(additional_response_dict)
     
-    return JSONResponse({"error": error_message}, status_code = HTTP_400_BAD_REQUEST)
+    return Fast_JSON_Response({"error": error_message}, status_code = HTTP_400_BAD_REQUEST)
 
 # .....................................................................................................................
 
@@ -95,7 +401,16 @@ def not_allowed_response(error_message, additional_response_dict = None):
     if additional_response_dict is not None:
         response_dict.update(additional_response_dict)
         
-    return JSONResponse(response_dict, status_code = HTTP_405_METHOD_NOT_ALLOWED)
+    return Fast_JSON_Response(response_dict, status_code = HTTP_405_METHOD_NOT_ALLOWED)
+
+# .....................................................................................................................
+
+def gzip_cached_response(gzip_bytes):
+    
+    ''' Helper function which provides an (already gzipped) json response, from the gzip response cache '''
+    
+    return Response(gzip_bytes, media_type = "application/json",
+                    headers = {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
 
 # .....................................................................................................................
 
@@ -107,6 +422,42 @@ def cors_files_response(file_load_path):
 
 # .....................................................................................................................
 
+def cors_image_response(request, camera_select, image_type, image_ems, is_immutable = True):
+    
+    '''
+    Helper function which provides an image file response with headers for CORs-compatibility & browser caching
+    Images are given a (strong) ETag based on the camera & image timing, which allows browsers to
+    re-validate their cached copy of an image (by sending an If-None-Match header) and receive a
+    'not modified' response, instead of re-downloading the image
+    
+    Images requested by timing never change once saved, so they're marked as immutable (cached long-term)
+    For requests that may point at different images over time (e.g. the newest image),
+    'is_immutable' should be set to False, so that browsers always re-validate
+    '''
+    
+    # Build caching headers
+    etag_str = '"{}-{}"'.format(camera_select, image_ems)
+    cache_control_str = "public, max-age=31536000, immutable" if is_immutable else "no-cache"
+    response_headers = {"Access-Control-Allow-Origin": "*", "ETag": etag_str, "Cache-Control": cache_control_str}
+    
+    # Skip sending the image if the client already has it
+    if check_etag_match(request, etag_str):
+        return Response(status_code = HTTP_304_NOT_MODIFIED, headers = response_headers)
+    
+    # Send recently saved images straight from memory, if possible
+    image_data = IMAGE_STORE.get_cached(camera_select, image_type, image_ems)
+    if image_data is not None:
+        return Response(image_data, media_type = "image/jpeg", headers = response_headers)
+    
+    # Send images stored as separate files directly from disk, otherwise load the data from the image store
+    image_file_path = IMAGE_STORE.get_file_path(camera_select, image_type, image_ems)
+    if image_file_path is not None:
+        return Image_File_Response(image_file_path, headers = response_headers)
+    
+    return Stored_Image_Response(camera_select, image_type, image_ems, headers = response_headers)
+
+# .....................................................................................................................
+
 def post_success_response(success_message = True, additional_response_dict = None):
     
     ''' Helper function for post requests, when data is successfully added to the db '''
@@ -115,7 +466,73 @@ def post_success_response(success_message = True, additional_response_dict = Non
     if additional_response_dict is not None:
         response_dict.update(additional_response_dict)
         
-    return JSONResponse(response_dict, status_code = HTTP_201_CREATED)
+    return Fast_JSON_Response(response_dict, status_code = HTTP_201_CREATED)
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Serializer functions
+
+# .....................................................................................................................
+
+def encode_json_bytes(data):
+    
+    ''' Function used to encode data as json (bytes) for responses, using the selected serializer '''
+    
+    return JSON_ENCODE_FUNC(data)
+
+# .....................................................................................................................
+
+def encode_int_list_json_bytes(int_list):
+    
+    '''
+    Function used to encode a list (or array) of integers as json (bytes)
+    This avoids the generic (type-checking) encoding path, which matters for very long lists (e.g. epoch ms values)
+    '''
+    
+    if JSON_SERIALIZER_NAME == "orjson":
+        return orjson.dumps(int_list if isinstance(int_list, list) else list(int_list))
+    
+    return b"".join((b"[", ",".join(map(str, int_list)).encode("ascii"), b"]"))
+
+# .....................................................................................................................
+
+def select_json_serializer(serializer_name = "auto"):
+    
+    '''
+    Function used to pick the json library used to encode responses
+    Options are: "orjson", "ujson", "json" (standard library) or "auto", which picks the fastest option that is
+    both part of the requirements & encodes floats without rounding (i.e. ujson, if new enough, otherwise json)
+    All options produce equivalent (compact, utf-8) json output, matching the starlette JSONResponse
+    Returns:
+        selected_serializer_name, encode_func
+    '''
+    
+    # Only use ujson automatically if it encodes floats exactly (older versions round floats by default)
+    serializer_name = serializer_name.lower()
+    if serializer_name == "auto":
+        test_float = (0.1 + 0.2)
+        ujson_is_exact = (ujson.loads(ujson.dumps(test_float)) == test_float)
+        serializer_name = "ujson" if ujson_is_exact else "json"
+    
+    # Fall back to the next-best option if orjson (an optional extra) isn't installed
+    if serializer_name == "orjson" and orjson is None:
+        serializer_name = "ujson"
+    
+    # Non-string keys (e.g. integer object ids) must be enabled explicitly for orjson
+    if serializer_name == "orjson":
+        orjson_option = orjson.OPT_NON_STR_KEYS
+        return serializer_name, lambda data: orjson.dumps(data, option = orjson_option)
+    
+    if serializer_name == "ujson":
+        ujson_kwargs = {"ensure_ascii": False, "escape_forward_slashes": False}
+        return serializer_name, lambda data: ujson.dumps(data, **ujson_kwargs).encode("utf-8")
+    
+    # Use the same settings as the starlette JSONResponse
+    json_kwargs = {"ensure_ascii": False, "allow_nan": False, "indent": None, "separators": (",", ":")}
+    return "json", lambda data: json.dumps(data, **json_kwargs).encode("utf-8")
 
 # .....................................................................................................................
 # .....................................................................................................................
@@ -131,6 +548,21 @@ def calculate_time_taken_ms(time_start, time_end):
 
 # .....................................................................................................................
 
+def check_etag_match(request, etag_str):
+    
+    ''' Helper used to check if a request If-None-Match header matches a given ETag (using weak comparison) '''
+    
+    if_none_match_str = request.headers.get("If-None-Match", "")
+    if not if_none_match_str:
+        return False
+    
+    client_etags_list = [each_etag.strip() for each_etag in if_none_match_str.split(",")]
+    client_etags_list = [each_etag[2:] if each_etag.startswith("W/") else each_etag for each_etag in client_etags_list]
+    
+    return ("*" in client_etags_list) or (etag_str in client_etags_list)
+
+# .....................................................................................................................
+
 def parse_ujson_response(ujson_response_object):
     
     # Check if the response is valid
@@ -195,6 +627,13 @@ def get_exception_handlers():
 # .....................................................................................................................
 
 
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Global setup
+
+# Pick the json library used for encoding responses
+JSON_SERIALIZER_NAME, JSON_ENCODE_FUNC = select_json_serializer(get_env_json_serializer())
+
+
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Demo
 
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:41:09 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+from pymongo import ASCENDING, ReplaceOne, DeleteMany
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Bucketing functions
+
+# .....................................................................................................................
+
+def get_bucket_start_ems(epoch_ms, bucket_size_ms = None):
+    
+    ''' Helper used to get the (starting) epoch ms value of the bucket that a given time falls into '''
+    
+    bucket_size_ms = TIME_BUCKET_SIZE_MS if bucket_size_ms is None else bucket_size_ms
+    
+    return (int(epoch_ms) // bucket_size_ms) * bucket_size_ms
+
+# .....................................................................................................................
+
+def build_time_bucket_entries(metadata_list, id_field, first_ems_field, final_ems_field, bucket_size_ms = None):
+    
+    '''
+    Function which converts (interval) metadata into time bucket entries, for storage in a side collection
+    Each metadata entry generates one bucket entry for every time bucket that its interval touches
+    Entries that are missing the required fields are skipped
+    Returns:
+        bucket_entries_list
+    '''
+    
+    bucket_size_ms = TIME_BUCKET_SIZE_MS if bucket_size_ms is None else bucket_size_ms
+    
+    bucket_entries_list = []
+    for each_metadata_dict in metadata_list:
+        
+        # Skip bad entries, since we don't want to interfere with regular metadata posting
+        try:
+            each_id = each_metadata_dict[id_field]
+            each_first_ems = int(each_metadata_dict[first_ems_field])
+            each_final_ems = int(each_metadata_dict[final_ems_field])
+        except (KeyError, TypeError, ValueError):
+            continue
+        
+        # Add an entry to every bucket touched by the interval
+        first_bucket_ems = get_bucket_start_ems(each_first_ems, bucket_size_ms)
+        final_bucket_ems = get_bucket_start_ems(each_final_ems, bucket_size_ms)
+        for each_bucket_ems in range(first_bucket_ems, 1 + final_bucket_ems, bucket_size_ms):
+            bucket_entries_list.append({BUCKET_EMS_FIELD: each_bucket_ems,
+                                        FIRST_EPOCH_MS_FIELD: each_first_ems,
+                                        FINAL_EPOCH_MS_FIELD: each_final_ems,
+                                        DATA_ID_FIELD: each_id})
+    
+    return bucket_entries_list
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Database functions
+
+# .....................................................................................................................
+
+def post_time_bucket_entries(bucket_collection_ref, bucket_entries_list):
+    
+    '''
+    Function which writes time bucket entries into the db
+    Entries are upserted (using the indexed fields), so re-posting the same metadata doesn't create duplicates
+    Any existing entries for the same data ids but with different timing (e.g. from an older version of the
+    data) are removed, so that lookups never use out-dated timing
+    Note: this is a blocking call!
+    Returns:
+        num_upserted
+    '''
+    
+    # Bail if there's nothing to write
+    if not bucket_entries_list:
+        return 0
+    
+    # Remove stale entries. These don't match the new timing, so they can't conflict with the upserts below
+    timing_by_id_dict = {}
+    for each_entry in bucket_entries_list:
+        timing_by_id_dict[each_entry[DATA_ID_FIELD]] = (each_entry[FIRST_EPOCH_MS_FIELD],
+                                                        each_entry[FINAL_EPOCH_MS_FIELD])
+    operations_list = [DeleteMany({DATA_ID_FIELD: each_id,
+                                   "$or": [{FIRST_EPOCH_MS_FIELD: {"$ne": each_first_ems}},
+                                           {FINAL_EPOCH_MS_FIELD: {"$ne": each_final_ems}}]})
+                       for each_id, (each_first_ems, each_final_ems) in timing_by_id_dict.items()]
+    
+    # Each entry is used as both the filter & the replacement, which makes the write idempotent
+    operations_list += [ReplaceOne(each_entry, each_entry, upsert = True) for each_entry in bucket_entries_list]
+    pymongo_BulkWriteResult = bucket_collection_ref.bulk_write(operations_list, ordered = False)
+    
+    return pymongo_BulkWriteResult.upserted_count
+
+# .....................................................................................................................
+
+def get_bucketed_since_ems(bucket_collection_ref):
+    
+    '''
+    Function used to get the 'bucketed since' watermark of a bucket collection
+    All data ending after the watermark time is guaranteed to have bucket entries, while data ending at or
+    before the watermark may not (i.e. data stored before bucketing was in use), and must be looked up directly
+    Note: this is a blocking call!
+    Returns:
+        bucketed_since_ems (or None if bucketing was never started, in which case no data can be trusted)
+    '''
+    
+    watermark_entry = bucket_collection_ref.find_one({"_id": WATERMARK_ENTRY_ID})
+    if watermark_entry is None:
+        return None
+    
+    return watermark_entry[BUCKETED_SINCE_FIELD]
+
+# .....................................................................................................................
+
+def init_bucketed_since_ems(data_collection_ref, bucket_collection_ref, final_ems_field):
+    
+    '''
+    Function used to set the 'bucketed since' watermark of a bucket collection, if it isn't already set
+    Should be called whenever bucket entries are written, so that the watermark exists before bucketed
+    lookups are used. The watermark is the newest end time of all existing data, since anything stored
+    after bucketing is in use will be bucketed, while anything already stored may not be
+    Note: this is a blocking call!
+    '''
+    
+    # Don't touch existing watermarks
+    if get_bucketed_since_ems(bucket_collection_ref) is not None:
+        return
+    
+    # Find the newest end time of all existing data (or use an 'everything is bucketed' value if there's no data)
+    newest_entry = data_collection_ref.find_one({}, {final_ems_field: 1}, sort = [(final_ems_field, -1)])
+    bucketed_since_ems = -1 if newest_entry is None else newest_entry[final_ems_field]
+    
+    # Only write the watermark if no one else did in the meantime
+    bucket_collection_ref.update_one({"_id": WATERMARK_ENTRY_ID},
+                                     {"$setOnInsert": {BUCKETED_SINCE_FIELD: bucketed_since_ems}},
+                                     upsert = True)
+    
+    return
+
+# .....................................................................................................................
+
+def set_bucketed_since_ems(bucket_collection_ref, bucketed_since_ems):
+    
+    ''' Function used to overwrite the 'bucketed since' watermark (e.g. after re-building all bucket entries) '''
+    
+    bucket_collection_ref.update_one({"_id": WATERMARK_ENTRY_ID},
+                                     {"$set": {BUCKETED_SINCE_FIELD: bucketed_since_ems}},
+                                     upsert = True)
+    
+    return
+
+# .....................................................................................................................
+
+def get_time_bucket_filter(start_ems, end_ems, ended_after_ems = None, bucket_size_ms = None):
+    
+    '''
+    Helper used to build the query used to find bucket entries whose intervals overlap a given time range
+    If 'ended_after_ems' is given, only entries ending after that time are included
+    '''
+    
+    # Figure out which buckets we need to look at
+    start_bucket_ems = get_bucket_start_ems(start_ems, bucket_size_ms)
+    end_bucket_ems = get_bucket_start_ems(end_ems, bucket_size_ms)
+    
+    # Build query, which can be fully 'covered' by the bucket index
+    lowest_final_ems = start_ems if ended_after_ems is None else max(start_ems, ended_after_ems)
+    filter_dict = {BUCKET_EMS_FIELD: {"$gte": start_bucket_ems, "$lte": end_bucket_ems},
+                   FIRST_EPOCH_MS_FIELD: {"$lt": end_ems},
+                   FINAL_EPOCH_MS_FIELD: {"$gt": lowest_final_ems}}
+    
+    return filter_dict
+
+# .....................................................................................................................
+
+def find_ids_by_time_range_from_buckets(bucket_collection_ref, start_ems, end_ems, *,
+                                        ended_after_ems = None, ascending_order = True, bucket_size_ms = None):
+    
+    '''
+    Function used to get a (sorted) list of ids whose intervals overlap a given time range, using time buckets
+    Only the entries in the buckets covering the time range are examined, so the cost is proportional to the
+    number of buckets + results, rather than the total number of documents that start/end before/after the range
+    Note: this is a blocking call!
+    '''
+    
+    # Build query, which can be fully 'covered' by the bucket index
+    filter_dict = get_time_bucket_filter(start_ems, end_ems, ended_after_ems, bucket_size_ms)
+    projection_dict = {DATA_ID_FIELD: 1, "_id": 0}
+    
+    # Request data from the db, removing duplicates from intervals that span multiple buckets
+    query_result = bucket_collection_ref.find(filter_dict, projection_dict)
+    unique_ids_set = {each_entry[DATA_ID_FIELD] for each_entry in query_result}
+    ids_list = sorted(unique_ids_set, reverse = (not ascending_order))
+    
+    return ids_list
+
+# .....................................................................................................................
+
+def count_ids_by_time_range_from_buckets(bucket_collection_ref, start_ems, end_ems, *,
+                                         ended_after_ems = None, bucket_size_ms = None):
+    
+    '''
+    Function used to count the (unique) ids whose intervals overlap a given time range, using time buckets
+    Duplicates (from intervals spanning multiple buckets) are removed inside the db, so no ids are transferred
+    Note: this is a blocking call!
+    '''
+    
+    # Group entries by id (to remove duplicates) and then count the groups
+    filter_dict = get_time_bucket_filter(start_ems, end_ems, ended_after_ems, bucket_size_ms)
+    query_result = bucket_collection_ref.aggregate([{"$match": filter_dict},
+                                                    {"$group": {"_id": "${}".format(DATA_ID_FIELD)}},
+                                                    {"$group": {"_id": None, "count": {"$sum": 1}}}])
+    count_result_list = list(query_result)
+    
+    return count_result_list[0]["count"] if count_result_list else 0
+
+# .....................................................................................................................
+
+def delete_time_buckets_by_cutoff(bucket_collection_ref, cutoff_ems):
+    
+    '''
+    Function used to delete time bucket entries for data that ended before a given cutoff time
+    Note: this is a blocking call!
+    Returns:
+        num_deleted
+    '''
+    
+    # Only entries in buckets before the cutoff can have ended before it, which lets the db use the bucket index
+    filter_dict = {BUCKET_EMS_FIELD: {"$lt": cutoff_ems}, FINAL_EPOCH_MS_FIELD: {"$lt": cutoff_ems}}
+    pymongo_DeleteResult = bucket_collection_ref.delete_many(filter_dict)
+    
+    return pymongo_DeleteResult.deleted_count
+
+# .....................................................................................................................
+
+def rebuild_time_buckets(data_collection_ref, bucket_collection_ref, id_field, first_ems_field, final_ems_field,
+                         batch_size = 5000):
+    
+    '''
+    Function used to (re-)generate time bucket entries from existing metadata
+    Intended for data that was stored before time buckets existed. Safe to re-run, since writes are idempotent
+    Once complete, the 'bucketed since' watermark is cleared, so that all data is looked up using buckets
+    Note: this is a blocking call, which may take a long time on large collections!
+    Returns:
+        num_metadata_processed, num_bucket_entries_added
+    '''
+    
+    # Only grab the fields we need for bucketing
+    projection_dict = {id_field: 1, first_ems_field: 1, final_ems_field: 1}
+    query_result = data_collection_ref.find({}, projection_dict)
+    
+    num_processed = 0
+    num_added = 0
+    batch_list = []
+    for each_entry in query_result:
+        
+        batch_list.append(each_entry)
+        if len(batch_list) < batch_size:
+            continue
+        
+        # Write out bucket entries in large batches
+        bucket_entries_list = build_time_bucket_entries(batch_list, id_field, first_ems_field, final_ems_field)
+        num_added += post_time_bucket_entries(bucket_collection_ref, bucket_entries_list)
+        num_processed += len(batch_list)
+        batch_list = []
+    
+    # Handle leftovers
+    bucket_entries_list = build_time_bucket_entries(batch_list, id_field, first_ems_field, final_ems_field)
+    num_added += post_time_bucket_entries(bucket_collection_ref, bucket_entries_list)
+    num_processed += len(batch_list)
+    
+    # All existing data is now bucketed (and newer data is bucketed as it arrives)
+    set_bucketed_since_ems(bucket_collection_ref, -1)
+    
+    return num_processed, num_added
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Global setup
+
+# Hard-code the size of each time bucket
+TIME_BUCKET_SIZE_MS = (60 * 60 * 1000)
+
+# Hard-code field names used in the bucket (side) collections
+BUCKET_EMS_FIELD = "bucket_ems"
+FIRST_EPOCH_MS_FIELD = "first_epoch_ms"
+FINAL_EPOCH_MS_FIELD = "final_epoch_ms"
+DATA_ID_FIELD = "data_id"
+
+# Hard-code the (special) entry used to store the 'bucketed since' watermark in each bucket collection
+WATERMARK_ENTRY_ID = "bucketed_since"
+BUCKETED_SINCE_FIELD = "bucketed_since_ems"
+
+# Hard-code the indexing needed by bucket collections
+# -> Bucket lookups are 'covered' by the compound index, and it doubles as the key for (idempotent) upserts
+# -> The id index is used to clear out stale entries when data timing changes
+TIME_BUCKET_KEYS_TO_INDEX = [[(BUCKET_EMS_FIELD, ASCENDING),
+                              (FIRST_EPOCH_MS_FIELD, ASCENDING),
+                              (FINAL_EPOCH_MS_FIELD, ASCENDING),
+                              (DATA_ID_FIELD, ASCENDING)],
+                             DATA_ID_FIELD]
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    
+    # Example of bucketing an interval that spans several hours
+    example_md = [{"_id": 1, "first_epoch_ms": 1600000000000, "final_epoch_ms": 1600010000000}]
+    example_entries = build_time_bucket_entries(example_md, "_id", "first_epoch_ms", "final_epoch_ms")
+    for each_entry in example_entries:
+        print(each_entry)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:03:52 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import asyncio
+
+from time import monotonic
+from array import array
+from bisect import bisect_left, bisect_right
+
+from local.lib.async_db_helpers import run_in_db_executor
+
+from pymongo import ASCENDING
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+class Epoch_Timeline_Cache:
+    
+    # .................................................................................................................
+    
+    def __init__(self, mongo_client, collection_name, epoch_ms_field, sync_period_sec):
+        
+        '''
+        Class used to keep an in-memory copy of the (sorted) epoch ms values of a collection, for every camera
+        Used to answer time-based lookups (e.g. time range listings, counts, closest times) without the db
+        
+        Each camera timeline is loaded from the db on first use, and is kept up to date by
+        adding new entries as they're stored (see add_epoch_ms(...)). Since data can also be changed
+        by other processes (i.e. autodelete), timelines are periodically re-synced with the db,
+        which trims away deleted entries and picks up any entries that weren't added directly
+        '''
+        
+        # Store inputs
+        self._mongo_client = mongo_client
+        self._collection_name = collection_name
+        self._epoch_ms_field = epoch_ms_field
+        self._sync_period_sec = sync_period_sec
+        
+        # Storage for per-camera timelines (epoch ms values stored as sorted 64-bit integer arrays)
+        self._timelines_dict = {}
+        self._last_sync_time_dict = {}
+        self._load_locks_dict = {}
+    
+    # .................................................................................................................
+    
+    def __repr__(self):
+        num_entries = sum(len(each_timeline) for each_timeline in self._timelines_dict.values())
+        return "Timeline cache ({}): {} entries across {} cameras".format(self._collection_name,
+                                                                          num_entries, len(self._timelines_dict))
+    
+    # .................................................................................................................
+    
+    async def get_epoch_ms_list_in_time_range(self, camera_select, start_ems, end_ems):
+        
+        ''' Returns a list of epoch ms values in the range: [start, end) '''
+        
+        timeline = await self._get_timeline(camera_select)
+        start_idx = bisect_left(timeline, start_ems)
+        end_idx = bisect_left(timeline, end_ems)
+        
+        return timeline[start_idx:end_idx].tolist()
+    
+    # .................................................................................................................
+    
+    async def get_count_in_time_range(self, camera_select, start_ems, end_ems):
+        
+        ''' Returns the number of epoch ms values in the range: [start, end) '''
+        
+        timeline = await self._get_timeline(camera_select)
+        start_idx = bisect_left(timeline, start_ems)
+        end_idx = bisect_left(timeline, end_ems)
+        
+        return max(0, end_idx - start_idx)
+    
+    # .................................................................................................................
+    
+    async def get_bounding_epoch_ms(self, camera_select):
+        
+        '''
+        Returns the oldest & newest epoch ms values for a camera
+        Returns:
+            oldest_ems, newest_ems (both are None if there is no data)
+        '''
+        
+        timeline = await self._get_timeline(camera_select)
+        if len(timeline) == 0:
+            return None, None
+        
+        return timeline[0], timeline[-1]
+    
+    # .................................................................................................................
+    
+    async def get_closest_epoch_ms(self, camera_select, target_ems):
+        
+        '''
+        Returns the closest epoch ms values before (or at) & after (or at) a target time, along with
+        whichever of the two is closest. If both are equally close, the later value is considered closest
+        Returns:
+            lower_ems, upper_ems, closest_ems (each is None if missing)
+        '''
+        
+        timeline = await self._get_timeline(camera_select)
+        
+        # Find bounding values on either side of the target
+        lower_idx = bisect_right(timeline, target_ems) - 1
+        upper_idx = bisect_left(timeline, target_ems)
+        lower_ems = timeline[lower_idx] if lower_idx >= 0 else None
+        upper_ems = timeline[upper_idx] if upper_idx < len(timeline) else None
+        
+        # Determine the closest value while handling missing values
+        if lower_ems is None:
+            closest_ems = upper_ems
+        elif upper_ems is None:
+            closest_ems = lower_ems
+        else:
+            lower_diff = (target_ems - lower_ems)
+            upper_diff = (upper_ems - target_ems)
+            closest_ems = lower_ems if (lower_diff < upper_diff) else upper_ems
+        
+        return lower_ems, upper_ems, closest_ems
+    
+    # .................................................................................................................
+    
+    def add_epoch_ms(self, camera_select, epoch_ms_list):
+        
+        '''
+        Function used to add newly stored epoch ms values to a camera timeline
+        Should only be called after the corresponding data has been stored in the db!
+        Timelines that haven't been loaded yet are ignored (they'll be loaded from the db when needed)
+        '''
+        
+        # Don't bother adding data if the timeline isn't loaded yet
+        timeline = self._timelines_dict.get(camera_select, None)
+        if timeline is None:
+            return
+        
+        self._insert_sorted(timeline, epoch_ms_list)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def invalidate(self, camera_select = None):
+        
+        '''
+        Function used to clear cached timeline data, should be called whenever camera databases are dropped
+        If no camera is given, all timelines are cleared
+        '''
+        
+        if camera_select is None:
+            self._timelines_dict.clear()
+            self._last_sync_time_dict.clear()
+            return
+        
+        self._timelines_dict.pop(camera_select, None)
+        self._last_sync_time_dict.pop(camera_select, None)
+        
+        return
+    
+    # .................................................................................................................
+    
+    async def _get_timeline(self, camera_select):
+        
+        ''' Helper used to get a camera timeline, loading it from the db or re-syncing it if needed '''
+        
+        # Use existing timeline if it's recent enough
+        timeline = self._timelines_dict.get(camera_select, None)
+        last_sync_time = self._last_sync_time_dict.get(camera_select, -self._sync_period_sec)
+        need_sync = ((monotonic() - last_sync_time) >= self._sync_period_sec)
+        if timeline is not None and not need_sync:
+            return timeline
+        
+        # Only allow one load/sync per camera at a time, other requests wait for the result
+        load_lock = self._load_locks_dict.setdefault(camera_select, asyncio.Lock())
+        async with load_lock:
+            
+            # Check if another request already loaded the timeline while we were waiting
+            timeline = self._timelines_dict.get(camera_select, None)
+            last_sync_time = self._last_sync_time_dict.get(camera_select, -self._sync_period_sec)
+            need_sync = ((monotonic() - last_sync_time) >= self._sync_period_sec)
+            if timeline is not None and not need_sync:
+                return timeline
+            
+            # Load the full timeline the first time, afterwards just sync up with the db
+            # -> Timeline modifications are only made here (not in the db thread), so readers never see partial edits
+            collection_ref = self._mongo_client[camera_select][self._collection_name]
+            if timeline is None:
+                timeline = await run_in_db_executor(self._load_timeline, collection_ref)
+            else:
+                newest_ems = timeline[-1] if len(timeline) > 0 else None
+                oldest_db_ems, newer_ems_list = \
+                    await run_in_db_executor(self._get_sync_data, collection_ref, newest_ems)
+                num_to_trim = len(timeline) if oldest_db_ems is None else bisect_left(timeline, oldest_db_ems)
+                del timeline[:num_to_trim]
+                self._insert_sorted(timeline, newer_ems_list)
+            
+            # Store results for re-use
+            self._timelines_dict[camera_select] = timeline
+            self._last_sync_time_dict[camera_select] = monotonic()
+        
+        return timeline
+    
+    # .................................................................................................................
+    
+    def _load_timeline(self, collection_ref):
+        
+        ''' Blocking helper used to load all epoch ms values from the db (using an index-only query) '''
+        
+        query_result = collection_ref.find({}, {self._epoch_ms_field: 1}).sort(self._epoch_ms_field, ASCENDING)
+        timeline = array("q", (each_entry[self._epoch_ms_field] for each_entry in query_result))
+        
+        return timeline
+    
+    # .................................................................................................................
+    
+    def _get_sync_data(self, collection_ref, newest_ems):
+        
+        '''
+        Blocking helper used to get the data needed to bring an existing timeline up to date with the db
+        Returns:
+            oldest_db_ems (None if the db is empty), newer_ems_list (all db values newer than the given newest_ems)
+        '''
+        
+        ems_field = self._epoch_ms_field
+        
+        # Get the oldest db entry, so we can trim off deleted data
+        oldest_query = collection_ref.find({}, {ems_field: 1}).sort(ems_field, ASCENDING).limit(1)
+        oldest_entry = next(iter(oldest_query), None)
+        oldest_db_ems = None if oldest_entry is None else oldest_entry[ems_field]
+        
+        # Get any newer data that hasn't been added to the timeline directly
+        newer_filter = {} if newest_ems is None else {ems_field: {"$gt": newest_ems}}
+        newer_query = collection_ref.find(newer_filter, {ems_field: 1}).sort(ems_field, ASCENDING)
+        newer_ems_list = [each_entry[ems_field] for each_entry in newer_query]
+        
+        return oldest_db_ems, newer_ems_list
+    
+    # .................................................................................................................
+    
+    @staticmethod
+    def _insert_sorted(timeline, epoch_ms_list):
+        
+        '''
+        Helper used to insert values into a timeline, in sorted order, skipping duplicates
+        New data almost always comes after existing data, in which case this is just an append
+        '''
+        
+        for each_ems in sorted(epoch_ms_list):
+            insert_idx = bisect_left(timeline, each_ems)
+            is_duplicate = (insert_idx < len(timeline)) and (timeline[insert_idx] == each_ems)
+            if not is_duplicate:
+                timeline.insert(insert_idx, each_ems)
+        
+        return
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
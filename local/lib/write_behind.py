@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:26:05 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Add local path
+
+import os
+import sys
+
+def find_path_to_local(target_folder = "local"):
+    
+    # Skip path finding if we successfully import the dummy file
+    try:
+        from local.dummy import dummy_func; dummy_func(); return
+    except ImportError:
+        print("", "Couldn't find local directory!", "Searching for path...", sep="\n")
+    
+    # Figure out where this file is located so we can work backwards to find the target folder
+    file_directory = os.path.dirname(os.path.abspath(__file__))
+    path_check = []
+    
+    # Check parent directories to see if we hit the main project directory containing the target folder
+    prev_working_path = working_path = file_directory
+    while True:
+        
+        # If we find the target folder in the given directory, add it to the python path (if it's not already there)
+        if target_folder in os.listdir(working_path):
+            if working_path not in sys.path:
+                tilde_swarm = "~"*(4 + len(working_path))
+                print("\n{}\nPython path updated:\n  {}\n{}".format(tilde_swarm, working_path, tilde_swarm))
+                sys.path.append(working_path)
+            break
+        
+        # Stop if we hit the filesystem root directory (parent directory isn't changing)
+        prev_working_path, working_path = working_path, os.path.dirname(working_path)
+        path_check.append(prev_working_path)
+        if prev_working_path == working_path:
+            print("\nTried paths:", *path_check, "", sep="\n  ")
+            raise ImportError("Can't find '{}' directory!".format(target_folder))
+            
+find_path_to_local()
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import asyncio
+import threading
+import ujson
+
+from local.lib.environment import get_env_write_behind_max_batch_size, get_env_write_behind_flush_period_ms
+from local.lib.environment import get_env_write_behind_use_wal
+
+from local.lib.mongo_helpers import MCLIENT, convert_to_many, check_mongo_connection
+from local.lib.ingest_helpers import run_in_ingest_executor, ingest_many_to_mongo
+from local.lib.pathing import BASE_DATA_FOLDER_PATH, build_system_data_folder_path
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+class Write_Behind_Buffer:
+    
+    # .................................................................................................................
+    
+    def __init__(self, mongo_client, max_batch_size, flush_period_sec, wal_file_path = None):
+        
+        '''
+        Class used to coalesce many small metadata inserts into fewer (larger) bulk writes
+        Data is buffered per (camera, collection) pairing and written to the db when a buffer gets too large,
+        or periodically (for all buffers) based on the flush period
+        
+        If a write-ahead-log (wal) file path is provided, all queued data is also appended to the file,
+        so that it can be recovered if the server stops before the data is written to the db.
+        The log is cleared whenever all buffers have been written successfully.
+        Note that recovered data relies on duplicate '_id' entries being rejected by the db,
+        since some entries may be re-inserted when recovering from the log!
+        '''
+        
+        # Store inputs
+        self._mongo_client = mongo_client
+        self._max_batch_size = max(1, max_batch_size)
+        self._flush_period_sec = flush_period_sec
+        self._wal_file_path = wal_file_path
+        
+        # Storage for buffered data, keyed by (camera_select, collection_name)
+        self._buffers_dict = {}
+        
+        # Storage for functions to call after data is written, keyed by collection name
+        self._flush_listeners_dict = {}
+        
+        # Allocate storage for the periodic flushing task & write-ahead-log controls
+        self._flush_task = None
+        self._wal_lock = threading.Lock()
+        self._num_pending_wal_writes = 0
+        self._num_pending_flushes = 0
+        
+        # Sequence numbers used to decide if the log can be cleared (only modified while holding the wal lock)
+        # -> The log only needs clearing if something was written to it since the last time it was cleared
+        self._wal_sequence_number = 0
+        self._wal_cleared_sequence_number = 0
+    
+    # .................................................................................................................
+    
+    def __repr__(self):
+        num_buffered = sum(len(each_list) for each_list in self._buffers_dict.values())
+        return "Write-behind buffer: {} entries across {} buffers".format(num_buffered, len(self._buffers_dict))
+    
+    # .................................................................................................................
+    
+    async def start(self):
+        
+        ''' Function used to begin periodic flushing. Also recovers any (unwritten) data from the write-ahead log '''
+        
+        # Recover any data left over from a previous run & make sure the log folder exists for future writes
+        await self.recover()
+        if self._wal_file_path is not None:
+            await run_in_ingest_executor(os.makedirs, os.path.dirname(self._wal_file_path), exist_ok = True)
+        
+        # Start periodic flushing
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._periodic_flush())
+        
+        return
+    
+    # .................................................................................................................
+    
+    async def recover(self):
+        
+        '''
+        Function used to write any data left in the write-ahead log by a previous run (e.g. after a crash)
+        Can be used without starting the buffer, so that logged data isn't lost if write-behind is disabled
+        '''
+        
+        # Nothing to recover if we're not using a log
+        if self._wal_file_path is None:
+            return
+        
+        recovered_entries_list = await run_in_ingest_executor(self._read_wal)
+        for each_camera_select, each_collection_name, each_data_list in recovered_entries_list:
+            buffer_key = (each_camera_select, each_collection_name)
+            self._buffers_dict.setdefault(buffer_key, []).extend(each_data_list)
+        await self.flush_all()
+        
+        return
+    
+    # .................................................................................................................
+    
+    async def stop(self):
+        
+        ''' Function used to stop periodic flushing. Writes any remaining buffered data to the db '''
+        
+        # Stop the periodic flushing
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        
+        # Make sure nothing is left in the buffers
+        await self.flush_all()
+        
+        return
+    
+    # .................................................................................................................
+    
+    async def queue_many(self, camera_select, collection_name, data_to_insert):
+        
+        '''
+        Function used to queue up data for writing into the db (at some point in the future)
+        If a write-ahead log is being used, the data will be written to the log before this function returns
+        '''
+        
+        # Make sure we're always dealing with a list of entries
+        data_to_insert_list = convert_to_many(data_to_insert)
+        if not data_to_insert_list:
+            return
+        
+        # Store data in the write-ahead log first, if needed
+        if self._wal_file_path is not None:
+            self._num_pending_wal_writes += 1
+            try:
+                await run_in_ingest_executor(self._append_to_wal, camera_select, collection_name, data_to_insert_list)
+            finally:
+                self._num_pending_wal_writes -= 1
+        
+        # Add data to the buffer, and write it out immediately if the buffer is full
+        buffer_key = (camera_select, collection_name)
+        buffer_list = self._buffers_dict.setdefault(buffer_key, [])
+        buffer_list.extend(data_to_insert_list)
+        if len(buffer_list) >= self._max_batch_size:
+            await self._flush_one(buffer_key)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def add_flush_listener(self, collection_name, listener_func):
+        
+        '''
+        Function used to register a function that should be called whenever data is written to a given collection
+        The listener is called with arguments: (camera_select, data_list), after the data is in the db
+        Note: listeners are called on the event loop, so they must not block! Async listeners are awaited
+        '''
+        
+        self._flush_listeners_dict.setdefault(collection_name, []).append(listener_func)
+        
+        return
+    
+    # .................................................................................................................
+    
+    async def flush_all(self):
+        
+        ''' Function used to write all buffered data into the db '''
+        
+        # Write every buffer
+        for each_buffer_key in list(self._buffers_dict.keys()):
+            await self._flush_one(each_buffer_key)
+        
+        # Nothing to clear if we're not using a log, or if nothing has been logged since it was last cleared
+        if self._wal_file_path is None:
+            return
+        if self._wal_sequence_number == self._wal_cleared_sequence_number:
+            return
+        
+        # Clear the log if everything has been written (and nothing is in the process of being logged or written)
+        # -> Flushes may also be triggered by full buffers, so other writes can still be in progress at this point
+        # -> Data may also be logged while waiting to clear, so the log is only cleared if nothing new was logged
+        no_pending_writes = (self._num_pending_wal_writes == 0) and (self._num_pending_flushes == 0)
+        all_written = (len(self._buffers_dict) == 0) and no_pending_writes
+        if all_written:
+            await run_in_ingest_executor(self._clear_wal, self._wal_sequence_number)
+        
+        return
+    
+    # .................................................................................................................
+    
+    async def _flush_one(self, buffer_key):
+        
+        ''' Helper used to write out a single buffer into the db '''
+        
+        # Take all the data out of the buffer, so new data can continue to be buffered while we write
+        data_to_insert_list = self._buffers_dict.pop(buffer_key, None)
+        if not data_to_insert_list:
+            return
+        
+        # Keep track of in-progress writes, so the write-ahead log isn't cleared before the data is in the db
+        self._num_pending_flushes += 1
+        try:
+            # Write all the data at once (unordered, so duplicate entries don't block other entries)
+            camera_select, collection_name = buffer_key
+            post_success, mongo_response = \
+                await ingest_many_to_mongo(self._mongo_client, camera_select, collection_name, data_to_insert_list)
+            
+            # Duplicate entries (i.e. bulk write errors) are expected and skipped, so just let listeners know
+            is_duplicate_error = (mongo_response.get("error", None) == "bulk write error")
+            if post_success or is_duplicate_error:
+                for each_listener_func in self._flush_listeners_dict.get(collection_name, []):
+                    listener_result = each_listener_func(camera_select, data_to_insert_list)
+                    if asyncio.iscoroutine(listener_result):
+                        await listener_result
+                return
+            
+            # If we get here, something went wrong. If we lost the db connection, put the data back to retry later
+            # -> Otherwise, the data itself is likely the problem, so there's no point retrying
+            is_connected, _ = await run_in_ingest_executor(check_mongo_connection, self._mongo_client)
+            if not is_connected:
+                self._buffers_dict.setdefault(buffer_key, [])[0:0] = data_to_insert_list
+            
+            # Some feedback for logs
+            retry_str = "will retry" if not is_connected else "data discarded"
+            error_str = "Write-behind error ({} | {}), {}".format(camera_select, collection_name, retry_str)
+            print("", error_str, mongo_response, sep = "\n", flush = True)
+        finally:
+            self._num_pending_flushes -= 1
+        
+        return
+    
+    # .................................................................................................................
+    
+    async def _periodic_flush(self):
+        
+        ''' Helper used to flush all buffered data on a fixed time interval, until cancelled '''
+        
+        while True:
+            await asyncio.sleep(self._flush_period_sec)
+            try:
+                await self.flush_all()
+            except Exception as err:
+                error_type = (err.__class__.__name__)
+                print("", "Write-behind flush error ({})".format(error_type), err, sep = "\n", flush = True)
+        
+        return
+    
+    # .................................................................................................................
+    
+    def _append_to_wal(self, camera_select, collection_name, data_to_insert_list):
+        
+        ''' Blocking helper which adds data to the write-ahead log (and makes sure it's on disk) '''
+        
+        log_entry_str = ujson.dumps([camera_select, collection_name, data_to_insert_list])
+        with self._wal_lock:
+            with open(self._wal_file_path, "a") as out_file:
+                out_file.write(log_entry_str + "\n")
+                out_file.flush()
+                os.fsync(out_file.fileno())
+            self._wal_sequence_number += 1
+        
+        return
+    
+    # .................................................................................................................
+    
+    def _read_wal(self):
+        
+        ''' Blocking helper which loads all entries from the write-ahead log, skipping anything unreadable '''
+        
+        # Nothing to load if there is no log file
+        if not os.path.exists(self._wal_file_path):
+            return []
+        
+        # Load every (valid) log entry
+        log_entries_list = []
+        with self._wal_lock:
+            with open(self._wal_file_path, "r") as in_file:
+                for each_line in in_file:
+                    try:
+                        camera_select, collection_name, data_to_insert_list = ujson.loads(each_line)
+                        log_entries_list.append((camera_select, collection_name, data_to_insert_list))
+                    except ValueError:
+                        pass
+            
+            # Make sure existing log data is cleared once the recovered data is written
+            if os.path.getsize(self._wal_file_path) > 0:
+                self._wal_sequence_number += 1
+        
+        return log_entries_list
+    
+    # .................................................................................................................
+    
+    def _clear_wal(self, expected_sequence_number):
+        
+        '''
+        Blocking helper which empties the write-ahead log
+        The log is only cleared if nothing has been logged since the given sequence number was read,
+        since any newly logged data may not have been written to the db yet!
+        '''
+        
+        with self._wal_lock:
+            if self._wal_sequence_number != expected_sequence_number:
+                return
+            if os.path.exists(self._wal_file_path):
+                open(self._wal_file_path, "w").close()
+            self._wal_cleared_sequence_number = expected_sequence_number
+        
+        return
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def build_write_behind_wal_path(base_data_folder_path):
+    return build_system_data_folder_path(base_data_folder_path, "write_behind", "metadata_wal.jsonl")
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Global setup
+
+# Create (global!) write-behind buffer, used to coalesce metadata inserts
+use_wal = get_env_write_behind_use_wal()
+WRITE_BEHIND_BUFFER = \
+    Write_Behind_Buffer(MCLIENT,
+                        max_batch_size = get_env_write_behind_max_batch_size(),
+                        flush_period_sec = get_env_write_behind_flush_period_ms() / 1000,
+                        wal_file_path = build_write_behind_wal_path(BASE_DATA_FOLDER_PATH) if use_wal else None)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -54,14 +54,16 @@ from collections import OrderedDict
 
 from local.lib.timekeeper_utils import timestamped_log
 
-from local.lib.mongo_helpers import MCLIENT, get_camera_names_list
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.async_db_helpers import run_in_db_executor
+from local.lib.camera_registry import CAMERA_REGISTRY
 
 from local.lib.data_deletion import AD_SETTINGS, build_autodelete_log_folder_path
 from local.lib.data_deletion import get_oldest_snapshot_dt, delete_by_disk_usage, delete_by_days, get_disk_usage
 
 from local.lib.response_helpers import not_allowed_response
+from local.lib.response_helpers import Fast_JSON_Response
 
-from starlette.responses import JSONResponse
 from starlette.routing import Route
 
 
@@ -95,7 +97,7 @@ def autodelete_check_system_logs(request):
         each_log_file_name, _ = os.path.splitext(os.path.basename(each_log_file_path))
         log_files_dict[each_log_file_name] = full_log_file_str.splitlines()
     
-    return JSONResponse(log_files_dict)
+    return Fast_JSON_Response(log_files_dict)
 
 # .....................................................................................................................
 
@@ -112,7 +114,7 @@ def autodelete_get_settings(request):
                        "days_to_keep": days_to_keep,
                        "max_disk_usage_pct": max_disk_usage_pct}
     
-    return JSONResponse(return_response)
+    return Fast_JSON_Response(return_response)
 
 # .....................................................................................................................
 
@@ -137,7 +139,7 @@ def autodelete_set_max_disk_usage_pct(request):
                      "note": ["New setting will not take effect until next scheduled deletion (tomorrow morning)",
                               "- Use the 'delete by disk usage' url to force an immediate deletion if needed"]}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
@@ -161,11 +163,11 @@ def autodelete_set_days_to_keep(request):
                      "note": ["New setting will not take effect until next scheduled deletion (tomorrow morning)",
                               "- Use the 'delete by days to keep' url to force an immediate deletion if needed"]}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def autodelete_manual_delete_by_disk_usage(request):
+async def autodelete_manual_delete_by_disk_usage(request):
     
     '''
     Route used to manually trigger a deletion check based on the max disk usage setting
@@ -183,12 +185,12 @@ def autodelete_manual_delete_by_disk_usage(request):
     _, used_bytes_before, _, _ = get_disk_usage()
     
     # Get data needed to delete by disk usage
-    camera_names_list = get_camera_names_list(MCLIENT, sort_names = True)
+    camera_names_list = await CAMERA_REGISTRY.get_camera_names_list(sort_names = True)
     _, max_disk_usage_pct = AD_SETTINGS.get_settings()
-    oldest_data_dt, _ = get_oldest_snapshot_dt(camera_names_list)
+    oldest_data_dt, _ = await run_in_db_executor(get_oldest_snapshot_dt, camera_names_list)
     
     # Run deletion
-    delete_by_disk_usage(MCLIENT, camera_names_list, oldest_data_dt, max_disk_usage_pct)
+    await run_in_db_executor(delete_by_disk_usage, MCLIENT, camera_names_list, oldest_data_dt, max_disk_usage_pct)
     
     # Get disk usage after deletion for comparison
     _, used_bytes_after, _, current_disk_usage_pct = get_disk_usage()
@@ -203,11 +205,11 @@ def autodelete_manual_delete_by_disk_usage(request):
                      "percent_usage": current_disk_usage_pct,
                      "time_taken_ms": time_taken_ms}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def autodelete_manual_delete_by_days_to_keep(request):
+async def autodelete_manual_delete_by_days_to_keep(request):
     
     '''
     Route used to manually trigger a deletion check based on the number of days to keep setting
@@ -225,12 +227,12 @@ def autodelete_manual_delete_by_days_to_keep(request):
     _, used_bytes_before, _, _ = get_disk_usage()
     
     # Get data needed to delete by days to keep
-    camera_names_list = camera_names_list = get_camera_names_list(MCLIENT)
+    camera_names_list = await CAMERA_REGISTRY.get_camera_names_list()
     days_to_keep, _ = AD_SETTINGS.get_settings()
-    oldest_data_dt, _ = get_oldest_snapshot_dt(camera_names_list)
+    oldest_data_dt, _ = await run_in_db_executor(get_oldest_snapshot_dt, camera_names_list)
     
     # Run deletion
-    delete_by_days(MCLIENT, camera_names_list, oldest_data_dt, days_to_keep)
+    await run_in_db_executor(delete_by_days, MCLIENT, camera_names_list, oldest_data_dt, days_to_keep)
     
     # Get disk usage after deletion for comparison
     _, used_bytes_after, _, current_disk_usage_pct = get_disk_usage()
@@ -245,7 +247,7 @@ def autodelete_manual_delete_by_days_to_keep(request):
                      "percent_usage": current_disk_usage_pct,
                      "time_taken_ms": time_taken_ms}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
@@ -54,15 +54,21 @@ import base64
 from local.lib.mongo_helpers import MCLIENT
 
 from local.lib.query_helpers import url_time_to_epoch_ms, start_end_times_to_epoch_ms
-from local.lib.query_helpers import get_one_metadata, get_oldest_metadata, get_newest_metadata
-from local.lib.query_helpers import get_closest_metadata_before_target_ems, get_many_metadata_in_time_range
-from local.lib.query_helpers import get_epoch_ms_list_in_time_range, get_count_in_time_range
+from local.lib.query_helpers import get_many_metadata_in_time_range as get_many_metadata_in_time_range_blocking
+from local.lib.async_db_helpers import get_one_metadata, get_oldest_metadata, get_newest_metadata
+from local.lib.newest_metadata_cache import NEWEST_METADATA_CACHE
+from local.lib.async_db_helpers import get_closest_metadata_before_target_ems
+from local.lib.async_db_helpers import get_epoch_ms_list_in_time_range, get_count_in_time_range
 
-from local.lib.response_helpers import no_data_response, bad_request_response, cors_files_response
+from local.lib.response_helpers import no_data_response, bad_request_response, cors_image_response
+from local.lib.response_helpers import Streaming_JSON_Response, gzip_cached_response
+from local.lib.response_cache import GZIP_RESPONSE_CACHE
+from local.lib.response_helpers import Fast_JSON_Response, Int_List_JSON_Response
 
-from local.lib.pathing import BASE_DATA_FOLDER_PATH, build_background_image_pathing
+from local.lib.image_store import IMAGE_STORE
 
-from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from starlette.routing import Route
 
 
@@ -71,28 +77,30 @@ from starlette.routing import Route
 
 # .....................................................................................................................
 
-def bg_get_newest_image(request):
+async def bg_get_newest_image(request):
         
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
-    # Get data from db
-    collection_ref = get_background_collection(camera_select)
-    no_newest_metadata, metadata_dict = get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
+    # Get data from the newest-metadata cache (only hits the db if the cached entry is missing or expired)
+    no_newest_metadata, metadata_dict = \
+        await NEWEST_METADATA_CACHE.get_newest_metadata(camera_select, COLLECTION_NAME, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_newest_metadata:
         error_message = "No image data for {}".format(camera_select)
         return no_data_response(error_message)
     
-    # Build pathing to the file
+    # Make sure the image exists
     newest_ems = metadata_dict[EPOCH_MS_FIELD]
-    image_load_path = build_background_image_pathing(BASE_DATA_FOLDER_PATH, camera_select, newest_ems)
-    if not os.path.exists(image_load_path):
+    # -> File system access is done on a thread, to avoid blocking the event loop
+    image_exists = await run_in_threadpool(IMAGE_STORE.exists, camera_select, COLLECTION_NAME, newest_ems)
+    if not image_exists:
         error_message = "No image at {}".format(newest_ems)
         return no_data_response(error_message)
     
-    return cors_files_response(image_load_path)
+    return await run_in_threadpool(cors_image_response,
+                                   request, camera_select, COLLECTION_NAME, newest_ems, is_immutable = False)
 
 # .....................................................................................................................
 
@@ -102,17 +110,16 @@ def bg_get_one_image(request):
     camera_select = request.path_params["camera_select"]
     target_ems = request.path_params["epoch_ms"]
     
-    # Build pathing to the file
-    image_load_path = build_background_image_pathing(BASE_DATA_FOLDER_PATH, camera_select, target_ems)
-    if not os.path.exists(image_load_path):
+    # Make sure the image exists
+    if not IMAGE_STORE.exists(camera_select, COLLECTION_NAME, target_ems):
         error_message = "No image at {}".format(target_ems)
         return bad_request_response(error_message)
     
-    return cors_files_response(image_load_path)
+    return cors_image_response(request, camera_select, COLLECTION_NAME, target_ems)
 
 # .....................................................................................................................
 
-def bg_get_active_image(request):
+async def bg_get_active_image(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -121,21 +128,24 @@ def bg_get_active_image(request):
     
     # Find the active metadata entry, so we can grab the corresponding image path
     collection_ref = get_background_collection(camera_select)
-    no_older_entry, entry_dict = get_closest_metadata_before_target_ems(collection_ref, target_ems, EPOCH_MS_FIELD)
+    no_older_entry, entry_dict = \
+        await get_closest_metadata_before_target_ems(collection_ref, target_ems, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_older_entry:
         error_message = "No metadata before time {}".format(target_ems)
         return bad_request_response(error_message)
     
-    # Build pathing to the file & handle missing file data
+    # Make sure the image exists
     active_ems = entry_dict[EPOCH_MS_FIELD]
-    image_load_path = build_background_image_pathing(BASE_DATA_FOLDER_PATH, camera_select, active_ems)
-    if not os.path.exists(image_load_path):
+    # -> File system access is done on a thread, to avoid blocking the event loop
+    image_exists = await run_in_threadpool(IMAGE_STORE.exists, camera_select, COLLECTION_NAME, active_ems)
+    if not image_exists:
         error_message = "No image at {}".format(active_ems)
         return bad_request_response(error_message)
     
-    return cors_files_response(image_load_path)
+    return await run_in_threadpool(cors_image_response,
+                                   request, camera_select, COLLECTION_NAME, active_ems, is_immutable = False)
 
 # .....................................................................................................................
 
@@ -145,15 +155,14 @@ def bg_get_one_b64_jpg(request):
     camera_select = request.path_params["camera_select"]
     target_ems = request.path_params["epoch_ms"]
     
-    # Build pathing to the file
-    image_load_path = build_background_image_pathing(BASE_DATA_FOLDER_PATH, camera_select, target_ems)
-    if not os.path.exists(image_load_path):
+    # Load the image data
+    image_data = IMAGE_STORE.get(camera_select, COLLECTION_NAME, target_ems)
+    if image_data is None:
         error_message = "No image at {}".format(target_ems)
         return bad_request_response(error_message)
     
-    # Load the image file and convert to base64
-    with open(image_load_path, "rb") as image_data:
-        b64_image = base64.b64encode(image_data.read())
+    # Convert to base64
+    b64_image = base64.b64encode(image_data)
     
     return PlainTextResponse(b64_image)
 
@@ -166,33 +175,33 @@ def bg_get_one_b64_jpg(request):
 
 # .....................................................................................................................
     
-def bg_get_newest_metadata(request):
+async def bg_get_newest_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
-    # Get data from db
-    collection_ref = get_background_collection(camera_select)
-    no_newest_metadata, metadata_dict = get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
+    # Get data from the newest-metadata cache (only hits the db if the cached entry is missing or expired)
+    no_newest_metadata, metadata_dict = \
+        await NEWEST_METADATA_CACHE.get_newest_metadata(camera_select, COLLECTION_NAME, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_newest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
 
-def bg_get_bounding_times(request):
+async def bg_get_bounding_times(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
     # Request data from the db
     collection_ref = get_background_collection(camera_select)
-    no_oldest_metadata, oldest_metadata_dict = get_oldest_metadata(collection_ref, EPOCH_MS_FIELD)
-    no_newest_metadata, newest_metadata_dict = get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
+    no_oldest_metadata, oldest_metadata_dict = await get_oldest_metadata(collection_ref, EPOCH_MS_FIELD)
+    no_newest_metadata, newest_metadata_dict = await get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
     
     # Get results, if possible
     if no_oldest_metadata or no_newest_metadata:
@@ -205,11 +214,11 @@ def bg_get_bounding_times(request):
                      "min_datetime_isoformat": oldest_metadata_dict["datetime_isoformat"],
                      "max_datetime_isoformat": newest_metadata_dict["datetime_isoformat"]}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def bg_get_epochs_by_time_range(request):
+async def bg_get_epochs_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -223,18 +232,19 @@ def bg_get_epochs_by_time_range(request):
     collection_ref = get_background_collection(camera_select)
     
     # Get 'active' entry along with range entries
-    no_older_entry, active_entry = get_closest_metadata_before_target_ems(collection_ref, start_ems, EPOCH_MS_FIELD)
-    range_epoch_ms_list = get_epoch_ms_list_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    no_older_entry, active_entry = \
+        await get_closest_metadata_before_target_ems(collection_ref, start_ems, EPOCH_MS_FIELD)
+    range_epoch_ms_list = await get_epoch_ms_list_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
     
     # Build output
     epoch_ms_list = [] if no_older_entry else [active_entry[EPOCH_MS_FIELD]]
     epoch_ms_list += range_epoch_ms_list
     
-    return JSONResponse(epoch_ms_list)
+    return Int_List_JSON_Response(epoch_ms_list)
 
 # .....................................................................................................................
 
-def bg_get_active_metadata(request):
+async def bg_get_active_metadata(request):
     
     ''' 
     Returns the background metadata that was relevant at the given time (i.e. the background in use in realtime)
@@ -247,18 +257,19 @@ def bg_get_active_metadata(request):
     
     # Find the active metadata entry, so we can grab the corresponding image path
     collection_ref = get_background_collection(camera_select)
-    no_older_entry, entry_dict = get_closest_metadata_before_target_ems(collection_ref, target_ems, EPOCH_MS_FIELD)
+    no_older_entry, entry_dict = \
+        await get_closest_metadata_before_target_ems(collection_ref, target_ems, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_older_entry:
         error_message = "No metadata before time {}".format(target_ems)
         return no_data_response(error_message)
     
-    return JSONResponse(entry_dict)
+    return Fast_JSON_Response(entry_dict)
 
 # .....................................................................................................................
 
-def bg_get_one_metadata(request):
+async def bg_get_one_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -266,18 +277,18 @@ def bg_get_one_metadata(request):
     
     # Get data from db
     collection_ref = get_background_collection(camera_select)
-    query_result = get_one_metadata(collection_ref, EPOCH_MS_FIELD, target_ems)
+    query_result = await get_one_metadata(collection_ref, EPOCH_MS_FIELD, target_ems)
 
     # Deal with missing data
     if not query_result:
         error_message = "No metadata at {}".format(target_ems)
         return bad_request_response(error_message)
     
-    return JSONResponse(query_result)
+    return Fast_JSON_Response(query_result)
 
 # .....................................................................................................................
 
-def bg_get_many_metadata(request):
+async def bg_get_many_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -287,22 +298,29 @@ def bg_get_many_metadata(request):
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
     
+    # Re-use the (already gzipped) response for historical time ranges, if available
+    gzip_cache_key = GZIP_RESPONSE_CACHE.get_cache_key(request, camera_select, end_ems)
+    gzip_bytes = GZIP_RESPONSE_CACHE.get(gzip_cache_key)
+    if gzip_bytes is not None:
+        return gzip_cached_response(gzip_bytes)
+    
     # Get reference to collection to use for queries
     collection_ref = get_background_collection(camera_select)
     
-    # Get 'active' entry along with range entries
-    no_older_entry, active_entry = get_closest_metadata_before_target_ems(collection_ref, start_ems, EPOCH_MS_FIELD)
-    range_query_result = get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    # Get 'active' entry along with range entries (range entries aren't requested until the response is streamed)
+    no_older_entry, active_entry = \
+        await get_closest_metadata_before_target_ems(collection_ref, start_ems, EPOCH_MS_FIELD)
+    range_query_result = get_many_metadata_in_time_range_blocking(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
     
-    # Build output
-    return_result = [] if no_older_entry else [active_entry]
-    return_result += list(range_query_result)
+    # Stream output, with the active entry first
+    initial_items_list = [] if no_older_entry else [active_entry]
     
-    return JSONResponse(return_result)
+    return Streaming_JSON_Response(range_query_result, initial_items_list = initial_items_list,
+                                   gzip_cache_key = gzip_cache_key)
 
 # .....................................................................................................................
 
-def bg_count_by_time_range(request):
+async def bg_count_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -316,11 +334,11 @@ def bg_count_by_time_range(request):
     collection_ref = get_background_collection(camera_select)
     
     # Get 'active' entry, since it should be included in count
-    no_older_entry, _ = get_closest_metadata_before_target_ems(collection_ref, start_ems, EPOCH_MS_FIELD)
+    no_older_entry, _ = await get_closest_metadata_before_target_ems(collection_ref, start_ems, EPOCH_MS_FIELD)
     add_one_to_count = (not no_older_entry)
     
     # Get count over range of time
-    range_query_result = get_count_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    range_query_result = await get_count_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
     
     # Tally up total
     total_count = int(range_query_result) + int(add_one_to_count)
@@ -328,7 +346,7 @@ def bg_count_by_time_range(request):
     # Build output
     return_result = {"count": total_count}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
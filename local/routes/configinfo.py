@@ -52,13 +52,14 @@ find_path_to_local()
 from local.lib.mongo_helpers import MCLIENT
 
 from local.lib.query_helpers import url_time_to_epoch_ms, start_end_times_to_epoch_ms
-from local.lib.query_helpers import get_newest_metadata, get_oldest_metadata
-from local.lib.query_helpers import get_closest_metadata_before_target_ems, get_many_metadata_in_time_range
-from local.lib.query_helpers import get_count_in_time_range
+from local.lib.async_db_helpers import get_oldest_metadata
+from local.lib.newest_metadata_cache import NEWEST_METADATA_CACHE
+from local.lib.async_db_helpers import get_closest_metadata_before_target_ems, get_many_metadata_in_time_range
+from local.lib.async_db_helpers import get_count_in_time_range
 
 from local.lib.response_helpers import no_data_response
+from local.lib.response_helpers import Fast_JSON_Response
 
-from starlette.responses import JSONResponse
 from starlette.routing import Route
 
 
@@ -67,7 +68,7 @@ from starlette.routing import Route
 
 # .....................................................................................................................
 
-def cfginfo_get_oldest_metadata(request):
+async def cfginfo_get_oldest_metadata(request):
     
     '''
     Returns oldest config info entry. Should be an indication of when the camera first turned on,
@@ -79,18 +80,18 @@ def cfginfo_get_oldest_metadata(request):
     
     # Get data from db
     collection_ref = get_config_info_collection(camera_select)
-    no_oldest_metadata, metadata_dict = get_oldest_metadata(collection_ref, EPOCH_MS_FIELD)
+    no_oldest_metadata, metadata_dict = await get_oldest_metadata(collection_ref, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_oldest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
 
-def cfginfo_get_newest_metadata(request):
+async def cfginfo_get_newest_metadata(request):
     
     '''
     Returns the newest config info entry for a specific camera.
@@ -102,20 +103,20 @@ def cfginfo_get_newest_metadata(request):
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
-    # Get data from db
-    collection_ref = get_config_info_collection(camera_select)
-    no_newest_metadata, metadata_dict = get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
+    # Get data from the newest-metadata cache (only hits the db if the cached entry is missing or expired)
+    no_newest_metadata, metadata_dict = \
+        await NEWEST_METADATA_CACHE.get_newest_metadata(camera_select, COLLECTION_NAME, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_newest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
 
-def cfginfo_get_active_metadata(request):
+async def cfginfo_get_active_metadata(request):
     
     '''
     Returns the config info that was 'active' given the target time (i.e. the 'newest' info at the given time)
@@ -128,18 +129,19 @@ def cfginfo_get_active_metadata(request):
     
     # Find the active metadata entry
     collection_ref = get_config_info_collection(camera_select)
-    no_older_entry, entry_dict = get_closest_metadata_before_target_ems(collection_ref, target_ems, EPOCH_MS_FIELD)
+    no_older_entry, entry_dict = \
+        await get_closest_metadata_before_target_ems(collection_ref, target_ems, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_older_entry:
         error_message = "No metadata before time {}".format(target_ems)
         return no_data_response(error_message)
     
-    return JSONResponse(entry_dict)
+    return Fast_JSON_Response(entry_dict)
 
 # .....................................................................................................................
 
-def cfginfo_get_many_metadata(request):
+async def cfginfo_get_many_metadata(request):
     
     '''
     Returns a list of config info entries, given an input start and end time range.
@@ -162,18 +164,19 @@ def cfginfo_get_many_metadata(request):
     collection_ref = get_config_info_collection(camera_select)
     
     # Get 'active' entry along with range entries
-    no_older_entry, active_entry = get_closest_metadata_before_target_ems(collection_ref, start_ems, EPOCH_MS_FIELD)
-    range_query_result = get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    no_older_entry, active_entry = \
+        await get_closest_metadata_before_target_ems(collection_ref, start_ems, EPOCH_MS_FIELD)
+    range_query_result = await get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
     
     # Build output
     return_result = [] if no_older_entry else [active_entry]
     return_result += list(range_query_result)
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def cfginfo_count_by_time_range(request):
+async def cfginfo_count_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -187,11 +190,11 @@ def cfginfo_count_by_time_range(request):
     collection_ref = get_config_info_collection(camera_select)
     
     # Get 'active' entry, since it should be included in count
-    no_older_entry, _ = get_closest_metadata_before_target_ems(collection_ref, start_ems, EPOCH_MS_FIELD)
+    no_older_entry, _ = await get_closest_metadata_before_target_ems(collection_ref, start_ems, EPOCH_MS_FIELD)
     add_one_to_count = (not no_older_entry)
     
     # Get count over range of time
-    range_query_result = get_count_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    range_query_result = await get_count_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
     
     # Tally up total
     total_count = int(range_query_result) + int(add_one_to_count)
@@ -199,7 +202,7 @@ def cfginfo_count_by_time_range(request):
     # Build output
     return_result = {"count": total_count}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
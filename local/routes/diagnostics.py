@@ -54,13 +54,17 @@ from shutil import which
 from subprocess import check_output
 
 from local.lib.mongo_helpers import MCLIENT
-from local.lib.mongo_helpers import get_collection_names_list, get_camera_names_list
+from local.lib.async_db_helpers import run_in_db_executor, run_query_to_list
+from local.lib.camera_registry import CAMERA_REGISTRY
+from local.lib.async_db_helpers import get_collection_names_list
 
 from local.lib.response_helpers import calculate_time_taken_ms
+from local.lib.response_helpers import Fast_JSON_Response
 
 from local.lib.data_deletion import get_disk_usage
+from local.lib.image_cache import HOT_IMAGE_CACHE
+from local.lib.image_store import IMAGE_STORE
 
-from starlette.responses import JSONResponse
 from starlette.routing import Route
 
 
@@ -69,7 +73,7 @@ from starlette.routing import Route
 
 # .....................................................................................................................
 
-def get_connections_info(request):
+async def get_connections_info(request):
     
     ''' Route which returns info regarding the number of connections to mongoDB '''
     
@@ -82,7 +86,8 @@ def get_connections_info(request):
     # Use the 'admin' database to list out the current connections (globally?)
     admin_name = "admin"
     admin_ref = MCLIENT.get_database(admin_name)
-    return_result = admin_ref.command("serverStatus").get("connections", connections_err)
+    server_status_dict = await run_in_db_executor(admin_ref.command, "serverStatus")
+    return_result = server_status_dict.get("connections", connections_err)
     
     # End timing
     t_end = perf_counter()
@@ -91,11 +96,11 @@ def get_connections_info(request):
     time_taken_ms = calculate_time_taken_ms(t_start, t_end)
     return_result["time_taken_ms"] = time_taken_ms
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def get_index_tree(request):
+async def get_index_tree(request):
     
     ''' Function which lists all indices across all collections/cameras '''
     
@@ -106,19 +111,19 @@ def get_index_tree(request):
     t_start = perf_counter()
     
     # Loop over every collection of every camera and get index information
-    camera_names_list = get_camera_names_list(MCLIENT)
+    camera_names_list = await CAMERA_REGISTRY.get_camera_names_list()
     for each_camera_name in camera_names_list:
         
         # Add each camera name to the tree
         indices_tree[each_camera_name] = {}
         
         # Get indices for each collection
-        camera_collection_names_list = get_collection_names_list(MCLIENT, each_camera_name)
+        camera_collection_names_list = await get_collection_names_list(MCLIENT, each_camera_name)
         for each_collection_name in camera_collection_names_list:
             
             # Get indexing info
             collection_ref = MCLIENT[each_camera_name][each_collection_name]
-            index_info_dict = collection_ref.index_information()
+            index_info_dict = await run_in_db_executor(collection_ref.index_information)
             
             # Remove '_id' entries to declutter, since they can be assumed (why is there an extra underscore?)
             if "_id_" in index_info_dict:
@@ -137,7 +142,7 @@ def get_index_tree(request):
     time_taken_ms = calculate_time_taken_ms(t_start, t_end)
     indices_tree["time_taken_ms"] = time_taken_ms
     
-    return JSONResponse(indices_tree)
+    return Fast_JSON_Response(indices_tree)
 
 # .....................................................................................................................
 
@@ -158,7 +163,7 @@ def get_memory_usage(request):
     command_bin_path = which(mem_cmd)
     if command_bin_path is None:
         return_result = {"error": "Memory-check program ({}) is not present!".format(mem_cmd)}
-        return JSONResponse(return_result)
+        return Fast_JSON_Response(return_result)
     
     # Initialize outputs, in case this fails
     ram_bytes_dict = "error"
@@ -203,7 +208,7 @@ def get_memory_usage(request):
                      "ram_percent_usage": ram_percent_usage,
                      "time_taken_ms": time_taken_ms}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
@@ -229,11 +234,24 @@ def get_disk_usage_for_images(request):
                      "note": "Usage for drive containing file system data only! May not account for metadata storage",
                      "time_taken_ms": time_taken_ms}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def get_metadata_bytes_per_camera(request):
+def get_image_cache_info(request):
+    
+    '''
+    Route which returns info about the in-memory cache of recently saved images (hot tier)
+    Hits & misses count image requests served from memory vs. from storage, since the server started
+    '''
+    
+    return_result = {"image_storage": repr(IMAGE_STORE), **HOT_IMAGE_CACHE.get_stats()}
+    
+    return Fast_JSON_Response(return_result)
+
+# .....................................................................................................................
+
+async def get_metadata_bytes_per_camera(request):
     
     ''' Route which returns info regarding the current disk usage for mongoDB data, per camera '''
     
@@ -245,11 +263,11 @@ def get_metadata_bytes_per_camera(request):
     t_start = perf_counter()
     
     # Get list of cameras (mongoDB 'dbs') that we're interested in
-    camera_names_list = get_camera_names_list(MCLIENT)
+    camera_names_list = await CAMERA_REGISTRY.get_camera_names_list()
     
     # Find the 'sizeOnDisk' of each database (i.e. camera) on mongoDB
     total_size_on_disk_bytes = 0
-    databases_info_list = MCLIENT.list_databases()
+    databases_info_list = await run_query_to_list(MCLIENT.list_databases)
     for each_list_entry in databases_info_list:
         
         # Skip non-camera camera entries
@@ -271,11 +289,11 @@ def get_metadata_bytes_per_camera(request):
                      "total_bytes": total_size_on_disk_bytes,
                      "time_taken_ms": time_taken_ms}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def get_document_count_tree(request):
+async def get_document_count_tree(request):
     
     ''' Function which lists all database -> collection -> document counts '''
     
@@ -286,19 +304,19 @@ def get_document_count_tree(request):
     t_start = perf_counter()
     
     # Loop over every collection of every camera and count all documents
-    camera_names_list = sorted(get_camera_names_list(MCLIENT))
+    camera_names_list = sorted(await CAMERA_REGISTRY.get_camera_names_list())
     for each_camera_name in camera_names_list:
         
         # Add each camera name to the tree
         doc_count_tree[each_camera_name] = {}
         
         # Loop over all collections for the given camera
-        camera_collection_names_list = sorted(get_collection_names_list(MCLIENT, each_camera_name))
+        camera_collection_names_list = sorted(await get_collection_names_list(MCLIENT, each_camera_name))
         for each_collection_name in camera_collection_names_list:
             
             # Get the document count for each collection
             collection_ref = MCLIENT[each_camera_name][each_collection_name]
-            collection_document_count = collection_ref.count_documents({})
+            collection_document_count = await run_in_db_executor(collection_ref.count_documents, {})
             
             # Store results nested by camera & collection name
             doc_count_tree[each_camera_name][each_collection_name] = collection_document_count
@@ -310,7 +328,7 @@ def get_document_count_tree(request):
     time_taken_ms = calculate_time_taken_ms(t_start, t_end)
     doc_count_tree["time_taken_ms"] = time_taken_ms
     
-    return JSONResponse(doc_count_tree)
+    return Fast_JSON_Response(doc_count_tree)
 
 # .....................................................................................................................
 # .....................................................................................................................
@@ -330,6 +348,7 @@ def build_diagnostics_routes():
      Route("/get-index-tree", get_index_tree),
      Route("/get-memory-usage", get_memory_usage),
      Route("/get-disk-usage", get_disk_usage_for_images),
+     Route("/get-image-cache-info", get_image_cache_info),
      Route("/get-metadata-usage", get_metadata_bytes_per_camera),
      Route("/get-document-count-tree", get_document_count_tree)
     ]
@@ -51,19 +51,21 @@ find_path_to_local()
 
 from time import perf_counter
 
-from local.lib.mongo_helpers import MCLIENT, post_one_to_mongo
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.async_db_helpers import run_in_db_executor, run_query_to_list
+from local.lib.async_db_helpers import post_one_to_mongo, check_collection_indexing, set_collection_indexing
+from local.lib.index_manager import declare_required_indexes, ensure_collection_indexes
 
 from local.lib.query_helpers import start_end_times_to_epoch_ms
-from local.lib.query_helpers import get_all_ids, get_one_metadata, get_newest_metadata
+from local.lib.async_db_helpers import get_all_ids, get_one_metadata, get_newest_metadata
 
 from local.lib.response_helpers import bad_request_response, no_data_response
 from local.lib.response_helpers import post_success_response, not_allowed_response
+from local.lib.response_helpers import Fast_JSON_Response
 
 from local.routes.objects import OBJ_ID_FIELD, FIRST_EPOCH_MS_FIELD, FINAL_EPOCH_MS_FIELD
-from local.routes.objects import check_collection_indexing, set_collection_indexing
 from local.routes.objects import get_object_collection
 
-from starlette.responses import JSONResponse
 from starlette.routing import Route
 
 from pymongo import ASCENDING
@@ -104,7 +106,7 @@ def find_by_time_range(collection_ref, start_ems, end_ems, *, return_ids_only):
 
 # .....................................................................................................................
 
-def fave_add_entry(request):
+async def fave_add_entry(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -112,7 +114,7 @@ def fave_add_entry(request):
     
     # Get existing object data, if possible
     obj_collection_ref = get_object_collection(camera_select)
-    query_result = get_one_metadata(obj_collection_ref, OBJ_ID_FIELD, object_full_id)
+    query_result = await get_one_metadata(obj_collection_ref, OBJ_ID_FIELD, object_full_id)
     
     # Deal with missing data
     if not query_result:
@@ -121,7 +123,7 @@ def fave_add_entry(request):
     
     # Add data to the favorites collection
     data_to_post = dict(query_result)
-    post_success, mongo_response = post_one_to_mongo(MCLIENT, camera_select, COLLECTION_NAME, data_to_post)
+    post_success, mongo_response = await post_one_to_mongo(MCLIENT, camera_select, COLLECTION_NAME, data_to_post)
     
     # Return an error response if there was a problem posting
     # Hard-coded: assuming the issue is with duplicate entries
@@ -131,16 +133,13 @@ def fave_add_entry(request):
         return not_allowed_response(error_message, additional_response_dict)
     
     # If we succeed, make sure to check/set time indexing, in case it hasn't already been set
-    fave_collection_ref = get_favorite_collection(camera_select)
-    fave_index_already_set = check_collection_indexing(fave_collection_ref, KEYS_TO_INDEX)
-    if not fave_index_already_set:
-        set_collection_indexing(fave_collection_ref, KEYS_TO_INDEX)
+    await ensure_collection_indexes(MCLIENT, camera_select, COLLECTION_NAME)
     
     return post_success_response()
 
 # .....................................................................................................................
 
-def faves_remove_entry(request):
+async def faves_remove_entry(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -151,7 +150,7 @@ def faves_remove_entry(request):
     
     # Request document deletion
     collection_ref = get_favorite_collection(camera_select)
-    pymongo_delete_result = collection_ref.delete_one(query_dict)
+    pymongo_delete_result = await run_in_db_executor(collection_ref.delete_one, query_dict)
     
     # Give a different response if no data was deleted
     deleted_count = pymongo_delete_result.deleted_count
@@ -163,7 +162,7 @@ def faves_remove_entry(request):
     # Convert to dictionary with count
     return_result = {"success": True, "deleted": deleted_count}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
@@ -174,41 +173,41 @@ def faves_remove_entry(request):
 
 # .....................................................................................................................
 
-def faves_get_newest_metadata(request):
+async def faves_get_newest_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
     # Get data from db
     collection_ref = get_favorite_collection(camera_select)
-    no_newest_metadata, metadata_dict = get_newest_metadata(collection_ref, FINAL_EPOCH_MS_FIELD)
+    no_newest_metadata, metadata_dict = await get_newest_metadata(collection_ref, FINAL_EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_newest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
 
-def faves_get_all_ids(request):
+async def faves_get_all_ids(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
     # Request data from the db
     collection_ref = get_favorite_collection(camera_select)
-    query_result = get_all_ids(collection_ref)
+    query_result = await get_all_ids(collection_ref)
     
     # Pull out the epoch values into a list, instead of returning a list of dictionaries
     return_result = [each_entry[FAVE_ID_FIELD] for each_entry in query_result]
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def faves_get_ids_by_time_range(request):
+async def faves_get_ids_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -220,16 +219,17 @@ def faves_get_ids_by_time_range(request):
     
     # Request data from the db
     collection_ref = get_favorite_collection(camera_select)
-    query_result = find_by_time_range(collection_ref, start_ems, end_ems, return_ids_only = True)
+    query_result = await run_query_to_list(find_by_time_range, collection_ref, start_ems, end_ems,
+                                           return_ids_only = True)
     
     # Pull out the epoch values into a list, instead of returning a list of dictionaries
     return_result = [each_entry[FAVE_ID_FIELD] for each_entry in query_result]
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def faves_get_one_metadata_by_id(request):
+async def faves_get_one_metadata_by_id(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -237,18 +237,18 @@ def faves_get_one_metadata_by_id(request):
     
     # Request data from the db
     collection_ref = get_favorite_collection(camera_select)
-    query_result = get_one_metadata(collection_ref, FAVE_ID_FIELD, object_full_id)
+    query_result = await get_one_metadata(collection_ref, FAVE_ID_FIELD, object_full_id)
     
     # Deal with missing data
     if not query_result:
         error_message = "No object with id {}".format(object_full_id)
         return bad_request_response(error_message)
     
-    return JSONResponse(query_result)
+    return Fast_JSON_Response(query_result)
 
 # .....................................................................................................................
 
-def faves_count_by_time_range(request):
+async def faves_count_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -264,16 +264,16 @@ def faves_count_by_time_range(request):
     
     # Request data from the db
     collection_ref = get_favorite_collection(camera_select)
-    query_result = collection_ref.count_documents(query_dict, projection_dict)
+    query_result = await run_in_db_executor(collection_ref.count_documents, query_dict, projection_dict)
     
     # Convert to dictionary with count
     return_result = {"count": int(query_result)}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def faves_set_indexing(request):
+async def faves_set_indexing(request):
     
     '''
     Route mainly for debugging. Indexing should already be done automatically when faves are added!
@@ -288,13 +288,13 @@ def faves_set_indexing(request):
     t_start = perf_counter()
     
     # First check if the index is already set
-    indexes_already_set = check_collection_indexing(collection_ref, KEYS_TO_INDEX)
+    indexes_already_set = await check_collection_indexing(collection_ref, KEYS_TO_INDEX)
     if indexes_already_set:
         return_result = {"already_set": True, "indexes": KEYS_TO_INDEX}
-        return JSONResponse(return_result)
+        return Fast_JSON_Response(return_result)
     
     # Set indexes on target fields if we haven't already
-    mongo_response_list = set_collection_indexing(collection_ref, KEYS_TO_INDEX)
+    mongo_response_list = await set_collection_indexing(collection_ref, KEYS_TO_INDEX)
     
     # End timing
     t_end = perf_counter()
@@ -305,7 +305,7 @@ def faves_set_indexing(request):
                      "time_taken_ms": time_taken_ms,
                      "mongo_response_list": mongo_response_list}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
@@ -370,6 +370,9 @@ KEYS_TO_INDEX = [FIRST_EPOCH_MS_FIELD, FINAL_EPOCH_MS_FIELD]
 # Set name of collection, which determines url routing + storage on mongoDB
 COLLECTION_NAME = "favorites"
 
+# Register indexing requirements, so indexes can be set automatically
+declare_required_indexes(COLLECTION_NAME, KEYS_TO_INDEX)
+
 
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Demo
@@ -52,10 +52,12 @@ find_path_to_local()
 from shutil import move as sh_move
 from shutil import rmtree as sh_remove_recursively
 
-from local.lib.mongo_helpers import MCLIENT, get_camera_names_list, get_collection_names_list, remove_camera_collection
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.async_db_helpers import get_collection_names_list, remove_camera_collection
+from local.lib.camera_registry import CAMERA_REGISTRY
 from local.lib.response_helpers import no_data_response
+from local.lib.response_helpers import Fast_JSON_Response
 
-from starlette.responses import JSONResponse
 from starlette.routing import Route
 
 
@@ -193,7 +195,7 @@ def info_route(request):
                 }
     }
     
-    return JSONResponse(info_msg)
+    return Fast_JSON_Response(info_msg)
 
 # .....................................................................................................................
 
@@ -255,7 +257,7 @@ def oct_26_2020_route(request):
     no_cameras_to_move = (len(camera_folder_paths_list) == 0)
     if no_cameras_to_move:
         warning_message = {"warning": "No camera folders found to move! Update may already be complete"}
-        return JSONResponse(warning_message)
+        return Fast_JSON_Response(warning_message)
     
     try:
         
@@ -272,11 +274,11 @@ def oct_26_2020_route(request):
     except Exception as err:
         return_result = {"success": False, "error": str(err)}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def oct_28_2020_route(request):
+async def oct_28_2020_route(request):
     
     '''
     Route which removes 'serverlogs' entries from the database
@@ -291,19 +293,19 @@ def oct_28_2020_route(request):
     target_prefix = "serverlogs-"
     
     # Get all cameras
-    camera_names_list = get_camera_names_list(MCLIENT)
+    camera_names_list = await CAMERA_REGISTRY.get_camera_names_list()
     
     # Get all collection names, so we can check if there are any serverlogs to remove
     collections_removed_dict = {}
     for each_camera_name in camera_names_list:
         
         # Get all collections for the given camera and remove any with the target (server log) prefix
-        camera_collection_names_list = get_collection_names_list(MCLIENT, each_camera_name)
+        camera_collection_names_list = await get_collection_names_list(MCLIENT, each_camera_name)
         collections_removed_list = []
         for each_collection_name in camera_collection_names_list:
             is_serverlog_collection = each_collection_name.startswith(target_prefix)
             if is_serverlog_collection:
-                remove_camera_collection(MCLIENT, each_camera_name, each_collection_name)
+                await remove_camera_collection(MCLIENT, each_camera_name, each_collection_name)
                 collections_removed_list.append(each_collection_name)
         
         # Store all removed collections for reporting
@@ -312,7 +314,7 @@ def oct_28_2020_route(request):
     # Bundle results for feedback
     return_result = {"success": True, "collections_removed": collections_removed_dict}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
@@ -50,19 +50,28 @@ find_path_to_local()
 #%% Imports
 
 from time import perf_counter
-from shutil import rmtree
 
-from local.lib.mongo_helpers import MCLIENT, check_mongo_connection
-from local.lib.mongo_helpers import remove_camera_entry, get_camera_names_list
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.async_db_helpers import check_mongo_connection
+from local.lib.async_db_helpers import remove_camera_entry, get_camera_names_list
+from local.lib.camera_registry import CAMERA_REGISTRY
+from local.lib.index_manager import invalidate_index_cache
+from local.lib.newest_metadata_cache import NEWEST_METADATA_CACHE
+from local.lib.response_cache import GZIP_RESPONSE_CACHE
+from local.lib.image_store import IMAGE_STORE
+
+from local.routes.snapshots import SNAPSHOT_TIMELINE
 
 from local.lib.timekeeper_utils import get_local_datetime
 from local.lib.timekeeper_utils import datetime_to_isoformat_string, datetime_to_epoch_ms
 from local.lib.timekeeper_utils import epoch_ms_to_local_isoformat, isoformat_to_epoch_ms
 
-from local.lib.pathing import BASE_DATA_FOLDER_PATH, BASE_CAMERAS_FOLDER_PATH, GIT_READER, build_camera_data_path
+from local.lib.pathing import GIT_READER
 from local.lib.response_helpers import bad_request_response, not_allowed_response, calculate_time_taken_ms
+from local.lib.response_helpers import Fast_JSON_Response
 
-from starlette.responses import JSONResponse, HTMLResponse
+from starlette.responses import HTMLResponse
+from starlette.concurrency import run_in_threadpool
 from starlette.routing import Route
 
 
@@ -141,7 +150,7 @@ def check_git_version():
 
 # .....................................................................................................................
 
-def root_page(request):
+async def root_page(request):
     
     ''' Home page route. Meant to provide (rough) UI to inspect available data '''
     
@@ -150,7 +159,7 @@ def root_page(request):
     indent_by_4 = lambda message: indent_by_2(indent_by_2(message))
     
     # Request camera (database) names
-    camera_names_list = get_camera_names_list(MCLIENT, sort_names = True)
+    camera_names_list = await CAMERA_REGISTRY.get_camera_names_list(sort_names = True)
     
     # Build html for each camera to show some sample data
     cam_html_list = []
@@ -174,7 +183,7 @@ def root_page(request):
         cam_html_list += ["<h4>No camera data!</h4>"]
     
     # Add dbserver versioning info
-    version_is_valid, version_date_str, version_id_str = check_git_version()
+    version_is_valid, version_date_str, version_id_str = await run_in_threadpool(check_git_version)
     bad_version_entry = "<p>error getting version info!</p>"
     good_version_entry = "<p>version: {} ({})</p>".format(version_id_str, version_date_str)
     git_version_str = (good_version_entry if version_is_valid else bad_version_entry)
@@ -198,13 +207,13 @@ def root_page(request):
 
 # .....................................................................................................................
 
-def is_alive_check(request):
+async def is_alive_check(request):
     
     ''' Route used to check that this server is still up (before making a ton of requests for example) '''
     
-    mongo_is_connected, server_info_dict = check_mongo_connection(MCLIENT)
+    mongo_is_connected, server_info_dict = await check_mongo_connection(MCLIENT)
     
-    return JSONResponse({"dbserver": True, "mongo": mongo_is_connected})
+    return Fast_JSON_Response({"dbserver": True, "mongo": mongo_is_connected})
 
 # .....................................................................................................................
 
@@ -227,17 +236,17 @@ def get_dbserver_version(request):
                      "tags_list": commit_tags_list,
                      "commit_datetime_isoformat": isoformat_datetime}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def get_all_camera_names(request):
+async def get_all_camera_names(request):
     
     ''' Route which is intended to return a list of camera names '''
     
-    camera_names_list = get_camera_names_list(MCLIENT)
+    camera_names_list = await CAMERA_REGISTRY.get_camera_names_list()
     
-    return JSONResponse(camera_names_list)
+    return Fast_JSON_Response(camera_names_list)
 
 # .....................................................................................................................
 
@@ -256,7 +265,7 @@ def time_epoch_ms_to_datetime_isoformat(request):
         error_message = "Epoch ms value was too large!"
         return bad_request_response(error_message)
     
-    return JSONResponse(datetime_isoformat_str)
+    return Fast_JSON_Response(datetime_isoformat_str)
 
 # .....................................................................................................................
 
@@ -281,11 +290,11 @@ def time_datetime_isoformat_to_epoch_ms(request):
                          "    Got: {}".format(datetime_isoformat_str)]
         return bad_request_response(error_message)
     
-    return JSONResponse(epoch_ms)
+    return Fast_JSON_Response(epoch_ms)
 
 # .....................................................................................................................
 
-def remove_one_camera(request):
+async def remove_one_camera(request):
     
     ''' Nuclear route. Completely removes a camera (+ image data) from the system '''
     
@@ -306,23 +315,25 @@ def remove_one_camera(request):
     # Start timing
     t_start = perf_counter()
     
-    # Get camera (file system) data pathing
-    camera_data_folder_path = build_camera_data_path(BASE_DATA_FOLDER_PATH, camera_select)
-    
     # Check if camera is in our list
-    camera_names_before_list = get_camera_names_list(MCLIENT)
+    camera_names_before_list = await get_camera_names_list(MCLIENT)
     camera_in_mongo_before = (camera_select in camera_names_before_list)
-    camera_in_image_storage_before = (os.path.exists(camera_data_folder_path))
+    camera_in_image_storage_before = (camera_select in await run_in_threadpool(IMAGE_STORE.list_cameras))
     camera_exists_before = (camera_in_mongo_before or camera_in_image_storage_before)
     
     # Wipe out entire camera database and data folder, if possible
-    remove_camera_entry(MCLIENT, camera_select)
-    rmtree(camera_data_folder_path, ignore_errors = True)
-    
-    # Check if the camera has been removed
-    camera_names_after_list = get_camera_names_list(MCLIENT)
+    await remove_camera_entry(MCLIENT, camera_select)
+    await run_in_threadpool(IMAGE_STORE.delete_camera, camera_select)
+    invalidate_index_cache(camera_select)
+    SNAPSHOT_TIMELINE.invalidate(camera_select)
+    NEWEST_METADATA_CACHE.invalidate(camera_select)
+    GZIP_RESPONSE_CACHE.invalidate(camera_select)
+    CAMERA_REGISTRY.remove_camera(camera_select)
+    
+    # Check if the camera has been removed (directly from the db, not the camera registry)
+    camera_names_after_list = await get_camera_names_list(MCLIENT)
     camera_in_mongo_after = (camera_select in camera_names_after_list)
-    camera_in_image_storage_after = (os.path.exists(camera_data_folder_path))
+    camera_in_image_storage_after = (camera_select in await run_in_threadpool(IMAGE_STORE.list_cameras))
     camera_exists_after = (camera_in_mongo_after or camera_in_image_storage_after)
     
     # End timing
@@ -334,11 +345,11 @@ def remove_one_camera(request):
                      "camera_exists_after": camera_exists_after,
                      "time_taken_ms": time_taken_ms}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def remove_all_cameras(request):
+async def remove_all_cameras(request):
     
     ''' Extra-nuclear option!!! Completely removes all data from mongo and image data from storage '''
     
@@ -354,14 +365,19 @@ def remove_all_cameras(request):
     t_start = perf_counter()
     
     # Clear all database entries, except the system ones
-    camera_names_list = get_camera_names_list(MCLIENT)
+    camera_names_list = await get_camera_names_list(MCLIENT)
     for each_camera_name in camera_names_list:
-        remove_camera_entry(MCLIENT, each_camera_name)
-    
-    # Delete cameras folder (but re-create an empty folder)
-    cameras_removed_list = os.listdir(BASE_CAMERAS_FOLDER_PATH)
-    rmtree(BASE_CAMERAS_FOLDER_PATH, ignore_errors = True)
-    os.makedirs(BASE_CAMERAS_FOLDER_PATH, exist_ok = True)
+        await remove_camera_entry(MCLIENT, each_camera_name)
+        CAMERA_REGISTRY.remove_camera(each_camera_name)
+    invalidate_index_cache()
+    SNAPSHOT_TIMELINE.invalidate()
+    NEWEST_METADATA_CACHE.invalidate()
+    GZIP_RESPONSE_CACHE.invalidate()
+    
+    # Delete all stored image data
+    cameras_removed_list = await run_in_threadpool(IMAGE_STORE.list_cameras)
+    for each_camera_name in cameras_removed_list:
+        await run_in_threadpool(IMAGE_STORE.delete_camera, each_camera_name)
     
     # End timing
     t_end = perf_counter()
@@ -372,7 +388,7 @@ def remove_all_cameras(request):
                      "cameras_removed": cameras_removed_list,
                      "time_taken_ms": time_taken_ms}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
@@ -51,15 +51,28 @@ find_path_to_local()
 
 from time import perf_counter
 
-from local.lib.mongo_helpers import MCLIENT, check_collection_indexing, set_collection_indexing
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.async_db_helpers import run_in_db_executor, run_query_to_list
+from local.lib.newest_metadata_cache import NEWEST_METADATA_CACHE
+from local.lib.async_db_helpers import check_collection_indexing, set_collection_indexing
+from local.lib.index_manager import declare_required_indexes, ensure_collection_indexes
+from local.lib.ingest_helpers import run_in_ingest_executor
+from local.lib.write_behind import WRITE_BEHIND_BUFFER
+
+from local.lib.time_bucket_helpers import TIME_BUCKET_KEYS_TO_INDEX
+from local.lib.time_bucket_helpers import build_time_bucket_entries, post_time_bucket_entries, rebuild_time_buckets
+from local.lib.time_bucket_helpers import get_bucketed_since_ems, init_bucketed_since_ems
+from local.lib.time_bucket_helpers import find_ids_by_time_range_from_buckets, count_ids_by_time_range_from_buckets
 
 from local.lib.query_helpers import url_time_to_epoch_ms, start_end_times_to_epoch_ms
-from local.lib.query_helpers import get_all_ids, get_one_metadata, get_newest_metadata
-from local.lib.query_helpers import get_many_metadata_in_id_range
+from local.lib.async_db_helpers import get_all_ids, get_one_metadata
+from local.lib.async_db_helpers import get_many_metadata_in_id_range
 
-from local.lib.response_helpers import bad_request_response, no_data_response
+from local.lib.response_helpers import bad_request_response, no_data_response, Streaming_JSON_Response
+from local.lib.response_helpers import gzip_cached_response
+from local.lib.response_cache import GZIP_RESPONSE_CACHE
+from local.lib.response_helpers import Fast_JSON_Response, Int_List_JSON_Response
 
-from starlette.responses import JSONResponse
 from starlette.routing import Route
 
 from pymongo import ASCENDING, DESCENDING
@@ -75,6 +88,17 @@ def get_target_time_query_filter(target_ems):
 
 # .....................................................................................................................
 
+def get_unbucketed_time_range_query_filter(start_ems, end_ems, bucketed_since_ems):
+    
+    ''' Helper used to build a time range query for objects which aren't guaranteed to have time bucket data '''
+    
+    filter_dict = get_time_range_query_filter(start_ems, end_ems)
+    filter_dict[FINAL_EPOCH_MS_FIELD]["$lte"] = bucketed_since_ems
+    
+    return filter_dict
+
+# .....................................................................................................................
+
 def get_time_range_query_filter(start_ems, end_ems):
     return {FIRST_EPOCH_MS_FIELD: {"$lt": end_ems}, FINAL_EPOCH_MS_FIELD: {"$gt": start_ems}}
 
@@ -108,7 +132,104 @@ def find_by_time_range(collection_ref, start_ems, end_ems, *, return_ids_only, a
 
 # .....................................................................................................................
 
-def get_start_end_bounding_ems(collection_ref, object_ids_list):
+def find_ids_by_target_time(collection_ref, target_ems, *, ascending_order = True):
+    
+    '''
+    Helper used to get a (sorted) list of object ids at a target time
+    Sorting is done here rather than in the db, so that the query can be fully 'covered' by the compound indexes
+    (i.e. the db doesn't need to load any documents or perform an in-memory sort)
+    Note: this is a blocking call, which iterates through the entire query result!
+    '''
+    
+    # Build query, with projection matching the index-covered id field
+    filter_dict = get_target_time_query_filter(target_ems)
+    projection_dict = {OBJ_ID_FIELD: 1}
+    
+    # Request data from the db & sort the ids ourself
+    query_result = collection_ref.find(filter_dict, projection_dict)
+    ids_list = sorted((each_entry[OBJ_ID_FIELD] for each_entry in query_result), reverse = (not ascending_order))
+    
+    return ids_list
+
+# .....................................................................................................................
+
+def find_ids_by_time_range(collection_ref, start_ems, end_ems, *, ascending_order = True):
+    
+    '''
+    Helper used to get a (sorted) list of object ids within a time range
+    Works the same way as the target time version (see find_ids_by_target_time(...))
+    '''
+    
+    # Build query, with projection matching the index-covered id field
+    filter_dict = get_time_range_query_filter(start_ems, end_ems)
+    projection_dict = {OBJ_ID_FIELD: 1}
+    
+    # Request data from the db & sort the ids ourself
+    query_result = collection_ref.find(filter_dict, projection_dict)
+    ids_list = sorted((each_entry[OBJ_ID_FIELD] for each_entry in query_result), reverse = (not ascending_order))
+    
+    return ids_list
+
+# .....................................................................................................................
+
+def find_ids_by_time_range_bucketed(collection_ref, bucket_collection_ref, start_ems, end_ems, *,
+                                    ascending_order = True):
+    
+    '''
+    Helper used to get a (sorted) list of object ids within a time range, using the time bucket (side) collection
+    Avoids scanning all objects that start before (or end after) the range, which is slow for long time ranges
+    Objects ending before bucketing started (e.g. stored before an upgrade) are found using the regular query
+    Note: this is a blocking call!
+    '''
+    
+    # Use regular query if the camera has never been bucketed
+    bucketed_since_ems = get_bucketed_since_ems(bucket_collection_ref)
+    if bucketed_since_ems is None:
+        return find_ids_by_time_range(collection_ref, start_ems, end_ems, ascending_order = ascending_order)
+    
+    # Get ids for objects ending after bucketing started, which are guaranteed to be bucketed
+    ids_list = find_ids_by_time_range_from_buckets(bucket_collection_ref, start_ems, end_ems,
+                                                   ended_after_ems = bucketed_since_ems,
+                                                   ascending_order = ascending_order)
+    
+    # Add ids for older objects, which may not have been bucketed (no overlap with bucketed ids)
+    need_unbucketed_ids = (bucketed_since_ems > start_ems)
+    if need_unbucketed_ids:
+        filter_dict = get_unbucketed_time_range_query_filter(start_ems, end_ems, bucketed_since_ems)
+        query_result = collection_ref.find(filter_dict, {OBJ_ID_FIELD: 1})
+        ids_list.extend(each_entry[OBJ_ID_FIELD] for each_entry in query_result)
+        ids_list.sort(reverse = (not ascending_order))
+    
+    return ids_list
+
+# .....................................................................................................................
+
+def count_by_time_range_bucketed(collection_ref, bucket_collection_ref, start_ems, end_ems):
+    
+    '''
+    Helper used to count the number of objects within a time range, using the time bucket (side) collection
+    Counting is done entirely in the db. Follows the same bucketed/unbucketed split as the id lookup
+    Note: this is a blocking call!
+    '''
+    
+    # Use regular count if the camera has never been bucketed
+    bucketed_since_ems = get_bucketed_since_ems(bucket_collection_ref)
+    if bucketed_since_ems is None:
+        return collection_ref.count_documents(get_time_range_query_filter(start_ems, end_ems))
+    
+    # Count bucketed objects, along with older objects that may not have been bucketed
+    num_objects = count_ids_by_time_range_from_buckets(bucket_collection_ref, start_ems, end_ems,
+                                                       ended_after_ems = bucketed_since_ems)
+    need_unbucketed_count = (bucketed_since_ems > start_ems)
+    if need_unbucketed_count:
+        filter_dict = get_unbucketed_time_range_query_filter(start_ems, end_ems, bucketed_since_ems)
+        num_objects += collection_ref.count_documents(filter_dict)
+    
+    return num_objects
+
+# .....................................................................................................................
+
+async def get_start_end_bounding_ems(collection_ref, object_ids_list):
     
     ''' Helper function used to find the start/end bounding times of a given list of object ids '''
     
@@ -119,7 +240,7 @@ def get_start_end_bounding_ems(collection_ref, object_ids_list):
     # Find the first valid object to use for the initial start/end ems values
     sorted_id_list = sorted(object_ids_list)
     for k, each_obj_id in enumerate(sorted_id_list):
-        first_obj_md = get_one_metadata(collection_ref, OBJ_ID_FIELD, each_obj_id)
+        first_obj_md = await get_one_metadata(collection_ref, OBJ_ID_FIELD, each_obj_id)
         if first_obj_md is not None:
             break
     
@@ -136,7 +257,7 @@ def get_start_end_bounding_ems(collection_ref, object_ids_list):
     for each_obj_id in sorted_id_list[search_idx:]:
         
         # Skip bad object ids
-        each_obj_md = get_one_metadata(collection_ref, OBJ_ID_FIELD, each_obj_id)
+        each_obj_md = await get_one_metadata(collection_ref, OBJ_ID_FIELD, each_obj_id)
         if each_obj_md is None:
             continue
         
@@ -151,46 +272,115 @@ def get_start_end_bounding_ems(collection_ref, object_ids_list):
 # .....................................................................................................................
 
 
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Create time bucket helpers
+
+# .....................................................................................................................
+
+def post_stored_object_time_buckets(collection_ref, bucket_collection_ref, object_metadata_list, all_inserted):
+    
+    '''
+    Helper which writes time bucket entries for object data that has been stored in the db
+    If not all of the given data was inserted (e.g. duplicates), the stored timing is read back from the db,
+    so that bucket entries always match what is actually stored
+    Note: this is a blocking call!
+    '''
+    
+    # Replace the given data with whatever is actually stored, if needed
+    if not all_inserted:
+        ids_list = [each_entry[OBJ_ID_FIELD] for each_entry in object_metadata_list if OBJ_ID_FIELD in each_entry]
+        projection_dict = {OBJ_ID_FIELD: 1, FIRST_EPOCH_MS_FIELD: 1, FINAL_EPOCH_MS_FIELD: 1}
+        object_metadata_list = list(collection_ref.find({OBJ_ID_FIELD: {"$in": ids_list}}, projection_dict))
+    
+    # Bail if there's nothing to bucket
+    bucket_entries_list = build_time_bucket_entries(object_metadata_list,
+                                                    OBJ_ID_FIELD, FIRST_EPOCH_MS_FIELD, FINAL_EPOCH_MS_FIELD)
+    if not bucket_entries_list:
+        return 0
+    
+    # Make sure we have a record of when bucketing started, so older (unbucketed) data can still be found
+    init_bucketed_since_ems(collection_ref, bucket_collection_ref, FINAL_EPOCH_MS_FIELD)
+    
+    return post_time_bucket_entries(bucket_collection_ref, bucket_entries_list)
+
+# .....................................................................................................................
+
+async def post_object_time_buckets(camera_select, object_metadata_list, all_inserted = True):
+    
+    '''
+    Function used to record object data in the time bucket (side) collection
+    Should be called whenever new object data is stored, so that time range lookups stay in sync with the data
+    Must only be called after the data is in the db. If some of the data may not have been inserted
+    (e.g. due to duplicates), 'all_inserted' should be False, so that only stored data is bucketed
+    Returns:
+        num_bucket_entries_added
+    '''
+    
+    # Bail if there's nothing to bucket
+    if not object_metadata_list:
+        return 0
+    
+    # Make sure bucket indexing is in place (needed for efficient upserts), then write the bucket entries
+    await ensure_collection_indexes(MCLIENT, camera_select, TIMEBUCKET_COLLECTION_NAME)
+    collection_ref = get_object_collection(camera_select)
+    bucket_collection_ref = get_object_timebucket_collection(camera_select)
+    num_added = await run_in_ingest_executor(post_stored_object_time_buckets,
+                                             collection_ref, bucket_collection_ref, object_metadata_list, all_inserted)
+    
+    return num_added
+
+# .....................................................................................................................
+
+async def post_flushed_object_time_buckets(camera_select, object_metadata_list):
+    
+    ''' Write-behind flush listener, used to bucket buffered object data once it's in the db '''
+    
+    return await post_object_time_buckets(camera_select, object_metadata_list, all_inserted = False)
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Create object routes
 
 # .....................................................................................................................
 
-def objects_get_newest_metadata(request):
+async def objects_get_newest_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
-    # Get data from db
-    collection_ref = get_object_collection(camera_select)
-    no_newest_metadata, metadata_dict = get_newest_metadata(collection_ref, FINAL_EPOCH_MS_FIELD)
+    # Get data from the newest-metadata cache (only hits the db if the cached entry is missing or expired)
+    no_newest_metadata, metadata_dict = \
+        await NEWEST_METADATA_CACHE.get_newest_metadata(camera_select, COLLECTION_NAME, FINAL_EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_newest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
 
-def objects_get_all_ids(request):
+async def objects_get_all_ids(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
     # Request data from the db
     collection_ref = get_object_collection(camera_select)
-    query_result = get_all_ids(collection_ref)
+    query_result = await get_all_ids(collection_ref)
     
     # Pull out the ID into a list, instead of returning a list of dictionaries
     return_result = [each_entry[OBJ_ID_FIELD] for each_entry in query_result]
     
-    return JSONResponse(return_result)
+    return Int_List_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def objects_get_ids_at_target_time(request):
+async def objects_get_ids_at_target_time(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -199,16 +389,13 @@ def objects_get_ids_at_target_time(request):
     
     # Request data from the db
     collection_ref = get_object_collection(camera_select)
-    query_result = find_by_target_time(collection_ref, target_ems, return_ids_only = True)
+    return_result = await run_in_db_executor(find_ids_by_target_time, collection_ref, target_ems)
     
-    # Convert to list of ids only
-    return_result = [each_entry[OBJ_ID_FIELD] for each_entry in query_result]
-    
-    return JSONResponse(return_result)
+    return Int_List_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def objects_get_ids_by_time_range(request):
+async def objects_get_ids_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -220,16 +407,15 @@ def objects_get_ids_by_time_range(request):
     
     # Request data from the db
     collection_ref = get_object_collection(camera_select)
-    query_result = find_by_time_range(collection_ref, start_ems, end_ems, return_ids_only = True)
-    
-    # Pull out the epoch values into a list, instead of returning a list of dictionaries
-    return_result = [each_entry[OBJ_ID_FIELD] for each_entry in query_result]
+    bucket_collection_ref = get_object_timebucket_collection(camera_select)
+    return_result = await run_in_db_executor(find_ids_by_time_range_bucketed,
+                                             collection_ref, bucket_collection_ref, start_ems, end_ems)
     
-    return JSONResponse(return_result)
+    return Int_List_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def objects_get_one_metadata_by_id(request):
+async def objects_get_one_metadata_by_id(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -237,18 +423,18 @@ def objects_get_one_metadata_by_id(request):
     
     # Request data from the db
     collection_ref = get_object_collection(camera_select)
-    query_result = get_one_metadata(collection_ref, OBJ_ID_FIELD, object_full_id)
+    query_result = await get_one_metadata(collection_ref, OBJ_ID_FIELD, object_full_id)
     
     # Deal with missing data
     if not query_result:
         error_message = "No object with id {}".format(object_full_id)
         return bad_request_response(error_message)
     
-    return JSONResponse(query_result)
+    return Fast_JSON_Response(query_result)
 
 # .....................................................................................................................
 
-def objects_get_many_metadata_by_id_range(request):
+async def objects_get_many_metadata_by_id_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -260,13 +446,13 @@ def objects_get_many_metadata_by_id_range(request):
     
     # Request data from the db
     collection_ref = get_object_collection(camera_select)
-    query_result = get_many_metadata_in_id_range(collection_ref, start_obj_id, end_obj_id)
+    query_result = await get_many_metadata_in_id_range(collection_ref, start_obj_id, end_obj_id)
     
-    return JSONResponse(query_result)
+    return Fast_JSON_Response(query_result)
 
 # .....................................................................................................................
 
-def objects_get_many_metadata_at_target_time(request):
+async def objects_get_many_metadata_at_target_time(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -275,16 +461,16 @@ def objects_get_many_metadata_at_target_time(request):
     
     # Request data from the db
     collection_ref = get_object_collection(camera_select)
-    query_result = find_by_target_time(collection_ref, target_ems, return_ids_only = False)
+    query_result = await run_query_to_list(find_by_target_time, collection_ref, target_ems, return_ids_only = False)
     
     # Convert to dictionary, with object ids as keys
     return_result = {each_result[OBJ_ID_FIELD]: each_result for each_result in query_result}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def objects_get_many_metadata_by_time_range(request):
+async def objects_get_many_metadata_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -294,18 +480,22 @@ def objects_get_many_metadata_by_time_range(request):
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
     
-    # Request data from the db
+    # Re-use the (already gzipped) response for historical time ranges, if available
+    gzip_cache_key = GZIP_RESPONSE_CACHE.get_cache_key(request, camera_select, end_ems)
+    gzip_bytes = GZIP_RESPONSE_CACHE.get(gzip_cache_key)
+    if gzip_bytes is not None:
+        return gzip_cached_response(gzip_bytes)
+    
+    # Build the db query (no data is requested until the response is streamed)
     collection_ref = get_object_collection(camera_select)
     query_result = find_by_time_range(collection_ref, start_ems, end_ems, return_ids_only = False)
     
-    # Convert to dictionary, with object ids as keys
-    return_result = {each_result[OBJ_ID_FIELD]: each_result for each_result in query_result}
-    
-    return JSONResponse(return_result)
+    # Stream results out as a dictionary, with object ids as keys, so we don't need to hold everything in memory
+    return Streaming_JSON_Response(query_result, key_field = OBJ_ID_FIELD, gzip_cache_key = gzip_cache_key)
 
 # .....................................................................................................................
 
-def objects_count_at_target_time(request):
+async def objects_count_at_target_time(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -318,16 +508,16 @@ def objects_count_at_target_time(request):
     
     # Request data from the db
     collection_ref = get_object_collection(camera_select)
-    query_result = collection_ref.count_documents(query_dict, projection_dict)
+    query_result = await run_in_db_executor(collection_ref.count_documents, query_dict, projection_dict)
     
     # Convert to dictionary with count
     return_result = {"count": int(query_result)}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def objects_count_by_time_range(request):
+async def objects_count_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -337,22 +527,20 @@ def objects_count_by_time_range(request):
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
     
-    # Build query
-    query_dict = get_time_range_query_filter(start_ems, end_ems)
-    projection_dict = None
-    
-    # Request data from the db
+    # Count using (bucketed) data, since this is much faster than counting overlaps directly
     collection_ref = get_object_collection(camera_select)
-    query_result = collection_ref.count_documents(query_dict, projection_dict)
+    bucket_collection_ref = get_object_timebucket_collection(camera_select)
+    query_result = await run_in_db_executor(count_by_time_range_bucketed,
+                                            collection_ref, bucket_collection_ref, start_ems, end_ems)
     
     # Convert to dictionary with count
     return_result = {"count": int(query_result)}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def objects_set_indexing(request):
+async def objects_set_indexing(request):
     
     ''' 
     Hacky function... Used to manually set object timing indexes for a specified camera.
@@ -367,13 +555,13 @@ def objects_set_indexing(request):
     t_start = perf_counter()
     
     # First check if the index is already set
-    indexes_already_set = check_collection_indexing(collection_ref, KEYS_TO_INDEX)
+    indexes_already_set = await check_collection_indexing(collection_ref, KEYS_TO_INDEX)
     if indexes_already_set:
         return_result = {"already_set": True, "indexes": KEYS_TO_INDEX}
-        return JSONResponse(return_result)
+        return Fast_JSON_Response(return_result)
     
     # Set indexes on target fields if we haven't already
-    mongo_response_list = set_collection_indexing(collection_ref, KEYS_TO_INDEX)
+    mongo_response_list = await set_collection_indexing(collection_ref, KEYS_TO_INDEX)
     
     # End timing
     t_end = perf_counter()
@@ -384,7 +572,41 @@ def objects_set_indexing(request):
                      "time_taken_ms": time_taken_ms,
                      "mongo_response_list": mongo_response_list}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
+
+# .....................................................................................................................
+
+async def objects_rebuild_time_buckets(request):
+    
+    '''
+    Hacky function... Used to manually (re-)build the object time bucket data for a specified camera.
+    Only needed for object data stored before time bucketing existed. Can be slow on cameras with lots of data!
+    '''
+    
+    # Get selected camera & corresponding collections
+    camera_select = request.path_params["camera_select"]
+    collection_ref = get_object_collection(camera_select)
+    bucket_collection_ref = get_object_timebucket_collection(camera_select)
+    
+    # Start timing
+    t_start = perf_counter()
+    
+    # Generate bucket data from all existing object data
+    await ensure_collection_indexes(MCLIENT, camera_select, TIMEBUCKET_COLLECTION_NAME)
+    num_processed, num_added = \
+        await run_in_db_executor(rebuild_time_buckets, collection_ref, bucket_collection_ref,
+                                 OBJ_ID_FIELD, FIRST_EPOCH_MS_FIELD, FINAL_EPOCH_MS_FIELD)
+    
+    # End timing
+    t_end = perf_counter()
+    time_taken_ms = int(round(1000 * (t_end - t_start)))
+    
+    # Build response for debugging
+    return_result = {"num_objects": num_processed,
+                     "num_bucket_entries_added": num_added,
+                     "time_taken_ms": time_taken_ms}
+    
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
@@ -400,6 +622,11 @@ def get_object_collection(camera_select):
 
 # .....................................................................................................................
 
+def get_object_timebucket_collection(camera_select):
+    return MCLIENT[camera_select][TIMEBUCKET_COLLECTION_NAME]
+
+# .....................................................................................................................
+
 def build_object_routes():
     
     # Bundle all object routes
@@ -437,7 +664,10 @@ def build_object_routes():
                objects_count_by_time_range),
      
      Route(url("set-indexing"),
-               objects_set_indexing)
+               objects_set_indexing),
+     
+     Route(url("rebuild-time-buckets"),
+               objects_rebuild_time_buckets)
     ]
     
     return object_routes
@@ -454,12 +684,25 @@ OBJ_ID_FIELD = "_id"
 FIRST_EPOCH_MS_FIELD = "first_epoch_ms"
 FINAL_EPOCH_MS_FIELD = "final_epoch_ms"
 
-# Hard-code the list of keys that need indexing
-KEYS_TO_INDEX = [FIRST_EPOCH_MS_FIELD, FINAL_EPOCH_MS_FIELD]
+# Hard-code the list of (compound) indexes needed for efficient time-range queries
+# -> Having both first/final orderings lets the db pick whichever bound is most selective for a given query
+# -> Including the id field means that id-only queries are fully 'covered' by the index (no documents loaded)
+KEYS_TO_INDEX = [[(FINAL_EPOCH_MS_FIELD, ASCENDING), (FIRST_EPOCH_MS_FIELD, ASCENDING), (OBJ_ID_FIELD, ASCENDING)],
+                 [(FIRST_EPOCH_MS_FIELD, ASCENDING), (FINAL_EPOCH_MS_FIELD, ASCENDING), (OBJ_ID_FIELD, ASCENDING)]]
 
 # Set name of collection, which determines url routing + storage on mongoDB
 COLLECTION_NAME = "objects"
 
+# Set name of the (side) collection used to store object ids by time bucket, for fast time range lookups
+TIMEBUCKET_COLLECTION_NAME = "{}_timebuckets".format(COLLECTION_NAME)
+
+# Register indexing requirements, so indexes can be set automatically
+declare_required_indexes(COLLECTION_NAME, KEYS_TO_INDEX)
+declare_required_indexes(TIMEBUCKET_COLLECTION_NAME, TIME_BUCKET_KEYS_TO_INDEX)
+
+# Keep time buckets in sync with object data written by the write-behind buffer
+WRITE_BEHIND_BUFFER.add_flush_listener(COLLECTION_NAME, post_flushed_object_time_buckets)
+
 
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Demo
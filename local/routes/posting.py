@@ -49,18 +49,32 @@ find_path_to_local()
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Imports
 
-from local.lib.mongo_helpers import MCLIENT, post_many_to_mongo, check_collection_indexing, set_collection_indexing
-from local.lib.response_helpers import post_success_response, not_allowed_response, bad_request_response
+import asyncio
+
+from tarfile import TarError
 
-from local.lib.pathing import BASE_DATA_FOLDER_PATH, build_image_pathing
+from local.lib.environment import get_env_write_behind_enabled
+
+from local.lib.mongo_helpers import MCLIENT, convert_to_many
+from local.lib.write_behind import WRITE_BEHIND_BUFFER
+from local.lib.newest_metadata_cache import NEWEST_METADATA_CACHE
+from local.lib.camera_registry import CAMERA_REGISTRY
+from local.lib.index_manager import ensure_collection_indexes
+from local.lib.ingest_helpers import ingest_many_to_mongo, check_image_exists, save_image_data
+from local.lib.ingest_helpers import save_many_images_from_tar, remove_image_data
+from local.lib.ingest_helpers import run_in_ingest_executor, ingest_one_to_mongo, unpack_metadata_and_image_data
+from local.lib.response_helpers import post_success_response, not_allowed_response, bad_request_response
+from local.lib.response_cache import GZIP_RESPONSE_CACHE
 
 from starlette.routing import Route
 
-from local.routes.objects import get_object_collection
-from local.routes.objects import KEYS_TO_INDEX as OBJ_KEYS_TO_INDEX
+from local.routes.objects import COLLECTION_NAME as OBJ_COLLECTION_NAME
+from local.routes.objects import post_object_time_buckets
+from local.routes.stations import COLLECTION_NAME as STN_COLLECTION_NAME
 
-from local.routes.stations import get_station_collection
-from local.routes.stations import KEYS_TO_INDEX as STN_KEYS_TO_INDEX
+from local.routes.snapshots import get_snapshot_collection, add_to_snapshot_timeline
+from local.routes.snapshots import COLLECTION_NAME as SNAP_COLLECTION_NAME
+from local.routes.snapshots import EPOCH_MS_FIELD as SNAP_EPOCH_MS_FIELD
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -74,8 +88,30 @@ async def post_metadata_by_collection(request, collection_name):
     camera_select = request.path_params["camera_select"]
     post_data_json = await request.json()
     
+    # Queue up high-frequency metadata for (bulk) writing later on, if enabled (off by default)
+    # -> Note that this means duplicate entries won't be reported & data isn't readable until it's flushed!
+    use_write_behind = (ENABLE_WRITE_BEHIND and collection_name in WRITE_BEHIND_COLLECTIONS)
+    if use_write_behind:
+        await WRITE_BEHIND_BUFFER.queue_many(camera_select, collection_name, post_data_json)
+        return post_success_response()
+    
     # Send metadata to mongo
-    post_success, mongo_response = post_many_to_mongo(MCLIENT, camera_select, collection_name, post_data_json)
+    post_success, mongo_response = await ingest_many_to_mongo(MCLIENT, camera_select, collection_name, post_data_json)
+    
+    # Keep the camera listing, caches, object time buckets & snapshot timeline up to date
+    # -> Duplicate errors still insert all non-duplicate entries
+    # -> Storing data creates the camera database (if it doesn't exist already), so the camera must be listed
+    is_duplicate_error = (mongo_response.get("error", None) == "bulk write error")
+    if post_success or is_duplicate_error:
+        post_data_list = convert_to_many(post_data_json)
+        CAMERA_REGISTRY.add_camera(camera_select)
+        NEWEST_METADATA_CACHE.update_newest_metadata(camera_select, collection_name, post_data_list,
+                                                     all_inserted = post_success)
+        GZIP_RESPONSE_CACHE.invalidate_for_new_data(camera_select, post_data_list)
+        if collection_name == OBJ_COLLECTION_NAME:
+            await post_object_time_buckets(camera_select, post_data_list, all_inserted = post_success)
+        if collection_name == SNAP_COLLECTION_NAME:
+            add_to_snapshot_timeline(camera_select, post_data_list)
     
     # Return an error response if there was a problem posting
     # Hard-coded: assuming the issue is with duplicate entries
@@ -94,12 +130,9 @@ async def post_image_data_by_collection(request, collection_name):
     camera_select = request.path_params["camera_select"]
     image_epoch_ms = request.path_params["epoch_ms"]
     
-    # Generate the image file pathing, so we can first make sure the image doesn't already exist
-    image_save_path = build_image_pathing(BASE_DATA_FOLDER_PATH, camera_select, collection_name, image_epoch_ms,
-                                          create_folder_if_missing = True)
-    
-    # Return error if the image file has already been stored
-    if os.path.exists(image_save_path):
+    # Return error if the image has already been stored
+    image_already_exists = await check_image_exists(camera_select, collection_name, image_epoch_ms)
+    if image_already_exists:
         error_message = "Can't upload, image already exists ({})".format(image_epoch_ms)
         return not_allowed_response(error_message)
     
@@ -109,12 +142,55 @@ async def post_image_data_by_collection(request, collection_name):
         error_message = "No {} image data in body ({})".format(collection_name, image_epoch_ms)
         return bad_request_response(error_message)
     
-    # Save the data to the filesystem (not mongodb!)
-    with open(image_save_path, "wb") as out_file:
-        out_file.write(image_data)
+    # Save the data to the image store (not mongodb!)
+    image_saved = await save_image_data(camera_select, collection_name, image_epoch_ms, image_data)
+    if not image_saved:
+        error_message = "Can't upload, image already exists ({})".format(image_epoch_ms)
+        return not_allowed_response(error_message)
+    
+    # Clear any cached (historical) responses that the new image may belong to
+    GZIP_RESPONSE_CACHE.invalidate_for_new_data(camera_select, [int(image_epoch_ms)])
     
     return post_success_response(image_epoch_ms)
 
+# .....................................................................................................................
+
+async def post_many_image_data_by_collection(request, collection_name):
+    
+    '''
+    Function used to save many images from a single request
+    Expects the post body to contain a tar file, with image files named by epoch_ms value (e.g. 1600000000000.jpg)
+    Responds with the save status of every image in the tar file
+    '''
+    
+    # Get information from route url
+    camera_select = request.path_params["camera_select"]
+    
+    # Get the tar data from the post body
+    tar_data = await request.body()
+    if not tar_data:
+        error_message = "No {} tar data in body".format(collection_name)
+        return bad_request_response(error_message)
+    
+    # Unpack & save all images to the image store (not mongodb!)
+    try:
+        image_status_dict = await save_many_images_from_tar(camera_select, collection_name, tar_data)
+    except TarError as err:
+        error_message = "Error reading {} tar data ({})".format(collection_name, err)
+        return bad_request_response(error_message)
+    
+    # Clear any cached (historical) responses that the new images may belong to
+    # -> Saved images are always named by their epoch_ms value
+    saved_ems_list = [int(os.path.splitext(each_file_name)[0])
+                      for each_file_name, each_status in image_status_dict.items() if each_status == "saved"]
+    GZIP_RESPONSE_CACHE.invalidate_for_new_data(camera_select, saved_ems_list)
+    
+    # Report how many images were saved, along with the status of each image
+    num_saved = len(saved_ems_list)
+    additional_response_dict = {"num_saved": num_saved, "image_status": image_status_dict}
+    
+    return post_success_response(additional_response_dict = additional_response_dict)
+
 # .....................................................................................................................
 # .....................................................................................................................
 
@@ -133,20 +209,11 @@ async def post_camerainfo(request):
     # Use standard metadata posting
     post_response = await post_metadata_by_collection(request, collection_name)
     
-    # Try to set object indexing every time new camera info is posted
+    # Make sure object & station indexing is set every time new camera info is posted
     # (which should be infrequent, but indicates the camera has reset)
-    obj_collection_ref = get_object_collection(camera_select)
-    object_indexes_are_set = check_collection_indexing(obj_collection_ref, OBJ_KEYS_TO_INDEX)
-    if not object_indexes_are_set:
-        set_collection_indexing(obj_collection_ref, OBJ_KEYS_TO_INDEX)
-        #print("  --> Object indexing set for {}".format(camera_select))
-    
-    # Try to set station indexing every time new camera info is posted
-    stn_collection_ref = get_station_collection(camera_select)
-    station_indexes_are_set = check_collection_indexing(stn_collection_ref, STN_KEYS_TO_INDEX)
-    if not station_indexes_are_set:
-        set_collection_indexing(stn_collection_ref, STN_KEYS_TO_INDEX)
-        #print("  --> Station indexing set for {}".format(camera_select))
+    # -> Results are cached by the index manager, so this only hits the db once per camera
+    await ensure_collection_indexes(MCLIENT, camera_select, OBJ_COLLECTION_NAME)
+    await ensure_collection_indexes(MCLIENT, camera_select, STN_COLLECTION_NAME)
     
     return post_response
 
@@ -193,6 +260,8 @@ async def post_snapshot_metadata(request):
     # For clarity
     collection_name = "snapshots"
     
+    # Use standard metadata posting (which also keeps the snapshot timeline up to date)
+    # -> Write-behind data is added to the timeline once it's actually written (see snapshot routes)
     return await post_metadata_by_collection(request, collection_name)
 
 # .....................................................................................................................
@@ -219,6 +288,104 @@ async def post_snapshot_image_data(request):
     
     return await post_image_data_by_collection(request, collection_name)
 
+# .....................................................................................................................
+
+async def post_many_background_image_data(request):
+    
+    # For clarity
+    collection_name = "backgrounds"
+    
+    return await post_many_image_data_by_collection(request, collection_name)
+
+# .....................................................................................................................
+
+async def post_many_snapshot_image_data(request):
+    
+    # For clarity
+    collection_name = "snapshots"
+    
+    return await post_many_image_data_by_collection(request, collection_name)
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define combined routes
+
+# .....................................................................................................................
+
+async def post_snapshot_metadata_and_image_data(request):
+    
+    '''
+    Route used to save snapshot metadata & image data together, from a single request
+    Expects the post body to be formatted as:
+        [4 bytes: metadata size (N), big-endian] + [N bytes: json metadata] + [remaining bytes: jpg data]
+    If either the metadata or image data fails to save, the other is removed, so no orphaned data is left behind
+    '''
+    
+    # Get information from route url
+    camera_select = request.path_params["camera_select"]
+    
+    # Split the post body into metadata & image data
+    post_data = await request.body()
+    try:
+        metadata_dict, image_data = unpack_metadata_and_image_data(post_data)
+        snap_epoch_ms = int(metadata_dict[SNAP_EPOCH_MS_FIELD])
+    except (ValueError, KeyError, TypeError) as err:
+        error_message = "Error unpacking snapshot data ({})".format(err)
+        return bad_request_response(error_message)
+    
+    # Make sure we actually got image data
+    if not image_data:
+        error_message = "No snapshot image data in body ({})".format(snap_epoch_ms)
+        return bad_request_response(error_message)
+    
+    # Make sure the image doesn't already exist
+    image_already_exists = await check_image_exists(camera_select, SNAP_COLLECTION_NAME, snap_epoch_ms)
+    if image_already_exists:
+        error_message = "Can't upload, image already exists ({})".format(snap_epoch_ms)
+        return not_allowed_response(error_message)
+    
+    # Send metadata to mongo and save image data to the image store at the same time
+    insert_result, save_result = \
+        await asyncio.gather(ingest_one_to_mongo(MCLIENT, camera_select, SNAP_COLLECTION_NAME, metadata_dict),
+                             save_image_data(camera_select, SNAP_COLLECTION_NAME, snap_epoch_ms, image_data),
+                             return_exceptions = True)
+    post_success, mongo_response = insert_result
+    
+    # Only a True result means we saved the image. False means the image already exists (i.e. a concurrent upload)
+    image_saved = (save_result is True)
+    image_already_exists = (save_result is False)
+    
+    # If the metadata insert failed, remove our image so we don't end up with an orphaned file
+    # -> Images we didn't save must be left alone, since they belong to some other upload!
+    if not post_success:
+        if image_saved:
+            await remove_image_data(camera_select, SNAP_COLLECTION_NAME, snap_epoch_ms)
+        additional_response_dict = {"mongo_response": mongo_response}
+        error_message = "Error posting snapshot metadata. Entry likely exists already! ({})".format(snap_epoch_ms)
+        return not_allowed_response(error_message, additional_response_dict)
+    
+    # If the image wasn't saved, remove the metadata so we don't end up with orphaned (or mismatched) metadata
+    # -> The removed metadata may have been loaded as the newest entry in the meantime, so clear the cached copy
+    if not image_saved:
+        collection_ref = get_snapshot_collection(camera_select)
+        await run_in_ingest_executor(collection_ref.delete_one, {SNAP_EPOCH_MS_FIELD: snap_epoch_ms})
+        NEWEST_METADATA_CACHE.invalidate(camera_select, SNAP_COLLECTION_NAME)
+        if image_already_exists:
+            error_message = "Can't upload, image already exists ({})".format(snap_epoch_ms)
+            return not_allowed_response(error_message)
+        error_message = "Error saving snapshot image ({}): {}".format(snap_epoch_ms, save_result)
+        return bad_request_response(error_message)
+    
+    # Add new data to the snapshot timeline & newest metadata cache, and clear affected cached responses
+    add_to_snapshot_timeline(camera_select, [metadata_dict])
+    NEWEST_METADATA_CACHE.update_newest_metadata(camera_select, SNAP_COLLECTION_NAME, [metadata_dict])
+    GZIP_RESPONSE_CACHE.invalidate_for_new_data(camera_select, [metadata_dict])
+    CAMERA_REGISTRY.add_camera(camera_select)
+    
+    return post_success_response(snap_epoch_ms)
+
 # .....................................................................................................................
 # .....................................................................................................................
 
@@ -263,6 +430,18 @@ def build_posting_routes():
      
      Route(url("bdb", "image", "snapshots", "{epoch_ms:int}"),
                post_snapshot_image_data,
+               methods=["POST"]),
+     
+     Route(url("bdb", "many-images-tar", "backgrounds"),
+               post_many_background_image_data,
+               methods=["POST"]),
+     
+     Route(url("bdb", "many-images-tar", "snapshots"),
+               post_many_snapshot_image_data,
+               methods=["POST"]),
+     
+     Route(url("bdb", "metadata-and-image", "snapshots"),
+               post_snapshot_metadata_and_image_data,
                methods=["POST"])
     ]
     
@@ -275,7 +454,17 @@ def build_posting_routes():
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Global setup
 
-# Nothing!
+# Set up write-behind buffering (used to coalesce many small metadata posts into fewer, larger db writes)
+ENABLE_WRITE_BEHIND = get_env_write_behind_enabled()
+WRITE_BEHIND_COLLECTIONS = {"objects", "stations", "snapshots"}
+
+# Keep the camera listing, cached newest metadata & cached responses up to date as buffered data is written
+for each_collection_name in WRITE_BEHIND_COLLECTIONS:
+    WRITE_BEHIND_BUFFER.add_flush_listener(each_collection_name,
+                                           lambda camera_select, data_list: CAMERA_REGISTRY.add_camera(camera_select))
+    WRITE_BEHIND_BUFFER.add_flush_listener(each_collection_name,
+                                           NEWEST_METADATA_CACHE.build_flush_listener(each_collection_name))
+    WRITE_BEHIND_BUFFER.add_flush_listener(each_collection_name, GZIP_RESPONSE_CACHE.invalidate_for_new_data)
     
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -49,26 +49,135 @@ find_path_to_local()
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Imports
 
+import asyncio
 import tarfile
 import io
 import base64
 
+from functools import partial
+
 from local.lib.mongo_helpers import MCLIENT
+from local.lib.write_behind import WRITE_BEHIND_BUFFER
+from local.lib.timeline_cache import Epoch_Timeline_Cache
+from local.lib.async_db_helpers import run_in_db_executor
+from local.lib.newest_metadata_cache import NEWEST_METADATA_CACHE
 
 from local.lib.query_helpers import url_time_to_epoch_ms, start_end_times_to_epoch_ms
-from local.lib.query_helpers import get_one_metadata, get_oldest_metadata, get_newest_metadata
-from local.lib.query_helpers import get_many_metadata_in_time_range
-from local.lib.query_helpers import get_epoch_ms_list_in_time_range, get_count_in_time_range
-from local.lib.query_helpers import get_closest_metadata_before_target_ems, get_closest_metadata_after_target_ems
+from local.lib.async_db_helpers import get_one_metadata, get_oldest_metadata, get_newest_metadata
+from local.lib.async_db_helpers import get_closest_metadata_before_target_ems, get_closest_metadata_after_target_ems
+from local.lib.async_db_helpers import get_closest_metadata_by_target_ems
+
+from local.lib.response_helpers import no_data_response, bad_request_response, cors_image_response
+from local.lib.response_helpers import Streaming_JSON_Response, gzip_cached_response
+from local.lib.response_cache import GZIP_RESPONSE_CACHE
+from local.lib.response_helpers import Fast_JSON_Response, Int_List_JSON_Response
+from local.lib.query_helpers import get_epoch_ms_list_in_time_range as get_epoch_ms_list_in_time_range_blocking
+from local.lib.query_helpers import get_many_metadata_by_ids
+from local.lib.query_helpers import get_many_metadata_in_time_range as get_many_metadata_in_time_range_blocking
+from local.lib.image_store import IMAGE_STORE
+
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Route
 
-from local.lib.response_helpers import no_data_response, bad_request_response, cors_files_response
-from local.lib.query_helpers import first_of_query
-from local.lib.pathing import BASE_DATA_FOLDER_PATH, build_snapshot_image_pathing
 
-from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
-from starlette.routing import Route
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Create snapshot-specific query helpers
+
+# .....................................................................................................................
+
+def get_n_samples_index_list(num_samples_total, n_samples):
+    
+    ''' Helper used to pick out (evenly spaced) indices for n-samples out of a larger set of samples '''
+    
+    # Handle cases where there are fewer (or equal) results than the number of samples requested
+    if num_samples_total <= n_samples:
+        return list(range(num_samples_total))
+    
+    # Handle special case where only 1 sample is requested. We'll grab the middle one
+    if n_samples == 1:
+        middle_idx = int(num_samples_total / 2)
+        return [middle_idx]
+    
+    # Pick out n-samples from the full set of samples
+    step_factor = (num_samples_total - 1) / (n_samples - 1)
+    idx_list = [int(round(k * step_factor)) for k in range(n_samples)]
+    
+    return idx_list
+
+# .....................................................................................................................
+
+def get_skip_n_index_list(num_samples_total, skip_n):
+    
+    ''' Helper used to pick out the indices for every (skip_n + 1)-th sample, out of a larger set of samples '''
+    
+    # Handle cases with only 0, 1 or 2 entries (where we can't meaningfully skip samples)
+    if num_samples_total < 3:
+        return list(range(num_samples_total))
+    
+    # Make sure the skip value is positive, and get the subsample factor
+    skip_n = max(0, skip_n)
+    nth_subsample = 1 + skip_n
+    
+    # Figure out the best first-index offset, so we evenly place the subsamples
+    # For example, given a list: [1,2,3,4,5,6,7,8,9], skip 3
+    #   -> Simplest solution: [1, 4, 7]
+    #   ->   Better solution: [2, 5, 8]
+    subsample_extent = int(1 + nth_subsample * int((num_samples_total - 1) / nth_subsample))
+    first_index_offset = int((num_samples_total - subsample_extent) / 2)
+    idx_list = list(range(first_index_offset, num_samples_total, nth_subsample))
+    
+    return idx_list
+
+# .....................................................................................................................
 
-from pymongo import ASCENDING, DESCENDING
+def add_to_snapshot_timeline(camera_select, snapshot_metadata_list):
+    
+    '''
+    Helper used to add newly stored snapshots to the (in-memory) snapshot timeline
+    Should be called after snapshot metadata is written into the db
+    '''
+    
+    # Pull out epoch ms values, skipping bad entries
+    new_ems_list = []
+    for each_metadata_dict in snapshot_metadata_list:
+        try:
+            new_ems_list.append(int(each_metadata_dict[EPOCH_MS_FIELD]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    
+    SNAPSHOT_TIMELINE.add_epoch_ms(camera_select, new_ems_list)
+    
+    return
+
+# .....................................................................................................................
+
+def find_subsampled_metadata(collection_ref, start_ems, end_ems, index_select_func, *, ascending_order = True):
+    
+    '''
+    Helper used to get a subsampled set of snapshot metadata within a time range
+    Only the epoch ms values (which are covered by the id index) are loaded for the full time range,
+    full metadata is only loaded for the selected subsamples
+    The 'index_select_func' should take the total number of samples and return a list of indices to keep
+    Note: this is a blocking call!
+    '''
+    
+    # Get all epoch ms values in the time range, then pick out the ones we want to keep
+    epoch_ms_list = get_epoch_ms_list_in_time_range_blocking(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD,
+                                                             ascending_order)
+    selected_ems_list = [epoch_ms_list[each_idx] for each_idx in index_select_func(len(epoch_ms_list))]
+    
+    # Bail if there's nothing to load
+    if not selected_ems_list:
+        return []
+    
+    # Load full metadata for the selected samples only
+    query_result = get_many_metadata_by_ids(collection_ref, selected_ems_list, EPOCH_MS_FIELD, ascending_order)
+    
+    return list(query_result)
+
+# .....................................................................................................................
+# .....................................................................................................................
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -76,28 +185,30 @@ from pymongo import ASCENDING, DESCENDING
 
 # .....................................................................................................................
 
-def snap_get_newest_image(request):
+async def snap_get_newest_image(request):
         
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
-    # Get data from db
-    collection_ref = get_snapshot_collection(camera_select)
-    no_newest_metadata, metadata_dict = get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
+    # Get data from the newest-metadata cache (only hits the db if the cached entry is missing or expired)
+    no_newest_metadata, metadata_dict = \
+        await NEWEST_METADATA_CACHE.get_newest_metadata(camera_select, COLLECTION_NAME, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_newest_metadata:
         error_message = "No image data for {}".format(camera_select)
         return no_data_response(error_message)
     
-    # Build pathing to the file
+    # Make sure the image exists
     newest_ems = metadata_dict[EPOCH_MS_FIELD]
-    image_load_path = build_snapshot_image_pathing(BASE_DATA_FOLDER_PATH, camera_select, newest_ems)
-    if not os.path.exists(image_load_path):
+    # -> File system access is done on a thread, to avoid blocking the event loop
+    image_exists = await run_in_threadpool(IMAGE_STORE.exists, camera_select, COLLECTION_NAME, newest_ems)
+    if not image_exists:
         error_message = "No image at {}".format(newest_ems)
         return no_data_response(error_message)
     
-    return cors_files_response(image_load_path)
+    return await run_in_threadpool(cors_image_response,
+                                   request, camera_select, COLLECTION_NAME, newest_ems, is_immutable = False)
 
 # .....................................................................................................................
 
@@ -107,13 +218,12 @@ def snap_get_one_image(request):
     camera_select = request.path_params["camera_select"]
     target_ems = request.path_params["epoch_ms"]
     
-    # Build pathing to the file
-    image_load_path = build_snapshot_image_pathing(BASE_DATA_FOLDER_PATH, camera_select, target_ems)
-    if not os.path.exists(image_load_path):
+    # Make sure the image exists
+    if not IMAGE_STORE.exists(camera_select, COLLECTION_NAME, target_ems):
         error_message = "No image at {}".format(target_ems)
         return bad_request_response(error_message)
     
-    return cors_files_response(image_load_path)
+    return cors_image_response(request, camera_select, COLLECTION_NAME, target_ems)
 
 # .....................................................................................................................
 
@@ -123,21 +233,20 @@ def snap_get_one_b64_jpg(request):
     camera_select = request.path_params["camera_select"]
     target_ems = request.path_params["epoch_ms"]
     
-    # Build pathing to the file
-    image_load_path = build_snapshot_image_pathing(BASE_DATA_FOLDER_PATH, camera_select, target_ems)
-    if not os.path.exists(image_load_path):
+    # Load the image data
+    image_data = IMAGE_STORE.get(camera_select, COLLECTION_NAME, target_ems)
+    if image_data is None:
         error_message = "No image at {}".format(target_ems)
         return bad_request_response(error_message)
     
-    # Load the image file and convert to base64
-    with open(image_load_path, "rb") as image_data:
-        b64_image = base64.b64encode(image_data.read())
+    # Convert to base64
+    b64_image = base64.b64encode(image_data)
     
     return PlainTextResponse(b64_image)
 
 # .....................................................................................................................
 
-def snap_get_many_images_as_tar_by_time_range(request):
+async def snap_get_many_images_as_tar_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -147,25 +256,14 @@ def snap_get_many_images_as_tar_by_time_range(request):
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
     
-    # Get data from db
-    collection_ref = get_snapshot_collection(camera_select)
-    epoch_ms_list = get_epoch_ms_list_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    # Get data from the timeline
+    epoch_ms_list = await SNAPSHOT_TIMELINE.get_epoch_ms_list_in_time_range(camera_select, start_ems, end_ems)
     
-    # Create in-memory storage for tarfile data
-    tar_in_memory = io.BytesIO()
-    with tarfile.open(fileobj = tar_in_memory, mode = "w") as out_file:
-    
-        # Try to bundle all snapshots into a single tar file
-        for each_snap_ems in epoch_ms_list:
-            image_load_path = build_snapshot_image_pathing(BASE_DATA_FOLDER_PATH, camera_select, each_snap_ems)
-            if not os.path.exists(image_load_path):
-                error_message = "No image for epoch: {}".format(each_snap_ems)
-                return bad_request_response(error_message)
-            save_name = os.path.basename(image_load_path)
-            out_file.add(image_load_path, arcname = save_name, recursive = False)
-    
-    # Reset to beginning of 'file' in memory before we try to stream it
-    tar_in_memory.seek(0)
+    # Bundle all snapshots into a single tar file (in a thread, since this involves lots of file access)
+    missing_ems, tar_in_memory = await run_in_threadpool(bundle_snapshots_to_tar, camera_select, epoch_ms_list)
+    if missing_ems is not None:
+        error_message = "No image for epoch: {}".format(missing_ems)
+        return bad_request_response(error_message)
     
     return StreamingResponse(tar_in_memory, media_type = "application/x-tar")
 
@@ -178,36 +276,43 @@ def snap_get_many_images_as_tar_by_time_range(request):
 
 # .....................................................................................................................
     
-def snap_get_newest_metadata(request):
+async def snap_get_newest_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
-    # Get data from db
-    collection_ref = get_snapshot_collection(camera_select)
-    no_newest_metadata, metadata_dict = get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
+    # Get data from the newest-metadata cache (only hits the db if the cached entry is missing or expired)
+    no_newest_metadata, metadata_dict = \
+        await NEWEST_METADATA_CACHE.get_newest_metadata(camera_select, COLLECTION_NAME, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_newest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
 
-def snap_get_bounding_times(request):
+async def snap_get_bounding_times(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
-    # Request data from the db
+    # Get the bounding times from the timeline, then look up the (indexed) entries to get the datetime info
     collection_ref = get_snapshot_collection(camera_select)
-    no_oldest_metadata, oldest_metadata_dict = get_oldest_metadata(collection_ref, EPOCH_MS_FIELD)
-    no_newest_metadata, newest_metadata_dict = get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
+    oldest_ems, newest_ems = await SNAPSHOT_TIMELINE.get_bounding_epoch_ms(camera_select)
+    oldest_metadata_dict, newest_metadata_dict = \
+        await asyncio.gather(get_one_metadata(collection_ref, EPOCH_MS_FIELD, oldest_ems),
+                             get_one_metadata(collection_ref, EPOCH_MS_FIELD, newest_ems))
+    
+    # If the timeline is out of date (e.g. due to deleted data), fall back to the db for the bounding entries
+    if oldest_metadata_dict is None or newest_metadata_dict is None:
+        _, oldest_metadata_dict = await get_oldest_metadata(collection_ref, EPOCH_MS_FIELD)
+        _, newest_metadata_dict = await get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
     
     # Get results, if possible
-    if no_oldest_metadata or no_newest_metadata:
+    if oldest_metadata_dict is None or newest_metadata_dict is None:
         error_message = "No bounding times for {}".format(camera_select)
         return no_data_response(error_message)
     
@@ -217,59 +322,35 @@ def snap_get_bounding_times(request):
                      "min_datetime_isoformat": oldest_metadata_dict["datetime_isoformat"],
                      "max_datetime_isoformat": newest_metadata_dict["datetime_isoformat"]}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def snap_get_closest_epoch_by_time(request):
+async def snap_get_closest_epoch_by_time(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     target_time = request.path_params["target_time"]
     target_ems = url_time_to_epoch_ms(target_time)
     
-    # Build query components for the upper/lower bounding entries
-    target_field = EPOCH_MS_FIELD
-    lower_search_query = {target_field: {"$lte": target_ems}}
-    upper_search_query = {target_field: {"$gte": target_ems}}
+    # Find upper/lower bounding times from the timeline
+    lower_ems, upper_ems, closest_ems = await SNAPSHOT_TIMELINE.get_closest_epoch_ms(camera_select, target_ems)
     
-    # Request data from the db
-    collection_ref = get_snapshot_collection(camera_select)
-    lower_query_result = collection_ref.find(lower_search_query).sort(target_field, DESCENDING).limit(1)
-    upper_query_result = collection_ref.find(upper_search_query).sort(target_field, ASCENDING).limit(1)
-    
-    # Handle missing query values
-    upper_result = first_of_query(upper_query_result)
-    lower_result = first_of_query(lower_query_result)
-    if (upper_result is None) and (lower_result is None):
+    # Handle missing data
+    if closest_ems is None:
         error_message = "No data for {}".format(camera_select)
         return no_data_response(error_message)
     
-    # Pull out upper/lower bound epoch_ms values (if possible)
-    upper_ems = None if (upper_result is None) else upper_result[target_field]
-    lower_ems = None if (lower_result is None) else lower_result[target_field]
-    
-    # Determine the closest epoch value while handling missing values
-    closest_ems = None
-    if lower_ems is None:
-        closest_ems = upper_ems
-    elif upper_ems is None:
-        closest_ems = lower_ems
-    else:
-        lower_diff = (target_ems - lower_ems)
-        upper_diff = (upper_ems - target_ems)
-        closest_ems = lower_ems if (lower_diff < upper_diff) else upper_ems
-    
     # Bundle outputs
     return_result = {"upper_bound_epoch_ms": upper_ems,
                      "lower_bound_epoch_ms": lower_ems,
                      "closest_epoch_ms": closest_ems}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def snap_get_epochs_by_time_range(request):
+async def snap_get_epochs_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -279,46 +360,34 @@ def snap_get_epochs_by_time_range(request):
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
     
-    # Get data from db
-    collection_ref = get_snapshot_collection(camera_select)
-    epoch_ms_list = get_epoch_ms_list_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    # Get data from the timeline
+    epoch_ms_list = await SNAPSHOT_TIMELINE.get_epoch_ms_list_in_time_range(camera_select, start_ems, end_ems)
     
-    return JSONResponse(epoch_ms_list)
+    return Int_List_JSON_Response(epoch_ms_list)
 
 # .....................................................................................................................
 
-def snap_get_closest_metadata_by_time(request):
+async def snap_get_closest_metadata_by_time(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     target_time = request.path_params["target_time"]
     target_ems = url_time_to_epoch_ms(target_time)
     
-    # Build aggregate query
-    time_absdiff_cmd = {"$abs": {"$subtract": [target_ems, "$_id"]}}
-    projection_cmd = {"$project": {"doc": "$$ROOT",  "time_absdiff": time_absdiff_cmd}}
-    sort_cmd = {"$sort": {"time_absdiff": 1}}
-    limit_cmd = {"$limit": 1}
-    query_cmd_list = [projection_cmd, sort_cmd, limit_cmd]
-    
     # Request data from the db
     collection_ref = get_snapshot_collection(camera_select)
-    query_result = collection_ref.aggregate(query_cmd_list)
+    _, _, closest_result = await get_closest_metadata_by_target_ems(collection_ref, target_ems, EPOCH_MS_FIELD)
     
     # Deal with missing data
-    first_entry = first_of_query(query_result)
-    if first_entry is None:
+    if closest_result is None:
         error_message = "No closest metadata for {}".format(target_ems)
         return no_data_response(error_message)
     
-    # If we get here we probably have data so return the document data except for the id
-    return_result = first_entry["doc"]
-    
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(closest_result)
 
 # .....................................................................................................................
 
-def snap_get_previous_metadata_by_time(request):
+async def snap_get_previous_metadata_by_time(request):
     
     ''' Route which returns the closest metadata entry before (or at) a given target time '''
     
@@ -329,18 +398,19 @@ def snap_get_previous_metadata_by_time(request):
     
     # Find the prior metadata entry
     collection_ref = get_snapshot_collection(camera_select)
-    no_older_entry, entry_dict = get_closest_metadata_before_target_ems(collection_ref, target_ems, EPOCH_MS_FIELD)
+    no_older_entry, entry_dict = \
+        await get_closest_metadata_before_target_ems(collection_ref, target_ems, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_older_entry:
         error_message = "No metadata before time {}".format(target_ems)
         return no_data_response(error_message)
     
-    return JSONResponse(entry_dict)
+    return Fast_JSON_Response(entry_dict)
 
 # .....................................................................................................................
 
-def snap_get_next_metadata_by_time(request):
+async def snap_get_next_metadata_by_time(request):
     
     ''' Route which returns the closest metadata entry after (or at) a given target time '''
     
@@ -351,18 +421,19 @@ def snap_get_next_metadata_by_time(request):
     
     # Find the next metadata entry
     collection_ref = get_snapshot_collection(camera_select)
-    no_older_entry, entry_dict = get_closest_metadata_after_target_ems(collection_ref, target_ems, EPOCH_MS_FIELD)
+    no_older_entry, entry_dict = \
+        await get_closest_metadata_after_target_ems(collection_ref, target_ems, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_older_entry:
         error_message = "No metadata after time {}".format(target_ems)
         return no_data_response(error_message)
     
-    return JSONResponse(entry_dict)
+    return Fast_JSON_Response(entry_dict)
 
 # .....................................................................................................................
 
-def snap_get_one_metadata(request):
+async def snap_get_one_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -370,18 +441,18 @@ def snap_get_one_metadata(request):
     
     # Get data from db
     collection_ref = get_snapshot_collection(camera_select)
-    query_result = get_one_metadata(collection_ref, EPOCH_MS_FIELD, target_ems)
+    query_result = await get_one_metadata(collection_ref, EPOCH_MS_FIELD, target_ems)
 
     # Deal with missing data
     if not query_result:
         error_message = "No metadata at {}".format(target_ems)
         return bad_request_response(error_message)
     
-    return JSONResponse(query_result)
+    return Fast_JSON_Response(query_result)
 
 # .....................................................................................................................
 
-def snap_get_many_metadata(request):
+async def snap_get_many_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -391,15 +462,21 @@ def snap_get_many_metadata(request):
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
     
-    # Get data from db
+    # Re-use the (already gzipped) response for historical time ranges, if available
+    gzip_cache_key = GZIP_RESPONSE_CACHE.get_cache_key(request, camera_select, end_ems)
+    gzip_bytes = GZIP_RESPONSE_CACHE.get(gzip_cache_key)
+    if gzip_bytes is not None:
+        return gzip_cached_response(gzip_bytes)
+    
+    # Build the db query & stream results out, so we don't need to hold everything in memory
     collection_ref = get_snapshot_collection(camera_select)
-    query_result = get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    query_result = get_many_metadata_in_time_range_blocking(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
     
-    return JSONResponse(list(query_result))
+    return Streaming_JSON_Response(query_result, gzip_cache_key = gzip_cache_key)
 
 # .....................................................................................................................
 
-def snap_get_many_metadata_n_samples(request):
+async def snap_get_many_metadata_n_samples(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -409,38 +486,22 @@ def snap_get_many_metadata_n_samples(request):
     
     # Handle zero/negative sample cases
     if n_samples < 1:
-        return JSONResponse([])
+        return Fast_JSON_Response([])
     
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
     
-    # Get data from db
+    # Get (subsampled) data from db
     collection_ref = get_snapshot_collection(camera_select)
-    query_result = get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
-    
-    # Convert result to a list so we can subsample from it
-    result_list = list(query_result)
-    num_samples_total = len(result_list)
+    index_select_func = partial(get_n_samples_index_list, n_samples = n_samples)
+    return_result = await run_in_db_executor(find_subsampled_metadata,
+                                             collection_ref, start_ems, end_ems, index_select_func)
     
-    # Handle cases where there are fewer (or equal) results than the number of samples requested
-    if num_samples_total <= n_samples:
-        return JSONResponse(result_list)
-    
-    # Handle special case where only 1 sample is requested. We'll grab the middle one
-    if n_samples == 1:
-        middle_idx = int(num_samples_total / 2)
-        return_result = [result_list[middle_idx]]
-        return JSONResponse(return_result)
-    
-    # Pick out n-samples from the result
-    step_factor = (num_samples_total - 1) / (n_samples - 1)
-    return_result = [result_list[int(round(k * step_factor))] for k in range(n_samples)]
-    
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def snap_get_many_metadata_skip_n_subsample(request):
+async def snap_get_many_metadata_skip_n_subsample(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -448,38 +509,20 @@ def snap_get_many_metadata_skip_n_subsample(request):
     start_time = request.path_params["start_time"]
     end_time = request.path_params["end_time"]
     
-    # Make sure the skip value is positive, and get the subsample factor
-    skip_n = max(0, skip_n)
-    nth_subsample = 1 + skip_n
-    
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
     
-    # Get data from db
+    # Get (subsampled) data from db
     collection_ref = get_snapshot_collection(camera_select)
-    query_result = get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
-    
-    # Convert result to a list so we can subsample from it
-    result_list = list(query_result)
-    num_samples_total = len(result_list)
+    index_select_func = partial(get_skip_n_index_list, skip_n = skip_n)
+    subsampled_list = await run_in_db_executor(find_subsampled_metadata,
+                                               collection_ref, start_ems, end_ems, index_select_func)
     
-    # Handle cases with only 0, 1 or 2 entries (where we can't meaningfully skip samples)
-    if num_samples_total < 3:
-        return JSONResponse(result_list)
-    
-    # If we have data, figure out the best first-index offset, so we evenly place the subsamples
-    # For example, given a list: [1,2,3,4,5,6,7,8,9], skip 3
-    #   -> Simplest solution: [1, 4, 7]
-    #   ->   Better solution: [2, 5, 8]
-    subsample_extent = int(1 + nth_subsample * int((num_samples_total - 1) / nth_subsample))
-    first_index_offset = int((num_samples_total - subsample_extent) / 2)
-    subsampled_list = result_list[first_index_offset::nth_subsample]
-    
-    return JSONResponse(subsampled_list)
+    return Fast_JSON_Response(subsampled_list)
 
 # .....................................................................................................................
 
-def snap_count_by_time_range(request):
+async def snap_count_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -489,14 +532,13 @@ def snap_count_by_time_range(request):
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
 
-    # Request data from the db
-    collection_ref = get_snapshot_collection(camera_select)
-    query_result = get_count_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    # Get count from the timeline
+    query_result = await SNAPSHOT_TIMELINE.get_count_in_time_range(camera_select, start_ems, end_ems)
     
     # Convert to dictionary with count
     return_result = {"count": int(query_result)}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
@@ -507,6 +549,35 @@ def snap_count_by_time_range(request):
 
 # .....................................................................................................................
 
+def bundle_snapshots_to_tar(camera_select, epoch_ms_list):
+    
+    '''
+    Helper used to bundle many snapshot images into a single (in-memory) tar file
+    Returns:
+        missing_ems (None if all images were found), tar_in_memory
+    '''
+    
+    # Create in-memory storage for tarfile data
+    tar_in_memory = io.BytesIO()
+    with tarfile.open(fileobj = tar_in_memory, mode = "w") as out_file:
+    
+        # Try to bundle all snapshots into a single tar file
+        image_data_list = IMAGE_STORE.get_many(camera_select, COLLECTION_NAME, epoch_ms_list)
+        for each_snap_ems, image_data in zip(epoch_ms_list, image_data_list):
+            if image_data is None:
+                return each_snap_ems, None
+            tar_info = tarfile.TarInfo("{}.jpg".format(each_snap_ems))
+            tar_info.size = len(image_data)
+            tar_info.mtime = each_snap_ems // 1000
+            out_file.addfile(tar_info, io.BytesIO(image_data))
+    
+    # Reset to beginning of 'file' in memory before we try to stream it
+    tar_in_memory.seek(0)
+    
+    return None, tar_in_memory
+
+# .....................................................................................................................
+
 def get_snapshot_collection(camera_select):
     return MCLIENT[camera_select][COLLECTION_NAME]
 
@@ -582,6 +653,12 @@ EPOCH_MS_FIELD = "_id"
 # Set name of collection, which determines url routing + storage on mongoDB
 COLLECTION_NAME = "snapshots"
 
+# Set up in-memory snapshot timelines, used to answer time-based lookups without the db
+# -> Timelines are periodically synced with the db, to account for data deleted by the autodelete process
+TIMELINE_SYNC_PERIOD_SEC = 30
+SNAPSHOT_TIMELINE = Epoch_Timeline_Cache(MCLIENT, COLLECTION_NAME, EPOCH_MS_FIELD, TIMELINE_SYNC_PERIOD_SEC)
+WRITE_BEHIND_BUFFER.add_flush_listener(COLLECTION_NAME, add_to_snapshot_timeline)
+
 
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Demo
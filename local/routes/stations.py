@@ -51,15 +51,21 @@ find_path_to_local()
 
 from time import perf_counter
 
-from local.lib.mongo_helpers import MCLIENT, check_collection_indexing, set_collection_indexing
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.async_db_helpers import run_in_db_executor
+from local.lib.newest_metadata_cache import NEWEST_METADATA_CACHE
+from local.lib.async_db_helpers import check_collection_indexing, set_collection_indexing
+from local.lib.index_manager import declare_required_indexes
 
 from local.lib.query_helpers import start_end_times_to_epoch_ms
-from local.lib.query_helpers import get_all_ids, get_one_metadata, get_newest_metadata, get_oldest_metadata
-from local.lib.query_helpers import get_many_metadata_in_id_range
+from local.lib.async_db_helpers import get_all_ids, get_one_metadata, get_oldest_metadata
+from local.lib.async_db_helpers import get_many_metadata_in_id_range
 
-from local.lib.response_helpers import bad_request_response, no_data_response
+from local.lib.response_helpers import bad_request_response, no_data_response, Streaming_JSON_Response
+from local.lib.response_helpers import gzip_cached_response
+from local.lib.response_cache import GZIP_RESPONSE_CACHE
+from local.lib.response_helpers import Fast_JSON_Response, Int_List_JSON_Response
 
-from starlette.responses import JSONResponse
 from starlette.routing import Route
 
 from pymongo import ASCENDING, DESCENDING
@@ -107,6 +113,46 @@ def find_by_time_range(collection_ref, start_ems, end_ems, *, return_ids_only, a
     
     return query_result
 
+# .....................................................................................................................
+
+def find_ids_by_target_time(collection_ref, target_ems, *, ascending_order = True):
+    
+    '''
+    Helper used to get a (sorted) list of station ids at a target time
+    Sorting is done here rather than in the db, so that the query can be fully 'covered' by the compound indexes
+    (i.e. the db doesn't need to load any documents or perform an in-memory sort)
+    Note: this is a blocking call, which iterates through the entire query result!
+    '''
+    
+    # Build query, with projection matching the index-covered id field
+    filter_dict = get_target_time_query_filter(target_ems)
+    projection_dict = {STN_ID_FIELD: 1}
+    
+    # Request data from the db & sort the ids ourself
+    query_result = collection_ref.find(filter_dict, projection_dict)
+    ids_list = sorted((each_entry[STN_ID_FIELD] for each_entry in query_result), reverse = (not ascending_order))
+    
+    return ids_list
+
+# .....................................................................................................................
+
+def find_ids_by_time_range(collection_ref, start_ems, end_ems, *, ascending_order = True):
+    
+    '''
+    Helper used to get a (sorted) list of station ids within a time range
+    Works the same way as the target time version (see find_ids_by_target_time(...))
+    '''
+    
+    # Build query, with projection matching the index-covered id field
+    filter_dict = get_time_range_query_filter(start_ems, end_ems)
+    projection_dict = {STN_ID_FIELD: 1}
+    
+    # Request data from the db & sort the ids ourself
+    query_result = collection_ref.find(filter_dict, projection_dict)
+    ids_list = sorted((each_entry[STN_ID_FIELD] for each_entry in query_result), reverse = (not ascending_order))
+    
+    return ids_list
+
 # .....................................................................................................................
 # .....................................................................................................................
 
@@ -115,7 +161,7 @@ def find_by_time_range(collection_ref, start_ems, end_ems, *, return_ids_only, a
 
 # .....................................................................................................................
 
-def stations_get_oldest_metadata(request):
+async def stations_get_oldest_metadata(request):
     
     '''
     Returns oldest station data entry. Can be used along with the 'get newest' route to figure
@@ -128,52 +174,52 @@ def stations_get_oldest_metadata(request):
     
     # Get data from db
     collection_ref = get_station_collection(camera_select)
-    no_oldest_metadata, metadata_dict = get_oldest_metadata(collection_ref, FIRST_EPOCH_MS_FIELD)
+    no_oldest_metadata, metadata_dict = await get_oldest_metadata(collection_ref, FIRST_EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_oldest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
 
-def stations_get_newest_metadata(request):
+async def stations_get_newest_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
-    # Get data from db
-    collection_ref = get_station_collection(camera_select)
-    no_newest_metadata, metadata_dict = get_newest_metadata(collection_ref, FINAL_EPOCH_MS_FIELD)
+    # Get data from the newest-metadata cache (only hits the db if the cached entry is missing or expired)
+    no_newest_metadata, metadata_dict = \
+        await NEWEST_METADATA_CACHE.get_newest_metadata(camera_select, COLLECTION_NAME, FINAL_EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_newest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
 
-def stations_get_all_ids(request):
+async def stations_get_all_ids(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
     # Request data from the db
     collection_ref = get_station_collection(camera_select)
-    query_result = get_all_ids(collection_ref)
+    query_result = await get_all_ids(collection_ref)
     
     # Pull out the ID into a list, instead of returning a list of dictionaries
     return_result = [each_entry[STN_ID_FIELD] for each_entry in query_result]
     
-    return JSONResponse(return_result)
+    return Int_List_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def stations_get_ids_by_time_range(request):
+async def stations_get_ids_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -185,16 +231,13 @@ def stations_get_ids_by_time_range(request):
     
     # Request data from the db
     collection_ref = get_station_collection(camera_select)
-    query_result = find_by_time_range(collection_ref, start_ems, end_ems, return_ids_only = True)
-    
-    # Pull out the epoch values into a list, instead of returning a list of dictionaries
-    return_result = [each_entry[STN_ID_FIELD] for each_entry in query_result]
+    return_result = await run_in_db_executor(find_ids_by_time_range, collection_ref, start_ems, end_ems)
     
-    return JSONResponse(return_result)
+    return Int_List_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def stations_get_one_metadata_by_id(request):
+async def stations_get_one_metadata_by_id(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -202,18 +245,18 @@ def stations_get_one_metadata_by_id(request):
     
     # Request data from the db
     collection_ref = get_station_collection(camera_select)
-    query_result = get_one_metadata(collection_ref, STN_ID_FIELD, station_full_id)
+    query_result = await get_one_metadata(collection_ref, STN_ID_FIELD, station_full_id)
     
     # Deal with missing data
     if not query_result:
         error_message = "No station with id {}".format(station_full_id)
         return bad_request_response(error_message)
     
-    return JSONResponse(query_result)
+    return Fast_JSON_Response(query_result)
 
 # .....................................................................................................................
 
-def stations_get_many_metadata_by_id_range(request):
+async def stations_get_many_metadata_by_id_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -225,13 +268,13 @@ def stations_get_many_metadata_by_id_range(request):
     
     # Request data from the db
     collection_ref = get_station_collection(camera_select)
-    query_result = get_many_metadata_in_id_range(collection_ref, start_stn_id, end_stn_id)
+    query_result = await get_many_metadata_in_id_range(collection_ref, start_stn_id, end_stn_id)
     
-    return JSONResponse(query_result)
+    return Fast_JSON_Response(query_result)
 
 # .....................................................................................................................
 
-def stations_get_many_metadata_by_time_range(request):
+async def stations_get_many_metadata_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -241,18 +284,22 @@ def stations_get_many_metadata_by_time_range(request):
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
     
-    # Request data from the db
+    # Re-use the (already gzipped) response for historical time ranges, if available
+    gzip_cache_key = GZIP_RESPONSE_CACHE.get_cache_key(request, camera_select, end_ems)
+    gzip_bytes = GZIP_RESPONSE_CACHE.get(gzip_cache_key)
+    if gzip_bytes is not None:
+        return gzip_cached_response(gzip_bytes)
+    
+    # Build the db query (no data is requested until the response is streamed)
     collection_ref = get_station_collection(camera_select)
     query_result = find_by_time_range(collection_ref, start_ems, end_ems, return_ids_only = False)
     
-    # Convert to dictionary, with station ids as keys
-    return_result = {each_result[STN_ID_FIELD]: each_result for each_result in query_result}
-    
-    return JSONResponse(return_result)
+    # Stream results out as a dictionary, with station ids as keys, so we don't need to hold everything in memory
+    return Streaming_JSON_Response(query_result, key_field = STN_ID_FIELD, gzip_cache_key = gzip_cache_key)
 
 # .....................................................................................................................
 
-def stations_count_by_time_range(request):
+async def stations_count_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -268,16 +315,16 @@ def stations_count_by_time_range(request):
     
     # Request data from the db
     collection_ref = get_station_collection(camera_select)
-    query_result = collection_ref.count_documents(query_dict, projection_dict)
+    query_result = await run_in_db_executor(collection_ref.count_documents, query_dict, projection_dict)
     
     # Convert to dictionary with count
     return_result = {"count": int(query_result)}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def stations_set_indexing(request):
+async def stations_set_indexing(request):
     
     ''' 
     Hacky function... Used to manually set station timing indexes for a specified camera.
@@ -292,13 +339,13 @@ def stations_set_indexing(request):
     t_start = perf_counter()
     
     # First check if the index is already set
-    indexes_already_set = check_collection_indexing(collection_ref, KEYS_TO_INDEX)
+    indexes_already_set = await check_collection_indexing(collection_ref, KEYS_TO_INDEX)
     if indexes_already_set:
         return_result = {"already_set": True, "indexes": KEYS_TO_INDEX}
-        return JSONResponse(return_result)
+        return Fast_JSON_Response(return_result)
     
     # Set indexes on target fields if we haven't already
-    mongo_response_list = set_collection_indexing(collection_ref, KEYS_TO_INDEX)
+    mongo_response_list = await set_collection_indexing(collection_ref, KEYS_TO_INDEX)
     
     # End timing
     t_end = perf_counter()
@@ -309,7 +356,7 @@ def stations_set_indexing(request):
                      "time_taken_ms": time_taken_ms,
                      "mongo_response_list": mongo_response_list}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
@@ -373,12 +420,18 @@ STN_ID_FIELD = "_id"
 FIRST_EPOCH_MS_FIELD = "first_epoch_ms"
 FINAL_EPOCH_MS_FIELD = "final_epoch_ms"
 
-# Hard-code the list of keys that need indexing
-KEYS_TO_INDEX = [FIRST_EPOCH_MS_FIELD, FINAL_EPOCH_MS_FIELD]
+# Hard-code the list of (compound) indexes needed for efficient time-range queries
+# -> Having both first/final orderings lets the db pick whichever bound is most selective for a given query
+# -> Including the id field means that id-only queries are fully 'covered' by the index (no documents loaded)
+KEYS_TO_INDEX = [[(FINAL_EPOCH_MS_FIELD, ASCENDING), (FIRST_EPOCH_MS_FIELD, ASCENDING), (STN_ID_FIELD, ASCENDING)],
+                 [(FIRST_EPOCH_MS_FIELD, ASCENDING), (FINAL_EPOCH_MS_FIELD, ASCENDING), (STN_ID_FIELD, ASCENDING)]]
 
 # Set name of collection, which determines url routing + storage on mongoDB
 COLLECTION_NAME = "stations"
 
+# Register indexing requirements, so indexes can be set automatically
+declare_required_indexes(COLLECTION_NAME, KEYS_TO_INDEX)
+
 
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Demo
@@ -53,16 +53,17 @@ from time import perf_counter
 
 from local.lib.timekeeper_utils import get_local_datetime, datetime_to_epoch_ms
 
-from local.lib.mongo_helpers import MCLIENT, post_one_to_mongo
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.async_db_helpers import run_in_db_executor, post_one_to_mongo
 
 from local.lib.query_helpers import start_end_times_to_epoch_ms
-from local.lib.query_helpers import get_all_ids, get_one_metadata, get_newest_metadata, get_oldest_metadata
-from local.lib.query_helpers import get_epoch_ms_list_in_time_range
+from local.lib.async_db_helpers import get_all_ids, get_one_metadata, get_newest_metadata, get_oldest_metadata
+from local.lib.async_db_helpers import get_epoch_ms_list_in_time_range
 
 from local.lib.response_helpers import bad_request_response, no_data_response
 from local.lib.response_helpers import post_success_response, not_allowed_response
+from local.lib.response_helpers import Fast_JSON_Response, Int_List_JSON_Response
 
-from starlette.responses import JSONResponse
 from starlette.routing import Route
 
 from local.routes.objects import get_object_collection, get_start_end_bounding_ems
@@ -106,7 +107,7 @@ async def svolabels_create_new_entry(request):
         try:
             obj_collection_ref = get_object_collection(camera_select)
             obj_ids_list = [int(each_id_str) for each_id_str in post_data_json["object_labels"].keys()]
-            bounding_start_ems, bounding_end_ems = get_start_end_bounding_ems(obj_collection_ref, obj_ids_list)
+            bounding_start_ems, bounding_end_ems = await get_start_end_bounding_ems(obj_collection_ref, obj_ids_list)
         
         except Exception as err:
             # In case we run into an error, just record None for start/end times
@@ -122,7 +123,7 @@ async def svolabels_create_new_entry(request):
         post_data_json[BOUNDING_END_EMS_FIELD] = bounding_end_ems
     
     # Send metadata to mongo
-    post_success, mongo_response = post_one_to_mongo(MCLIENT, camera_select, COLLECTION_NAME, post_data_json)
+    post_success, mongo_response = await post_one_to_mongo(MCLIENT, camera_select, COLLECTION_NAME, post_data_json)
     
     # Return an error response if there was a problem posting
     if not post_success:
@@ -136,7 +137,7 @@ async def svolabels_create_new_entry(request):
 
 # .....................................................................................................................
 
-def svolabels_delete_one_metadata_by_ems(request):
+async def svolabels_delete_one_metadata_by_ems(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -148,7 +149,7 @@ def svolabels_delete_one_metadata_by_ems(request):
     # Send deletion command to the db
     filter_dict = {EPOCH_MS_FIELD: epoch_ms}
     collection_ref = get_svolabel_collection(camera_select)
-    pymongo_DeleteResult = collection_ref.delete_one(filter_dict)
+    pymongo_DeleteResult = await run_in_db_executor(collection_ref.delete_one, filter_dict)
     
     # Get the number of deleted documents from the response (if possible!)
     num_deleted = pymongo_DeleteResult.deleted_count
@@ -160,60 +161,60 @@ def svolabels_delete_one_metadata_by_ems(request):
     # Build output to provide feedback about deletion
     return_result = {"num_deleted": num_deleted,"time_taken_ms": time_taken_ms}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def svolabels_get_newest_metadata(request):
+async def svolabels_get_newest_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
     # Get data from db
     collection_ref = get_svolabel_collection(camera_select)
-    no_newest_metadata, metadata_dict = get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
+    no_newest_metadata, metadata_dict = await get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_newest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
 
-def svolabels_get_oldest_metadata(request):
+async def svolabels_get_oldest_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
     # Get data from db
     collection_ref = get_svolabel_collection(camera_select)
-    no_oldest_metadata, metadata_dict = get_oldest_metadata(collection_ref, EPOCH_MS_FIELD)
+    no_oldest_metadata, metadata_dict = await get_oldest_metadata(collection_ref, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_oldest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
 
-def svolabels_get_all_ems_list(request):
+async def svolabels_get_all_ems_list(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
     # Get data from db
     collection_ref = get_svolabel_collection(camera_select)
-    all_epoch_ms_list = list(get_all_ids(collection_ref, EPOCH_MS_FIELD))
+    all_epoch_ms_list = await get_all_ids(collection_ref, EPOCH_MS_FIELD)
     
-    return JSONResponse(all_epoch_ms_list)
+    return Fast_JSON_Response(all_epoch_ms_list)
 
 # .....................................................................................................................
 
-def svolabels_get_ems_list_by_time_range(request):
+async def svolabels_get_ems_list_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -225,13 +226,13 @@ def svolabels_get_ems_list_by_time_range(request):
     
     # Get data from db
     collection_ref = get_svolabel_collection(camera_select)
-    epoch_ms_list = get_epoch_ms_list_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    epoch_ms_list = await get_epoch_ms_list_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
     
-    return JSONResponse(epoch_ms_list)
+    return Int_List_JSON_Response(epoch_ms_list)
 
 # .....................................................................................................................
 
-def svolabels_get_one_metadata(request):
+async def svolabels_get_one_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -239,14 +240,14 @@ def svolabels_get_one_metadata(request):
     
     # Get data from db
     collection_ref = get_svolabel_collection(camera_select)
-    query_result = get_one_metadata(collection_ref, EPOCH_MS_FIELD, target_ems)
+    query_result = await get_one_metadata(collection_ref, EPOCH_MS_FIELD, target_ems)
 
     # Deal with missing data
     if not query_result:
         error_message = "No metadata at {}".format(target_ems)
         return bad_request_response(error_message)
     
-    return JSONResponse(query_result)
+    return Fast_JSON_Response(query_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
@@ -54,16 +54,18 @@ from time import perf_counter
 
 from local.lib.timekeeper_utils import get_local_datetime, datetime_to_epoch_ms
 
-from local.lib.mongo_helpers import MCLIENT, post_one_to_mongo
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.async_db_helpers import run_in_db_executor, post_one_to_mongo
 
-from local.lib.query_helpers import start_end_times_to_epoch_ms, get_count_in_time_range
-from local.lib.query_helpers import get_newest_metadata, get_oldest_metadata, get_all_ids, get_one_metadata
-from local.lib.query_helpers import get_many_metadata_in_time_range, get_epoch_ms_list_in_time_range
+from local.lib.query_helpers import start_end_times_to_epoch_ms
+from local.lib.async_db_helpers import get_count_in_time_range
+from local.lib.async_db_helpers import get_newest_metadata, get_oldest_metadata, get_all_ids, get_one_metadata
+from local.lib.async_db_helpers import get_many_metadata_in_time_range, get_epoch_ms_list_in_time_range
 
 from local.lib.response_helpers import post_success_response, bad_request_response
 from local.lib.response_helpers import not_allowed_response, no_data_response
+from local.lib.response_helpers import Fast_JSON_Response, Int_List_JSON_Response
 
-from starlette.responses import JSONResponse
 from starlette.routing import Route
 
 
@@ -96,7 +98,7 @@ def uiconfig_info(request):
     
     info_dict = {"info": msg_list}
     
-    return JSONResponse(info_dict)
+    return Fast_JSON_Response(info_dict)
 
 # .....................................................................................................................
 
@@ -123,7 +125,7 @@ async def uiconfig_create_new_entry(request):
     config_data_json = {**default_config_dict, **post_data_json}
     
     # Send metadata to mongo
-    post_success, mongo_response = post_one_to_mongo(MCLIENT, camera_select, COLLECTION_NAME, config_data_json)
+    post_success, mongo_response = await post_one_to_mongo(MCLIENT, camera_select, COLLECTION_NAME, config_data_json)
     
     # Return an error response if there was a problem posting
     if not post_success:
@@ -135,43 +137,43 @@ async def uiconfig_create_new_entry(request):
 
 # .....................................................................................................................
     
-def uiconfig_get_newest_metadata(request):
+async def uiconfig_get_newest_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
     # Get data from db
     collection_ref = get_uiconfig_collection(camera_select)
-    no_newest_metadata, metadata_dict = get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
+    no_newest_metadata, metadata_dict = await get_newest_metadata(collection_ref, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_newest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
     
-def uiconfig_get_oldest_metadata(request):
+async def uiconfig_get_oldest_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
     # Get data from db
     collection_ref = get_uiconfig_collection(camera_select)
-    no_oldest_metadata, metadata_dict = get_oldest_metadata(collection_ref, EPOCH_MS_FIELD)
+    no_oldest_metadata, metadata_dict = await get_oldest_metadata(collection_ref, EPOCH_MS_FIELD)
     
     # Handle missing metadata
     if no_oldest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
 
-def uiconfig_get_one_metadata_by_ems(request):
+async def uiconfig_get_one_metadata_by_ems(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -179,18 +181,18 @@ def uiconfig_get_one_metadata_by_ems(request):
     
     # Get data from db
     collection_ref = get_uiconfig_collection(camera_select)
-    query_result = get_one_metadata(collection_ref, EPOCH_MS_FIELD, target_ems)
+    query_result = await get_one_metadata(collection_ref, EPOCH_MS_FIELD, target_ems)
 
     # Deal with missing data
     if not query_result:
         error_message = "No metadata at {}".format(target_ems)
         return bad_request_response(error_message)
     
-    return JSONResponse(query_result)
+    return Fast_JSON_Response(query_result)
 
 # .....................................................................................................................
 
-def uiconfig_get_many_metadata_by_time_range(request):
+async def uiconfig_get_many_metadata_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -202,29 +204,29 @@ def uiconfig_get_many_metadata_by_time_range(request):
     
     # Get data from db
     collection_ref = get_uiconfig_collection(camera_select)
-    query_result = get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    query_result = await get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
     
-    return JSONResponse(list(query_result))
+    return Fast_JSON_Response(query_result)
 
 # .....................................................................................................................
 
-def uiconfig_get_all_ems_list(request):
+async def uiconfig_get_all_ems_list(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
     # Get data from db
     collection_ref = get_uiconfig_collection(camera_select)
-    query_result = get_all_ids(collection_ref)
+    query_result = await get_all_ids(collection_ref)
     
     # Pull out the entry IDs into a list, instead of returning a list of dictionaries
     return_result = [each_entry[EPOCH_MS_FIELD] for each_entry in query_result]
     
-    return JSONResponse(return_result)
+    return Int_List_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def uiconfig_get_ems_list_by_time_range(request):
+async def uiconfig_get_ems_list_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -236,13 +238,13 @@ def uiconfig_get_ems_list_by_time_range(request):
     
     # Get data from db
     collection_ref = get_uiconfig_collection(camera_select)
-    epoch_ms_list = get_epoch_ms_list_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    epoch_ms_list = await get_epoch_ms_list_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
     
-    return JSONResponse(epoch_ms_list)
+    return Int_List_JSON_Response(epoch_ms_list)
 
 # .....................................................................................................................
 
-def uiconfig_count_by_time_range(request):
+async def uiconfig_count_by_time_range(request):
     
      # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -254,12 +256,12 @@ def uiconfig_count_by_time_range(request):
 
     # Request data from the db
     collection_ref = get_uiconfig_collection(camera_select)
-    query_result = get_count_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
+    query_result = await get_count_in_time_range(collection_ref, start_ems, end_ems, EPOCH_MS_FIELD)
     
     # Convert to dictionary with count
     return_result = {"count": int(query_result)}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
@@ -296,13 +298,14 @@ async def uiconfig_update_one_metadata_by_ems(request):
     
     # Send update command to the db
     collection_ref = get_uiconfig_collection(camera_select)
-    update_response = collection_ref.update_one(filter_dict, update_data_dict, upsert = False)
+    update_response = \
+        await run_in_db_executor(collection_ref.update_one, filter_dict, update_data_dict, upsert = False)
     
-    return JSONResponse(update_response)
+    return Fast_JSON_Response(update_response)
 
 # .....................................................................................................................
 
-def uiconfig_delete_one_metadata_by_ems(request):
+async def uiconfig_delete_one_metadata_by_ems(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -314,7 +317,7 @@ def uiconfig_delete_one_metadata_by_ems(request):
     # Send deletion command to the db
     filter_dict = {EPOCH_MS_FIELD: target_ems}
     collection_ref = get_uiconfig_collection(camera_select)
-    pymongo_DeleteResult = collection_ref.delete_one(filter_dict)
+    pymongo_DeleteResult = await run_in_db_executor(collection_ref.delete_one, filter_dict)
     
     # Get the number of deleted documents from the response (if possible!)
     num_deleted = pymongo_DeleteResult.deleted_count
@@ -327,11 +330,11 @@ def uiconfig_delete_one_metadata_by_ems(request):
     return_result = {"time_taken_ms": time_taken_ms,
                      "num_deleted": num_deleted}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def uiconfig_delete_many_metadata_by_time_range(request):
+async def uiconfig_delete_many_metadata_by_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -347,7 +350,7 @@ def uiconfig_delete_many_metadata_by_time_range(request):
     # Send deletion command to the db
     filter_dict = get_ems_range_query_filter(start_ems, end_ems)
     collection_ref = get_uiconfig_collection(camera_select)
-    pymongo_DeleteResult = collection_ref.delete_many(filter_dict)
+    pymongo_DeleteResult = await run_in_db_executor(collection_ref.delete_many, filter_dict)
     
     # Get the number of deleted documents from the response (if possible!)
     num_deleted = pymongo_DeleteResult.deleted_count
@@ -360,7 +363,7 @@ def uiconfig_delete_many_metadata_by_time_range(request):
     return_result = {"time_taken_ms": time_taken_ms,
                      "num_deleted": num_deleted}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
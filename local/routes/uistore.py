@@ -52,15 +52,19 @@ find_path_to_local()
 from json import JSONDecodeError
 from time import perf_counter
 
-from local.lib.mongo_helpers import MCLIENT, post_one_to_mongo, get_collection_names_list, get_camera_names_list
-from local.lib.mongo_helpers import check_collection_indexing, set_collection_indexing
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.async_db_helpers import run_in_db_executor, run_query_to_list, run_per_camera
+from local.lib.camera_registry import CAMERA_REGISTRY
+from local.lib.async_db_helpers import post_one_to_mongo, get_collection_names_list
+from local.lib.async_db_helpers import check_collection_indexing, set_collection_indexing
+from local.lib.index_manager import declare_required_indexes, ensure_collection_indexes
 
-from local.lib.query_helpers import get_one_metadata, get_all_ids, get_newest_metadata
+from local.lib.async_db_helpers import get_one_metadata, get_all_ids, get_newest_metadata
 
 from local.lib.response_helpers import post_success_response, bad_request_response
 from local.lib.response_helpers import not_allowed_response, no_data_response
+from local.lib.response_helpers import Fast_JSON_Response
 
-from starlette.responses import JSONResponse
 from starlette.routing import Route
 
 from pymongo import ASCENDING
@@ -113,17 +117,17 @@ def uistore_info(request):
     info_dict = {"info": msg_list,
                  "indexes": KEYS_TO_INDEX}
     
-    return JSONResponse(info_dict)
+    return Fast_JSON_Response(info_dict)
 
 # .....................................................................................................................
 
-def uistore_get_all_store_types(request):
+async def uistore_get_all_store_types(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
     
     # Extract only the uistore related collection names
-    all_collection_names_list = get_collection_names_list(MCLIENT, camera_select)
+    all_collection_names_list = await get_collection_names_list(MCLIENT, camera_select)
     
     # Iterate over all collections, grab only uistore entries and remove the uistore prefix
     remove_prefix_idx = len(COLLECTION_NAME_PREFIX)
@@ -138,39 +142,31 @@ def uistore_get_all_store_types(request):
         store_type_only = each_collection_name[remove_prefix_idx:]
         uistore_types_list.append(store_type_only)
     
-    return JSONResponse(uistore_types_list)
+    return Fast_JSON_Response(uistore_types_list)
 
 # .....................................................................................................................
 
-def uistore_all_cameras_get_all_store_types(request):
+async def uistore_all_cameras_get_all_store_types(request):
     
-    ''' Same as 'uistore_get_all_store_types' but with a loop over all cameras '''
+    ''' Same as 'uistore_get_all_store_types' but for all cameras (queried in parallel) '''
     
-    # Run id list retrieval for all known cameras
-    aggregate_results_dict = {}
-    camera_names_list = get_camera_names_list(MCLIENT)
-    for each_camera_name in camera_names_list:
+    # Define the store type retrieval for a single camera
+    async def get_one_camera_store_types(camera_select):
         
         # Extract only the uistore related collection names
-        all_collection_names_list = get_collection_names_list(MCLIENT, each_camera_name)
+        all_collection_names_list = await get_collection_names_list(MCLIENT, camera_select)
         
-        # Iterate over all collections, grab only uistore entries and remove the uistore prefix
+        # Grab only uistore entries and remove the uistore prefix
         remove_prefix_idx = len(COLLECTION_NAME_PREFIX)
-        one_camera_uistore_types_list = []
-        for each_collection_name in all_collection_names_list:
-            
-            # Skip over collection names not related to uistore
-            if not each_collection_name.startswith(COLLECTION_NAME_PREFIX):
-                continue
-            
-            # Remove the name prefix for readability
-            store_type_only = each_collection_name[remove_prefix_idx:]
-            one_camera_uistore_types_list.append(store_type_only)
-        
-        # Store final result for each camera
-        aggregate_results_dict[each_camera_name] = one_camera_uistore_types_list
+        return [each_collection_name[remove_prefix_idx:] for each_collection_name in all_collection_names_list
+                if each_collection_name.startswith(COLLECTION_NAME_PREFIX)]
     
-    return JSONResponse(aggregate_results_dict)
+    # Run store type retrieval for all known cameras, in parallel
+    camera_names_list = await CAMERA_REGISTRY.get_camera_names_list()
+    aggregate_results_dict = await run_per_camera(camera_names_list, get_one_camera_store_types,
+                                                  ALL_CAMERAS_MAX_CONCURRENCY, ALL_CAMERAS_TIMEOUT_SEC)
+    
+    return Fast_JSON_Response(aggregate_results_dict)
 
 # .....................................................................................................................
 
@@ -193,7 +189,7 @@ async def uistore_create_new_entry(request):
     
     # Send metadata to mongo
     collection_name = get_uistore_collection_name(store_type)
-    post_success, mongo_response = post_one_to_mongo(MCLIENT, camera_select, collection_name, post_data_json)
+    post_success, mongo_response = await post_one_to_mongo(MCLIENT, camera_select, collection_name, post_data_json)
     
     # Return an error response if there was a problem posting
     if not post_success:
@@ -203,10 +199,7 @@ async def uistore_create_new_entry(request):
         return not_allowed_response(error_message, additional_response_dict)
     
     # If we get this far, make sure to apply indexing if needed
-    collection_ref = get_uistore_collection(camera_select, store_type)
-    indexes_already_set = check_collection_indexing(collection_ref, KEYS_TO_INDEX)
-    if not indexes_already_set:
-        set_collection_indexing(collection_ref, KEYS_TO_INDEX)
+    await ensure_collection_indexes(MCLIENT, camera_select, collection_name)
     
     return post_success_response()
 
@@ -246,13 +239,13 @@ async def uistore_update_one_metadata_by_id(request):
     
     # Send update command to the db
     collection_ref = get_uistore_collection(camera_select, store_type)
-    update_response = collection_ref.update_one(filter_dict, update_data_dict, upsert = True)
+    update_response = await run_in_db_executor(collection_ref.update_one, filter_dict, update_data_dict, upsert = True)
     
-    return JSONResponse(update_response)
+    return Fast_JSON_Response(update_response)
 
 # .....................................................................................................................
 
-def uistore_get_example_metadata(request):
+async def uistore_get_example_metadata(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -260,18 +253,18 @@ def uistore_get_example_metadata(request):
     
     # Get data from db
     collection_ref = get_uistore_collection(camera_select, store_type)
-    no_newest_metadata, metadata_dict = get_newest_metadata(collection_ref, ENTRY_ID_FIELD)
+    no_newest_metadata, metadata_dict = await get_newest_metadata(collection_ref, ENTRY_ID_FIELD)
     
     # Handle missing metadata
     if no_newest_metadata:
         error_message = "No metadata for {}".format(camera_select)
         return no_data_response(error_message)
     
-    return JSONResponse(metadata_dict)
+    return Fast_JSON_Response(metadata_dict)
 
 # .....................................................................................................................
 
-def uistore_get_one_metadata_by_id(request):
+async def uistore_get_one_metadata_by_id(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -280,18 +273,18 @@ def uistore_get_one_metadata_by_id(request):
     
     # Get data from db
     collection_ref = get_uistore_collection(camera_select, store_type)
-    query_result = get_one_metadata(collection_ref, ENTRY_ID_FIELD, entry_id)
+    query_result = await get_one_metadata(collection_ref, ENTRY_ID_FIELD, entry_id)
 
     # Deal with missing data
     if not query_result:
         error_message = "No metadata for id {}".format(entry_id)
         return bad_request_response(error_message)
     
-    return JSONResponse(query_result)
+    return Fast_JSON_Response(query_result)
 
 # .....................................................................................................................
 
-def uistore_get_many_metadata_by_end_time_range(request):
+async def uistore_get_many_metadata_by_end_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -301,42 +294,46 @@ def uistore_get_many_metadata_by_end_time_range(request):
     
     # Request data from the db
     collection_ref = get_uistore_collection(camera_select, store_type)
-    query_result = find_by_end_time_range(collection_ref, low_end_ems, high_end_ems, return_ids_only = False)
+    query_result = await run_query_to_list(find_by_end_time_range, collection_ref, low_end_ems, high_end_ems,
+                                           return_ids_only = False)
     
     # Convert to dictionary, with entry ids as keys
     return_result = {each_result[ENTRY_ID_FIELD]: each_result for each_result in query_result}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def uistore_all_cameras_get_many_metadata_by_end_time_range(request):
+async def uistore_all_cameras_get_many_metadata_by_end_time_range(request):
     
-    ''' Same as 'uistore_get_many_metadata_by_end_time_range' but with a loop over all cameras '''
+    ''' Same as 'uistore_get_many_metadata_by_end_time_range' but for all cameras (queried in parallel) '''
     
     # Get information from route url
     store_type = request.path_params["store_type"]
     low_end_ems = request.path_params["low_end_ems"]
     high_end_ems = request.path_params["high_end_ems"]
     
-    # Run metadata retrieval for all known cameras
-    aggregate_results_dict = {}
-    camera_names_list = get_camera_names_list(MCLIENT)
-    for each_camera_name in camera_names_list:
-            
+    # Define the metadata retrieval for a single camera
+    async def get_one_camera_metadata(camera_select):
+        
         # Request data from the db
-        collection_ref = get_uistore_collection(each_camera_name, store_type)
-        query_result = find_by_end_time_range(collection_ref, low_end_ems, high_end_ems, return_ids_only = False)
+        collection_ref = get_uistore_collection(camera_select, store_type)
+        query_result = await run_query_to_list(find_by_end_time_range, collection_ref, low_end_ems, high_end_ems,
+                                               return_ids_only = False)
         
-        # Convert to dictionary, with entry ids as keys and store result for each camera
-        one_camera_result = {each_result[ENTRY_ID_FIELD]: each_result for each_result in query_result}
-        aggregate_results_dict[each_camera_name] = one_camera_result
+        # Convert to dictionary, with entry ids as keys
+        return {each_result[ENTRY_ID_FIELD]: each_result for each_result in query_result}
+    
+    # Run metadata retrieval for all known cameras, in parallel
+    camera_names_list = await CAMERA_REGISTRY.get_camera_names_list()
+    aggregate_results_dict = await run_per_camera(camera_names_list, get_one_camera_metadata,
+                                                  ALL_CAMERAS_MAX_CONCURRENCY, ALL_CAMERAS_TIMEOUT_SEC)
     
-    return JSONResponse(aggregate_results_dict)
+    return Fast_JSON_Response(aggregate_results_dict)
 
 # .....................................................................................................................
 
-def uistore_get_all_ids_list(request):
+async def uistore_get_all_ids_list(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -344,16 +341,16 @@ def uistore_get_all_ids_list(request):
     
     # Get data from db
     collection_ref = get_uistore_collection(camera_select, store_type)
-    query_result = get_all_ids(collection_ref)
+    query_result = await get_all_ids(collection_ref)
     
     # Pull out the entry IDs into a list, instead of returning a list of dictionaries
     return_result = [each_entry[ENTRY_ID_FIELD] for each_entry in query_result]
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def uistore_get_ids_list_by_end_time_range(request):
+async def uistore_get_ids_list_by_end_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -363,44 +360,46 @@ def uistore_get_ids_list_by_end_time_range(request):
     
     # Request data from the db
     collection_ref = get_uistore_collection(camera_select, store_type)
-    query_result = find_by_end_time_range(collection_ref, low_end_ems, high_end_ems, return_ids_only = True)
+    query_result = await run_query_to_list(find_by_end_time_range, collection_ref, low_end_ems, high_end_ems,
+                                           return_ids_only = True)
     
     # Pull out the entry IDs into a list, instead of returning a list of dictionaries
     return_result = [each_entry[ENTRY_ID_FIELD] for each_entry in query_result]
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def uistore_all_cameras_get_ids_list_by_end_time_range(request):
+async def uistore_all_cameras_get_ids_list_by_end_time_range(request):
     
-    ''' Same as 'uistore_get_ids_list_by_end_time_range' but with a loop over all cameras '''
+    ''' Same as 'uistore_get_ids_list_by_end_time_range' but for all cameras (queried in parallel) '''
     
     # Get information from route url
     store_type = request.path_params["store_type"]
     low_end_ems = request.path_params["low_end_ems"]
     high_end_ems = request.path_params["high_end_ems"]
     
-    # Run id list retrieval for all known cameras
-    aggregate_results_dict = {}
-    camera_names_list = get_camera_names_list(MCLIENT)
-    for each_camera_name in camera_names_list:
+    # Define the id list retrieval for a single camera
+    async def get_one_camera_ids_list(camera_select):
         
         # Request data from the db
-        collection_ref = get_uistore_collection(each_camera_name, store_type)
-        query_result = find_by_end_time_range(collection_ref, low_end_ems, high_end_ems, return_ids_only = True)
-        
-        # Pull out the entry IDs into a list, instead of returning a list of dictionaries & store for each camera
-        one_camera_result = [each_entry[ENTRY_ID_FIELD] for each_entry in query_result]
-        aggregate_results_dict[each_camera_name] = one_camera_result
+        collection_ref = get_uistore_collection(camera_select, store_type)
+        query_result = await run_query_to_list(find_by_end_time_range, collection_ref, low_end_ems, high_end_ems,
+                                               return_ids_only = True)
         
-        print(each_camera_name, one_camera_result)
+        # Pull out the entry IDs into a list, instead of returning a list of dictionaries
+        return [each_entry[ENTRY_ID_FIELD] for each_entry in query_result]
     
-    return JSONResponse(aggregate_results_dict)
+    # Run id list retrieval for all known cameras, in parallel
+    camera_names_list = await CAMERA_REGISTRY.get_camera_names_list()
+    aggregate_results_dict = await run_per_camera(camera_names_list, get_one_camera_ids_list,
+                                                  ALL_CAMERAS_MAX_CONCURRENCY, ALL_CAMERAS_TIMEOUT_SEC)
+    
+    return Fast_JSON_Response(aggregate_results_dict)
 
 # .....................................................................................................................
 
-def uistore_delete_one_metadata_by_id(request):
+async def uistore_delete_one_metadata_by_id(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -413,7 +412,7 @@ def uistore_delete_one_metadata_by_id(request):
     # Send deletion command to the db
     filter_dict = {ENTRY_ID_FIELD: entry_id}
     collection_ref = get_uistore_collection(camera_select, store_type)
-    pymongo_DeleteResult = collection_ref.delete_one(filter_dict)
+    pymongo_DeleteResult = await run_in_db_executor(collection_ref.delete_one, filter_dict)
     
     # Get the number of deleted documents from the response (if possible!)
     num_deleted = pymongo_DeleteResult.deleted_count
@@ -426,11 +425,11 @@ def uistore_delete_one_metadata_by_id(request):
     return_result = {"time_taken_ms": time_taken_ms,
                      "num_deleted": num_deleted}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def uistore_delete_many_metadata_by_end_time_range(request):
+async def uistore_delete_many_metadata_by_end_time_range(request):
     
     # Get information from route url
     camera_select = request.path_params["camera_select"]
@@ -444,7 +443,7 @@ def uistore_delete_many_metadata_by_end_time_range(request):
     # Send deletion command to the db
     filter_dict = get_end_time_range_query_filter(low_end_ems, high_end_ems)
     collection_ref = get_uistore_collection(camera_select, store_type)
-    pymongo_DeleteResult = collection_ref.delete_many(filter_dict)
+    pymongo_DeleteResult = await run_in_db_executor(collection_ref.delete_many, filter_dict)
     
     # Get the number of deleted documents from the response (if possible!)
     num_deleted = pymongo_DeleteResult.deleted_count
@@ -457,11 +456,11 @@ def uistore_delete_many_metadata_by_end_time_range(request):
     return_result = {"time_taken_ms": time_taken_ms,
                      "num_deleted": num_deleted}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 
-def uistore_set_indexing(request):
+async def uistore_set_indexing(request):
     
     '''
     Hacky function... Used to manually set uistore indexes for a specified camera.
@@ -477,13 +476,13 @@ def uistore_set_indexing(request):
     t_start = perf_counter()
     
     # First check if the index is already set
-    indexes_already_set = check_collection_indexing(collection_ref, KEYS_TO_INDEX)
+    indexes_already_set = await check_collection_indexing(collection_ref, KEYS_TO_INDEX)
     if indexes_already_set:
         return_result = {"already_set": True, "indexes": KEYS_TO_INDEX}
-        return JSONResponse(return_result)
+        return Fast_JSON_Response(return_result)
     
     # Set indexes on target fields if we haven't already
-    mongo_response_list = set_collection_indexing(collection_ref, KEYS_TO_INDEX)
+    mongo_response_list = await set_collection_indexing(collection_ref, KEYS_TO_INDEX)
     
     # End timing
     t_end = perf_counter()
@@ -494,7 +493,7 @@ def uistore_set_indexing(request):
                      "time_taken_ms": time_taken_ms,
                      "mongo_response_list": mongo_response_list}
     
-    return JSONResponse(return_result)
+    return Fast_JSON_Response(return_result)
 
 # .....................................................................................................................
 # .....................................................................................................................
@@ -593,6 +592,10 @@ def build_uistore_routes():
 # Hard-code (global!) variable used to indicate entry (id) access field
 ENTRY_ID_FIELD = "_id"
 
+# Set limits on 'all cameras' requests, which query every camera in parallel
+ALL_CAMERAS_MAX_CONCURRENCY = 8
+ALL_CAMERAS_TIMEOUT_SEC = 10
+
 # Hard-code the list of keys that need indexing
 FINAL_EPOCH_MS_FIELD = "end"
 KEYS_TO_INDEX = [FINAL_EPOCH_MS_FIELD]
@@ -603,6 +606,9 @@ COLLECTION_BASE_NAME = "uistore"
 # Set shared uistore prefix indicator
 COLLECTION_NAME_PREFIX = "{}-".format(COLLECTION_BASE_NAME)
 
+# Register indexing requirements (for all store types), so indexes can be set automatically
+declare_required_indexes(COLLECTION_NAME_PREFIX, KEYS_TO_INDEX, is_name_prefix = True)
+
 
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Demo
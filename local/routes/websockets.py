@@ -49,12 +49,27 @@ find_path_to_local()
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Imports
 
-from local.lib.query_helpers import start_end_times_to_epoch_ms, get_many_metadata_in_time_range
-from local.lib.query_helpers import get_closest_metadata_before_target_ems, get_one_metadata
+import asyncio
+import ujson
+
+from functools import partial
+
+from local.lib.query_helpers import start_end_times_to_epoch_ms, get_many_metadata_by_ids
+from local.lib.async_db_helpers import run_in_db_executor, read_cursor_chunk
+from local.lib.async_db_helpers import get_many_metadata_in_time_range
+from local.lib.async_db_helpers import get_closest_metadata_before_target_ems
 
 from local.lib.response_helpers import encode_jsongz_data
+from local.lib.response_helpers import Fast_JSON_Response
+from local.lib.response_cache import GZIP_RESPONSE_CACHE
+
+from local.lib.mongo_helpers import MCLIENT
+from local.lib.ingest_helpers import ingest_many_to_mongo, check_image_exists, save_image_data
+from local.lib.ingest_helpers import unpack_metadata_and_image_data
+from local.lib.newest_metadata_cache import NEWEST_METADATA_CACHE
+from local.lib.camera_registry import CAMERA_REGISTRY
 
-from local.lib.pathing import BASE_DATA_FOLDER_PATH, build_snapshot_image_pathing, build_background_image_pathing
+from local.lib.image_store import IMAGE_STORE
 
 from local.routes.backgrounds import COLLECTION_NAME as BG_COLLECTION_NAME
 from local.routes.backgrounds import EPOCH_MS_FIELD as BG_EPOCH_MS_FIELD
@@ -62,23 +77,88 @@ from local.routes.backgrounds import get_background_collection
 
 from local.routes.snapshots import COLLECTION_NAME as SNAP_COLLECTION_NAME
 from local.routes.snapshots import EPOCH_MS_FIELD as SNAP_EPOCH_MS_FIELD
-from local.routes.snapshots import get_snapshot_collection
+from local.routes.snapshots import get_snapshot_collection, get_n_samples_index_list, find_subsampled_metadata
+from local.routes.snapshots import add_to_snapshot_timeline
 
 from local.routes.objects import COLLECTION_NAME as OBJ_COLLECTION_NAME
 from local.routes.objects import OBJ_ID_FIELD
-from local.routes.objects import find_by_time_range as find_objs_by_time_range
-from local.routes.objects import get_object_collection
+from local.routes.objects import find_ids_by_time_range_bucketed as find_obj_ids_by_time_range
+from local.routes.objects import get_object_collection, get_object_timebucket_collection
+from local.routes.objects import post_object_time_buckets
 
 from local.routes.stations import COLLECTION_NAME as STATIONS_COLLECTION_NAME
 from local.routes.stations import STN_ID_FIELD
-from local.routes.stations import find_by_time_range as find_stns_by_time_range
+from local.routes.stations import find_ids_by_time_range as find_stn_ids_by_time_range
 from local.routes.stations import get_station_collection
 
-from starlette.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from starlette.routing import Route, WebSocketRoute
 from starlette.websockets import WebSocketDisconnect
 
 
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+class WS_Stream_Credits:
+    
+    '''
+    Class used to handle (optional) client-driven flow control on websocket streams
+    When enabled, the server only sends as many data messages as the client has given 'credit' for.
+    Clients add credit by sending json text messages of the form: {"next": N}
+    When disabled (no initial credit given), all data is sent without waiting on the client
+    '''
+    
+    # .................................................................................................................
+    
+    def __init__(self, ws_request, initial_credits = None):
+        
+        # Store inputs
+        self._ws_request = ws_request
+        self._enabled = (initial_credits is not None)
+        self._num_credits = 0 if initial_credits is None else initial_credits
+    
+    # .................................................................................................................
+    
+    async def use_one(self):
+        
+        ''' Function which should be called before sending each data message. Waits for credit if needed '''
+        
+        # Don't need to do anything if flow control isn't being used
+        if not self._enabled:
+            return
+        
+        # Wait for client to give us more credit, if we've run out
+        # -> Note: this will raise a WebSocketDisconnect error if the client disconnects while we wait
+        # -> Messages are read as plain text & parsed here, so that bad messages don't end the stream
+        while self._num_credits <= 0:
+            try:
+                message_text = await self._ws_request.receive_text()
+            except KeyError:
+                # Binary messages have no text, so they're treated as giving no credit
+                message_text = None
+            self._num_credits += self._parse_credit_message(message_text)
+        self._num_credits -= 1
+        
+        return
+    
+    # .................................................................................................................
+    
+    def _parse_credit_message(self, message_text):
+        
+        ''' Helper used to read the amount of credit given by a client (text) message. Ignores bad messages '''
+        
+        try:
+            message_dict = ujson.loads(message_text)
+            new_credits = int(message_dict.get("next", 0))
+        except (AttributeError, TypeError, ValueError):
+            new_credits = 0
+        
+        return max(0, new_credits)
+    
+    # .................................................................................................................
+    # .................................................................................................................
+
+
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Create object routes
 
@@ -93,11 +173,124 @@ def websocket_route_info(request):
                 "All data transfers use binary data!",
                 "Each route will first send a gzipped-json list of ids/times representing the data being streamed",
                 "The background/snapshot routes stream: metadata-jpg-metadata-jpg-... etc",
-                "The object/station metadata routes stream gzipped-json data"]
+                "  -> Missing images are sent as empty (zero-length) binary messages",
+                "The object/station metadata routes stream gzipped-json data",
+                "  -> Add '?chunk_size=N' to the url to receive a gzipped-json list of up to N entries per message",
+                "  -> Without a chunk size, each message holds a single entry",
+                "The ingest route accepts json text messages (metadata) and binary messages (images)",
+                "  -> Metadata messages: {'collection': <name>, 'data': <one or a list of entries>}",
+                "  -> Image messages: [4 byte header size, big-endian] + [json header] + [jpg bytes]",
+                "     where the json header is: {'collection': <name>, 'epoch_ms': <image epoch ms>}",
+                "  -> Writes are acknowledged in batches, with a json message listing the results",
+                "  -> Sending {'flush': true} forces buffered metadata to be written & acknowledged",
+                "All streaming routes support resuming & flow control, using url query parameters:",
+                "  -> '?resume_after=X' skips all data up to (and including) id/epoch_ms X, in stream order",
+                "     (the initial id/time list only includes the data that will be sent)",
+                "  -> '?credits=N' only sends N data messages, then waits for the client to send {'next': M}",
+                "     (metadata+image pairs and chunked metadata lists each count as 1 message)"]
     
     info_dict = {"info": msg_list}
     
-    return JSONResponse(info_dict)
+    return Fast_JSON_Response(info_dict)
+
+# .....................................................................................................................
+
+def get_ws_stream_resume_options(ws_request):
+    
+    '''
+    Helper used to read (optional) resume & flow control settings from the websocket url query
+    Returns:
+        resume_after (id/epoch_ms value or None), initial_credits (integer or None)
+    '''
+    
+    resume_after = None
+    initial_credits = None
+    
+    # Read each setting, ignoring bad values
+    try:
+        resume_after = int(ws_request.query_params["resume_after"])
+    except (KeyError, ValueError):
+        pass
+    try:
+        initial_credits = max(0, int(ws_request.query_params["credits"]))
+    except (KeyError, ValueError):
+        pass
+    
+    return resume_after, initial_credits
+
+# .....................................................................................................................
+
+def get_resume_start_index(sorted_values_list, resume_after, ascending_order):
+    
+    '''
+    Helper used to find the index (in a sorted list of ids/epoch_ms values) where a resumed stream should start
+    Resumed streams start with the first value that comes after the 'resume_after' value, in stream order
+    '''
+    
+    # Start from the beginning if we're not resuming
+    if resume_after is None:
+        return 0
+    
+    # Find the first value past the resume point
+    for each_idx, each_value in enumerate(sorted_values_list):
+        is_past_resume_point = (each_value > resume_after) if ascending_order else (each_value < resume_after)
+        if is_past_resume_point:
+            return each_idx
+    
+    return len(sorted_values_list)
+
+# .....................................................................................................................
+
+async def ws_stream_metadata_and_images(ws_request, camera_select, image_type, metadata_list, epoch_ms_list,
+                                        stream_credits):
+    
+    '''
+    Helper used to stream metadata & image data (sequentially) over a websocket
+    Images are loaded (in small batches) in a separate task, which reads ahead of the data being sent
+    (up to a fixed limit), so that disk reads & network sends overlap. Since sends wait on the websocket, a slow client
+    will fill up the prefetch queue, which in turn pauses image loading
+    Missing images are sent as empty (zero-length) binary messages
+    '''
+    
+    # Set up bounded storage for pre-loaded data
+    prefetch_queue = asyncio.Queue(maxsize = WS_STREAM_IMAGE_PREFETCH_COUNT)
+    
+    async def prefetch_images():
+        batch_size = WS_STREAM_IMAGE_BATCH_SIZE
+        for batch_idx in range(0, len(epoch_ms_list), batch_size):
+            batch_md_list = metadata_list[batch_idx:(batch_idx + batch_size)]
+            batch_ems_list = epoch_ms_list[batch_idx:(batch_idx + batch_size)]
+            batch_image_list = await run_in_threadpool(IMAGE_STORE.get_many, camera_select, image_type, batch_ems_list)
+            for each_md, each_image_bytes in zip(batch_md_list, batch_image_list):
+                await prefetch_queue.put((each_md, each_image_bytes))
+        return
+    
+    # Start loading image data in the background
+    prefetch_task = asyncio.ensure_future(prefetch_images())
+    try:
+        for _ in range(len(metadata_list)):
+            
+            # Wait for the next image to load (or stop if loading failed)
+            get_task = asyncio.ensure_future(prefetch_queue.get())
+            done_set, _ = await asyncio.wait([get_task, prefetch_task], return_when = asyncio.FIRST_COMPLETED)
+            if get_task not in done_set:
+                prefetch_error = prefetch_task.exception()
+                if prefetch_error is not None:
+                    get_task.cancel()
+                    raise prefetch_error
+            each_md, each_image_bytes = await get_task
+            
+            # Wait for the client to allow more data, if needed
+            await stream_credits.use_one()
+            
+            # Send metadata followed by image data (or an empty message if the image is missing)
+            await ws_request.send_json(each_md, mode = "binary")
+            await ws_request.send_bytes(b'' if each_image_bytes is None else each_image_bytes)
+    
+    finally:
+        prefetch_task.cancel()
+    
+    return
 
 # .....................................................................................................................
 
@@ -116,36 +309,31 @@ async def backgrounds_ws_stream_many_metadata_and_images_by_time_range(ws_reques
     
     # Request data from the db. Careful to get 'active' entry along with range entries
     collection_ref = get_background_collection(camera_select)
-    no_older_entry, active_entry = get_closest_metadata_before_target_ems(collection_ref, start_ems, BG_EPOCH_MS_FIELD)
-    range_query_result = get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, BG_EPOCH_MS_FIELD)
+    no_older_entry, active_entry = \
+        await get_closest_metadata_before_target_ems(collection_ref, start_ems, BG_EPOCH_MS_FIELD)
+    range_query_result = await get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, BG_EPOCH_MS_FIELD)
     
     # Build output
     bg_md_list = [] if no_older_entry else [active_entry]
-    bg_md_list += list(range_query_result)
+    bg_md_list += range_query_result
     epoch_ms_list = [each_md[BG_EPOCH_MS_FIELD] for each_md in bg_md_list]
     
+    # Skip data the client already has, if resuming
+    resume_after, initial_credits = get_ws_stream_resume_options(ws_request)
+    start_idx = get_resume_start_index(epoch_ms_list, resume_after, ascending_order = True)
+    bg_md_list, epoch_ms_list = bg_md_list[start_idx:], epoch_ms_list[start_idx:]
+    
     # Handle websocket connection
     await ws_request.accept()
+    stream_credits = WS_Stream_Credits(ws_request, initial_credits)
     try:
         # First send the ems list data as a reference for which background metadata are being sent
         encoded_ems_list = encode_jsongz_data(epoch_ms_list, 0)
         await ws_request.send_bytes(encoded_ems_list)
         
         # Next send both metadata & image data (sequentially)
-        for each_bg_md, each_snap_ems in zip(bg_md_list, epoch_ms_list):
-            
-            # First send metadata
-            await ws_request.send_json(each_bg_md, mode = "binary")
-            
-            # Build pathing to background image file
-            image_load_path = build_background_image_pathing(BASE_DATA_FOLDER_PATH, camera_select, each_snap_ems)
-            if not os.path.exists(image_load_path):
-                await ws_request.send_bytes(b'')
-            
-            # Load and send background image data
-            with open(image_load_path, "rb") as in_file:
-                image_bytes = in_file.read()
-            await ws_request.send_bytes(image_bytes)
+        await ws_stream_metadata_and_images(ws_request, camera_select, BG_COLLECTION_NAME,
+                                            bg_md_list, epoch_ms_list, stream_credits)
         
     except WebSocketDisconnect:
         pass
@@ -175,48 +363,38 @@ async def snapshots_ws_stream_many_metadata_and_images_by_time_range_n_samples(w
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
     
-    # Request data from the db
+    # Request data from the db, with subsampling handled by the query if needed
+    # -> Treat n_samples = 0 as a special case, indicating no-subsampling
     collection_ref = get_snapshot_collection(camera_select)
-    query_result = get_many_metadata_in_time_range(collection_ref, start_ems, end_ems, SNAP_EPOCH_MS_FIELD,
-                                                   ascending_order = False)
-    
-    # Convert result to a list so we can subsample from it
-    snap_md_list = list(query_result)
-    num_samples_total = len(snap_md_list)
-    
-    # Only sub-sample if the number of requested samples is less than the actual number of samples
-    # -> Also, treat n_samples = 0 as a special case, indicating no-subsampling
-    need_to_subsample = (0 < n_samples < num_samples_total)
+    need_to_subsample = (n_samples > 0)
     if need_to_subsample:
-        step_factor = (num_samples_total - 1) / (n_samples - 1)
-        idx_list = [int(round(k * step_factor)) for k in range(n_samples)]
-        snap_md_list = [snap_md_list[each_idx] for each_idx in idx_list]
+        index_select_func = partial(get_n_samples_index_list, n_samples = n_samples)
+        snap_md_list = await run_in_db_executor(find_subsampled_metadata,
+                                                collection_ref, start_ems, end_ems, index_select_func,
+                                                ascending_order = False)
+    else:
+        snap_md_list = await get_many_metadata_in_time_range(collection_ref, start_ems, end_ems,
+                                                             SNAP_EPOCH_MS_FIELD, ascending_order = False)
     
     # Build epoch listing
     epoch_ms_list = [each_snap_md[SNAP_EPOCH_MS_FIELD] for each_snap_md in snap_md_list]
     
+    # Skip data the client already has, if resuming
+    resume_after, initial_credits = get_ws_stream_resume_options(ws_request)
+    start_idx = get_resume_start_index(epoch_ms_list, resume_after, ascending_order = False)
+    snap_md_list, epoch_ms_list = snap_md_list[start_idx:], epoch_ms_list[start_idx:]
+    
     # Handle websocket connection
     await ws_request.accept()
+    stream_credits = WS_Stream_Credits(ws_request, initial_credits)
     try:
         # First send the ems list data as a reference for which snapshot metadata are being sent, then send each entry
         encoded_ems_list = encode_jsongz_data(epoch_ms_list, 0)
         await ws_request.send_bytes(encoded_ems_list)
         
         # Next send both metadata & image data (sequentially)
-        for each_snap_md, each_snap_ems in zip(snap_md_list, epoch_ms_list):
-            
-            # First send metadata
-            await ws_request.send_json(each_snap_md, mode = "binary")
-            
-            # Build pathing to snapshot image file
-            image_load_path = build_snapshot_image_pathing(BASE_DATA_FOLDER_PATH, camera_select, each_snap_ems)
-            if not os.path.exists(image_load_path):
-                await ws_request.send_bytes(b'')
-            
-            # Load and send snapshot image data
-            with open(image_load_path, "rb") as in_file:
-                image_bytes = in_file.read()
-            await ws_request.send_bytes(image_bytes)
+        await ws_stream_metadata_and_images(ws_request, camera_select, SNAP_COLLECTION_NAME,
+                                            snap_md_list, epoch_ms_list, stream_credits)
         
     except WebSocketDisconnect:
         pass
@@ -232,6 +410,73 @@ async def snapshots_ws_stream_many_metadata_and_images_by_time_range_n_samples(w
 
 # .....................................................................................................................
 
+def get_ws_stream_chunk_size(ws_request):
+    
+    '''
+    Helper used to read the (optional) number of entries to send per websocket message, from the url query
+    Returns None if a chunk size isn't given (or is invalid), which indicates one entry per message
+    '''
+    
+    # Use one-entry-per-message if no chunk size is given
+    chunk_size_str = ws_request.query_params.get("chunk_size", None)
+    if chunk_size_str is None:
+        return None
+    
+    # Ignore bad chunk size values
+    try:
+        chunk_size = int(chunk_size_str)
+    except ValueError:
+        return None
+    
+    return max(1, min(chunk_size, WS_STREAM_MAX_CHUNK_SIZE))
+
+# .....................................................................................................................
+
+async def ws_stream_metadata_gz_by_ids(ws_request, collection_ref, id_field, ids_list, stream_credits,
+                                       chunk_size = None):
+    
+    '''
+    Helper used to stream metadata (with gzip encoding) for a list of ids, using a single db cursor
+    If a chunk size is given, each message contains a list of (up to) chunk-size entries,
+    otherwise each message contains a single entry
+    Note: ids are assumed to be sorted in descending order!
+    '''
+    
+    # Read data from the db in large batches, regardless of how much data is sent per message
+    send_as_list = (chunk_size is not None)
+    read_size = chunk_size if send_as_list else WS_STREAM_CURSOR_BATCH_SIZE
+    cursor_batch_size = max(read_size, WS_STREAM_CURSOR_BATCH_SIZE)
+    cursor_ref = get_many_metadata_by_ids(collection_ref, ids_list, id_field,
+                                          ascending_order = False, batch_size = cursor_batch_size)
+    
+    try:
+        while True:
+            
+            # Stop once we've run out of data
+            md_chunk_list = await read_cursor_chunk(cursor_ref, read_size)
+            if not md_chunk_list:
+                break
+            
+            # Send entire chunks of data at once if possible
+            if send_as_list:
+                await stream_credits.use_one()
+                encoded_md_chunk = encode_jsongz_data(md_chunk_list, 3)
+                await ws_request.send_bytes(encoded_md_chunk)
+                continue
+            
+            # Otherwise send entries individually
+            for each_md in md_chunk_list:
+                await stream_credits.use_one()
+                encoded_md = encode_jsongz_data(each_md, 3)
+                await ws_request.send_bytes(encoded_md)
+    
+    finally:
+        await run_in_db_executor(cursor_ref.close)
+    
+    return
+
+# .....................................................................................................................
+
 def ws_objects_stream_many_DUMMY(): # Included since spyder IDE hides async functions in outline view!
     raise NotImplementedError("Not a real route!")
 
@@ -244,24 +489,29 @@ async def objects_ws_stream_many_metadata_gz_by_time_range(ws_request):
     
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
+    chunk_size = get_ws_stream_chunk_size(ws_request)
     
     # First request all object ids from the db
     collection_ref = get_object_collection(camera_select)
-    query_result = find_objs_by_time_range(collection_ref, start_ems, end_ems,
-                                           return_ids_only = True, ascending_order = False)
-    obj_ids_list = [each_entry[OBJ_ID_FIELD] for each_entry in query_result]
+    bucket_collection_ref = get_object_timebucket_collection(camera_select)
+    obj_ids_list = await run_in_db_executor(find_obj_ids_by_time_range,
+                                            collection_ref, bucket_collection_ref, start_ems, end_ems,
+                                            ascending_order = False)
+    
+    # Skip data the client already has, if resuming
+    resume_after, initial_credits = get_ws_stream_resume_options(ws_request)
+    obj_ids_list = obj_ids_list[get_resume_start_index(obj_ids_list, resume_after, ascending_order = False):]
     
     # Handle websocket connection
     await ws_request.accept()
+    stream_credits = WS_Stream_Credits(ws_request, initial_credits)
     try:
         
-        # First send the list of ids as a reference for which object data is are being sent, then send each entry
+        # First send the list of ids as a reference for which object data is are being sent, then send the data
         encoded_ids_list = encode_jsongz_data(obj_ids_list, 0)
         await ws_request.send_bytes(encoded_ids_list)
-        for each_obj_id in obj_ids_list:
-            each_obj_md = get_one_metadata(collection_ref, OBJ_ID_FIELD, each_obj_id)
-            encoded_obj_md = encode_jsongz_data(each_obj_md, 3)
-            await ws_request.send_bytes(encoded_obj_md)
+        await ws_stream_metadata_gz_by_ids(ws_request, collection_ref, OBJ_ID_FIELD, obj_ids_list,
+                                           stream_credits, chunk_size)
         #print("DEBUG: DISCONNECT")
         
     except WebSocketDisconnect:
@@ -293,26 +543,29 @@ async def stations_ws_stream_many_metadata_gz_by_time_range(ws_request):
     
     # Convert start/end times to ems values
     start_ems, end_ems = start_end_times_to_epoch_ms(start_time, end_time)
+    chunk_size = get_ws_stream_chunk_size(ws_request)
     
     # First request all station data ids from the db
     collection_ref = get_station_collection(camera_select)
-    query_result = find_stns_by_time_range(collection_ref, start_ems, end_ems,
-                                           return_ids_only = True, ascending_order = False)
-    stn_ids_list = [each_entry[STN_ID_FIELD] for each_entry in query_result]
+    stn_ids_list = await run_in_db_executor(find_stn_ids_by_time_range, collection_ref, start_ems, end_ems,
+                                            ascending_order = False)
+    
+    # Skip data the client already has, if resuming
+    resume_after, initial_credits = get_ws_stream_resume_options(ws_request)
+    stn_ids_list = stn_ids_list[get_resume_start_index(stn_ids_list, resume_after, ascending_order = False):]
     
     # Handle websocket connection
     await ws_request.accept()
+    stream_credits = WS_Stream_Credits(ws_request, initial_credits)
     try:
         
         # First send the list of ids as a reference for which station data is are being sent
         encoded_ids_list = encode_jsongz_data(stn_ids_list, 0)
         await ws_request.send_bytes(encoded_ids_list)
         
-        # Next send every individual metadata entry (with gzip encoding)
-        for each_stn_id in stn_ids_list:
-            each_stn_md = get_one_metadata(collection_ref, STN_ID_FIELD, each_stn_id)
-            encoded_stn_md = encode_jsongz_data(each_stn_md, 3)
-            await ws_request.send_bytes(encoded_stn_md)
+        # Next send all of the metadata (with gzip encoding)
+        await ws_stream_metadata_gz_by_ids(ws_request, collection_ref, STN_ID_FIELD, stn_ids_list,
+                                           stream_credits, chunk_size)
         #print("DEBUG: DISCONNECT")
         
     except WebSocketDisconnect:
@@ -333,6 +586,186 @@ async def stations_ws_stream_many_metadata_gz_by_time_range(ws_request):
 # .....................................................................................................................
 
 
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Create ingest routes
+
+# .....................................................................................................................
+
+async def flush_ws_ingest_metadata(camera_select, metadata_buffer_dict):
+    
+    '''
+    Helper used to write all buffered metadata into the db (one insert_many call per collection)
+    Clears the buffers on completion!
+    Returns:
+        metadata_ack_dict (keys are collection names, values are dicts with the insert count & any errors)
+    '''
+    
+    metadata_ack_dict = {}
+    for each_collection_name, each_buffer_list in metadata_buffer_dict.items():
+        
+        # Skip empty buffers
+        if not each_buffer_list:
+            continue
+        
+        # Write all buffered entries at once
+        post_success, mongo_response = \
+            await ingest_many_to_mongo(MCLIENT, camera_select, each_collection_name, each_buffer_list)
+        metadata_ack_dict[each_collection_name] = {"count": len(each_buffer_list),
+                                                   "success": post_success,
+                                                   "mongo_response": mongo_response}
+        
+        # Keep object time buckets, snapshot timelines, newest metadata & cached responses in sync with the stored data
+        is_duplicate_error = (mongo_response.get("error", None) == "bulk write error")
+        if post_success or is_duplicate_error:
+            NEWEST_METADATA_CACHE.update_newest_metadata(camera_select, each_collection_name, each_buffer_list,
+                                                         all_inserted = post_success)
+            GZIP_RESPONSE_CACHE.invalidate_for_new_data(camera_select, each_buffer_list)
+            CAMERA_REGISTRY.add_camera(camera_select)
+            if each_collection_name == OBJ_COLLECTION_NAME:
+                await post_object_time_buckets(camera_select, each_buffer_list, all_inserted = post_success)
+            if each_collection_name == SNAP_COLLECTION_NAME:
+                add_to_snapshot_timeline(camera_select, each_buffer_list)
+        each_buffer_list.clear()
+    
+    return metadata_ack_dict
+
+# .....................................................................................................................
+
+async def save_ws_ingest_image(camera_select, message_bytes):
+    
+    '''
+    Helper used to save image data received through the ingest websocket
+    Returns:
+        image_epoch_ms, save_status (one of "saved", "exists" or an error message)
+    '''
+    
+    # Split the message into the header & image data components
+    try:
+        header_dict, image_data = unpack_metadata_and_image_data(message_bytes)
+        collection_name = header_dict["collection"]
+        image_epoch_ms = int(header_dict["epoch_ms"])
+    except (ValueError, KeyError, TypeError) as err:
+        return None, "bad image message ({})".format(err)
+    
+    # Only allow image data for valid collections
+    if collection_name not in WS_INGEST_IMAGE_COLLECTIONS:
+        return image_epoch_ms, "bad image collection ({})".format(collection_name)
+    
+    # Don't overwrite existing images
+    image_already_exists = await check_image_exists(camera_select, collection_name, image_epoch_ms)
+    if image_already_exists:
+        return image_epoch_ms, "exists"
+    
+    # Save the data to the image store (not mongodb!)
+    try:
+        image_saved = await save_image_data(camera_select, collection_name, image_epoch_ms, image_data)
+    except OSError as err:
+        return image_epoch_ms, "error saving image ({})".format(err)
+    
+    # Clear any cached (historical) responses that the new image may belong to
+    if image_saved:
+        GZIP_RESPONSE_CACHE.invalidate_for_new_data(camera_select, [image_epoch_ms])
+    
+    return image_epoch_ms, "saved" if image_saved else "exists"
+
+# .....................................................................................................................
+
+def ws_ingest_DUMMY(): # Included since spyder IDE hides async functions in outline view!
+    raise NotImplementedError("Not a real route!")
+
+async def camera_ws_ingest(ws_request):
+    
+    '''
+    Long-lived websocket route used to upload (many) metadata & image entries for a single camera
+    Metadata is buffered and written to the db in batches, with the results acknowledged in batches as well
+    '''
+    
+    # Get information from route url
+    camera_select = ws_request.path_params["camera_select"]
+    
+    # Set up storage for buffered metadata & acknowledgements
+    metadata_buffer_dict = {each_collection_name: [] for each_collection_name in WS_INGEST_METADATA_COLLECTIONS}
+    image_ack_list = []
+    error_list = []
+    num_unacknowledged = 0
+    
+    # Handle websocket connection
+    client_disconnected = False
+    await ws_request.accept()
+    try:
+        while True:
+            
+            # Wait for new data, but give up periodically so that buffered data doesn't sit around too long
+            force_flush = False
+            try:
+                message = await asyncio.wait_for(ws_request.receive(), timeout = WS_INGEST_FLUSH_PERIOD_SEC)
+            except asyncio.TimeoutError:
+                message = None
+                force_flush = True
+            
+            # Stop if the client disconnects
+            if message is not None and message["type"] == "websocket.disconnect":
+                client_disconnected = True
+                break
+            
+            # Handle image data
+            message_bytes = None if message is None else message.get("bytes")
+            if message_bytes is not None:
+                image_epoch_ms, save_status = await save_ws_ingest_image(camera_select, message_bytes)
+                image_ack_list.append({"epoch_ms": image_epoch_ms, "status": save_status})
+                num_unacknowledged += 1
+            
+            # Handle metadata (or commands)
+            message_text = None if message is None else message.get("text")
+            if message_text is not None:
+                try:
+                    message_dict = ujson.loads(message_text)
+                    force_flush = bool(message_dict.get("flush", False))
+                    collection_name = message_dict.get("collection", None)
+                    message_data = message_dict.get("data", None)
+                except (ValueError, AttributeError) as err:
+                    error_list.append("bad metadata message ({})".format(err))
+                    collection_name, message_data = None, None
+                
+                # Buffer metadata for writing to the db later
+                if message_data is not None:
+                    if collection_name in metadata_buffer_dict:
+                        new_entries_list = message_data if isinstance(message_data, list) else [message_data]
+                        metadata_buffer_dict[collection_name] += new_entries_list
+                        num_unacknowledged += len(new_entries_list)
+                    else:
+                        error_list.append("bad metadata collection ({})".format(collection_name))
+            
+            # Write buffered data & acknowledge results if we've accumulated enough data (or timed out)
+            need_ack = (num_unacknowledged >= WS_INGEST_BATCH_SIZE) or (force_flush and num_unacknowledged > 0)
+            need_ack = need_ack or (len(error_list) > 0)
+            if need_ack:
+                metadata_ack_dict = await flush_ws_ingest_metadata(camera_select, metadata_buffer_dict)
+                ack_dict = {"metadata": metadata_ack_dict, "images": image_ack_list, "errors": error_list}
+                await ws_request.send_json(ack_dict)
+                image_ack_list, error_list = [], []
+                num_unacknowledged = 0
+        
+    except WebSocketDisconnect:
+        client_disconnected = True
+    
+    except Exception as err:
+        error_type = (err.__class__.__name__)
+        print("", "Websocket error ({})".format(error_type), err, sep = "\n")
+    
+    # Make sure any remaining (buffered) data is written, even if we can't acknowledge it
+    await flush_ws_ingest_metadata(camera_select, metadata_buffer_dict)
+    
+    # Make sure we shut-down the connection when we're done
+    if not client_disconnected:
+        await ws_request.close()
+    
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Define call functions
 
@@ -361,7 +794,10 @@ def build_websocket_routes():
                     objects_ws_stream_many_metadata_gz_by_time_range),
      
      WebSocketRoute(station_url("stream-many-metadata-gz", "by-time-range", "{start_time}", "{end_time}"),
-                    stations_ws_stream_many_metadata_gz_by_time_range)
+                    stations_ws_stream_many_metadata_gz_by_time_range),
+     
+     WebSocketRoute(url("bdb", "ingest"),
+                    camera_ws_ingest)
     ]
     
     return websocket_routes
@@ -373,7 +809,22 @@ def build_websocket_routes():
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Global setup
 
-# Nothing!
+# Set up the collections that can be written into through the ingest websocket
+WS_INGEST_METADATA_COLLECTIONS = (OBJ_COLLECTION_NAME, STATIONS_COLLECTION_NAME,
+                                  SNAP_COLLECTION_NAME, BG_COLLECTION_NAME)
+WS_INGEST_IMAGE_COLLECTIONS = (SNAP_COLLECTION_NAME, BG_COLLECTION_NAME)
+
+# Set up ingest batching (writes are acknowledged after this many entries, or after a period of inactivity)
+WS_INGEST_BATCH_SIZE = 200
+WS_INGEST_FLUSH_PERIOD_SEC = 0.5
+
+# Set up metadata streaming (number of entries read from the db per round trip & max entries per message)
+WS_STREAM_CURSOR_BATCH_SIZE = 500
+WS_STREAM_MAX_CHUNK_SIZE = 5000
+
+# Set up image streaming (max number of images loaded ahead of the image being sent & images loaded per batch)
+WS_STREAM_IMAGE_PREFETCH_COUNT = 8
+WS_STREAM_IMAGE_BATCH_SIZE = 4
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:59:41 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import argparse
+
+from time import perf_counter
+
+from local.lib.pathing import BASE_DATA_FOLDER_PATH, BASE_CAMERAS_FOLDER_PATH
+from local.lib.image_store import Folder_Image_Store, Packed_Image_Store, load_segment_index_records
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def parse_migration_args():
+    
+    # Set up argument parsing
+    ap_obj = argparse.ArgumentParser(description = "Convert stored images between the 'folders' & 'packed' layouts."
+                                                   " The dbserver must not be running while migrating!")
+    ap_obj.add_argument("-t", "--to_engine", default = "packed", type = str, choices = ["packed", "folders"],
+                        help = "Storage engine to convert images to. Default: packed")
+    ap_obj.add_argument("-c", "--camera", default = None, type = str,
+                        help = "Only migrate images for the given camera. Default: all cameras")
+    ap_obj.add_argument("--keep_files", default = False, action = "store_true",
+                        help = "Don't delete the original image files/segments after they're converted")
+    ap_obj.add_argument("--dry_run", default = False, action = "store_true",
+                        help = "Only report what would be migrated, without changing anything")
+    
+    return vars(ap_obj.parse_args())
+
+# .....................................................................................................................
+
+def get_hour_group_paths(camera_select, to_engine):
+    
+    '''
+    Function used to find all hourly groups of images that need to be converted for a single camera
+    When converting to the packed layout, these are hour folders. Otherwise they are segment index files
+    Returns:
+        hour_group_paths_list (list of tuples: (image type, path to hour folder or segment index))
+    '''
+    
+    hour_group_paths_list = []
+    for each_image_type in ["snapshots", "backgrounds"]:
+        
+        # Skip missing image types (e.g. cameras that never saved backgrounds)
+        image_type_folder_path = os.path.join(BASE_CAMERAS_FOLDER_PATH, camera_select, each_image_type)
+        if not os.path.isdir(image_type_folder_path):
+            continue
+        
+        for each_date_name in sorted(os.listdir(image_type_folder_path)):
+            date_folder_path = os.path.join(image_type_folder_path, each_date_name)
+            if not os.path.isdir(date_folder_path):
+                continue
+            
+            for each_hour_name in sorted(os.listdir(date_folder_path)):
+                hour_path = os.path.join(date_folder_path, each_hour_name)
+                is_hour_folder = os.path.isdir(hour_path)
+                is_segment_index = each_hour_name.endswith(".idx")
+                if (to_engine == "packed" and is_hour_folder) or (to_engine == "folders" and is_segment_index):
+                    hour_group_paths_list.append((each_image_type, hour_path))
+    
+    return hour_group_paths_list
+
+# .....................................................................................................................
+
+def pack_hour_folder(packed_store, camera_select, image_type, hour_folder_path, keep_files):
+    
+    ''' Function used to copy all images from an hour folder into the matching segment '''
+    
+    # Load files in time order, so that segments are written in the same order as normal saving
+    image_ems_list = []
+    for each_file_name in os.listdir(hour_folder_path):
+        file_name_only, file_ext = os.path.splitext(each_file_name)
+        if file_ext == ".jpg" and file_name_only.isdigit():
+            image_ems_list.append(int(file_name_only))
+    image_ems_list.sort()
+    
+    # Copy each image into the segment, then remove the original file
+    # -> Images already in the segment (e.g. from an interrupted migration) are skipped, but still removed
+    num_images = 0
+    for each_ems in image_ems_list:
+        image_file_path = os.path.join(hour_folder_path, "{}.jpg".format(each_ems))
+        with open(image_file_path, "rb") as in_file:
+            image_data = in_file.read()
+        num_images += int(packed_store.append_to_segment(camera_select, image_type, each_ems, image_data))
+        if not keep_files:
+            os.remove(image_file_path)
+    
+    # Clean up the (hopefully) empty folder
+    if not keep_files:
+        try:
+            os.rmdir(hour_folder_path)
+        except OSError:
+            print("  Warning: couldn't remove folder (not empty?)", "  @ {}".format(hour_folder_path), sep = "\n")
+    
+    return num_images
+
+# .....................................................................................................................
+
+def unpack_segment(folder_store, packed_store, camera_select, image_type, segment_index_path, keep_files):
+    
+    ''' Function used to write every image in a segment back out as separate files '''
+    
+    # Load the segment index, which lists every (non-removed) image in the segment
+    index_dict = {}
+    load_segment_index_records(segment_index_path, index_dict)
+    
+    # Copy each image into its own file (existing files are never overwritten)
+    num_images = 0
+    for each_ems in sorted(index_dict.keys()):
+        image_data = packed_store.get(camera_select, image_type, each_ems)
+        if image_data is not None:
+            num_images += int(folder_store.put(camera_select, image_type, each_ems, image_data))
+    
+    # Remove the segment & index files
+    if not keep_files:
+        segment_data_path = "{}.seg".format(os.path.splitext(segment_index_path)[0])
+        for each_path in [segment_data_path, segment_index_path]:
+            try:
+                os.remove(each_path)
+            except FileNotFoundError:
+                pass
+    
+    return num_images
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Main
+
+if __name__ == "__main__":
+    
+    # Get script arguments
+    script_args = parse_migration_args()
+    to_engine = script_args["to_engine"]
+    camera_arg = script_args["camera"]
+    keep_files = script_args["keep_files"]
+    dry_run = script_args["dry_run"]
+    
+    # Create both storage engines, since we read from one & write to the other
+    folder_store = Folder_Image_Store(BASE_DATA_FOLDER_PATH)
+    packed_store = Packed_Image_Store(BASE_DATA_FOLDER_PATH)
+    
+    # Figure out which cameras to migrate
+    camera_names_list = sorted(os.listdir(BASE_CAMERAS_FOLDER_PATH)) if camera_arg is None else [camera_arg]
+    print("", "Migrating images to '{}' layout".format(to_engine), "  @ {}".format(BASE_CAMERAS_FOLDER_PATH),
+          sep = "\n")
+    
+    t_start = perf_counter()
+    total_images = 0
+    for each_camera in camera_names_list:
+        
+        # Find every hour of images needing conversion
+        hour_group_paths_list = get_hour_group_paths(each_camera, to_engine)
+        print("", "{}: {} hours to migrate".format(each_camera, len(hour_group_paths_list)), sep = "\n")
+        if dry_run:
+            continue
+        
+        camera_images = 0
+        for each_image_type, each_path in hour_group_paths_list:
+            if to_engine == "packed":
+                camera_images += pack_hour_folder(packed_store, each_camera, each_image_type, each_path,
+                                                  keep_files)
+            else:
+                camera_images += unpack_segment(folder_store, packed_store, each_camera, each_image_type, each_path,
+                                                keep_files)
+        print("  --> {} images migrated".format(camera_images))
+        total_images += camera_images
+    
+    # Final feedback
+    t_end = perf_counter()
+    print("", "Done! Migrated {} images ({:.1f} seconds)".format(total_images, t_end - t_start), "", sep = "\n")
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+